@@ -0,0 +1,228 @@
+import asyncio
+import glob
+import json
+import re
+import socket
+import time
+import zlib
+
+from aiohttp import web
+
+RECORDED_ASSET_DATA = "repository/asset_data/*/*.json"
+
+SENTIMENT_CONTENT = {
+    "sentiment": "positive",
+    "confidence": 0.72,
+    "intent": "Benchmark sentiment",
+}
+
+RECOMMENDATION_CONTENT = {
+    "recommendation": "hold",
+    "confidence": 0.64,
+    "intent": "Benchmark recommendation",
+    "pattern": "consolidation",
+    "position": "none",
+    "support_and_resistance": {"support": 240.0, "resistance": 262.5, "ratio": 1.8},
+    "entry": {"price": 248.0, "time": "2024-10-04 09:30"},
+    "exit": {"price": 259.0, "time": "2024-10-08 16:00"},
+}
+
+CONTENT_BY_SCHEMA = {
+    "SentimentResponse": SENTIMENT_CONTENT,
+    "RecommendationResponse": RECOMMENDATION_CONTENT,
+}
+
+# How the multi-strategy prompt introduces each strategy
+STRATEGY_HEADER = re.compile(r'^Strategy "(.+)":$', re.MULTILINE)
+
+
+def get_content(schema: str, messages: list[dict]) -> dict:
+    if schema != "StrategyRecommendationsResponse":
+        return CONTENT_BY_SCHEMA[schema]
+    prompt = messages[-1]["content"][0]["text"]
+    return {
+        "recommendations": [
+            {"strategy": name, **RECOMMENDATION_CONTENT}
+            for name in STRATEGY_HEADER.findall(prompt)
+        ]
+    }
+
+
+def load_recorded_charts(pattern: str = RECORDED_ASSET_DATA) -> dict[tuple, dict]:
+    """Recorded chart payloads keyed by (range, interval); the one with the
+    most bars wins when several share a key."""
+    charts: dict[tuple, dict] = {}
+    for path in sorted(glob.glob(pattern)):
+        with open(path) as f:
+            recorded = json.load(f)
+        # Skip the latest_* headers that runs write next to the payloads
+        if "info" not in recorded:
+            continue
+        info = recorded["info"]
+        key = (info["meta"]["range"], info["meta"]["dataGranularity"])
+        if key not in charts or len(info["timestamp"]) > len(charts[key]["timestamp"]):
+            charts[key] = info
+    return charts
+
+
+def chart_for_symbol(info: dict, symbol: str) -> dict:
+    """A copy of `info` for `symbol`, with prices scaled by a per-symbol
+    factor so every symbol gets distinct bars (and chart digests)."""
+    factor = 1 + (zlib.crc32(symbol.encode()) % 1000) / 10_000
+    quote = info["indicators"]["quote"][0]
+    scaled = {
+        key: [None if v is None else round(v * factor, 4) for v in values]
+        for key, values in quote.items()
+        if key != "volume"
+    }
+    return {
+        **info,
+        "meta": {**info["meta"], "symbol": symbol},
+        "indicators": {
+            **info["indicators"],
+            "quote": [{**quote, **scaled}],
+        },
+    }
+
+
+def fake_chat_completion(body: dict) -> dict:
+    """A chat completion whose content satisfies the requested JSON schema."""
+    schema = body["response_format"]["json_schema"]["name"]
+    prompt_tokens = len(json.dumps(body["messages"])) // 4
+    return {
+        "id": "chatcmpl-benchmark",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body["model"],
+        "choices": [
+            {
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": json.dumps(get_content(schema, body["messages"])),
+                    "refusal": None,
+                },
+                "logprobs": None,
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": 60,
+            "total_tokens": prompt_tokens + 60,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    }
+
+
+def fake_chat_completion_chunks(body: dict, pieces: int = 8) -> list[dict]:
+    """The same completion as `fake_chat_completion`, as stream chunks whose
+    content arrives in `pieces` parts, plus a usage chunk when requested."""
+    completion = fake_chat_completion(body)
+    content = completion["choices"][0]["message"]["content"]
+    step = -(-len(content) // pieces)
+
+    def chunk(choices: list[dict], usage: dict | None = None) -> dict:
+        return {
+            "id": completion["id"],
+            "object": "chat.completion.chunk",
+            "created": completion["created"],
+            "model": completion["model"],
+            "choices": choices,
+            "usage": usage,
+        }
+
+    chunks = [
+        chunk(
+            [
+                {
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": content[i : i + step]},
+                    "logprobs": None,
+                    "finish_reason": None,
+                }
+            ]
+        )
+        for i in range(0, len(content), step)
+    ]
+    chunks.append(
+        chunk([{"index": 0, "delta": {}, "logprobs": None, "finish_reason": "stop"}])
+    )
+    if (body.get("stream_options") or {}).get("include_usage"):
+        chunks.append(chunk([], completion["usage"]))
+    return chunks
+
+
+class FakeUpstreams:
+    """Local stand-ins for yh-finance and the OpenAI chat completions API,
+    each answering after a fixed latency."""
+
+    def __init__(self, yh_latency: float = 0.0, openai_latency: float = 0.0):
+        self.yh_latency = yh_latency
+        self.openai_latency = openai_latency
+        self.charts = load_recorded_charts()
+        self.requests = {"yh-finance": 0, "openai": 0}
+        self._runners: list[web.AppRunner] = []
+        self.yh_base_url = ""
+        self.openai_base_url = ""
+
+    async def start(self):
+        yh_app = web.Application()
+        yh_app.router.add_get("/stock/v3/get-chart", self._get_chart)
+        openai_app = web.Application(client_max_size=64 * 1024**2)
+        openai_app.router.add_post("/v1/chat/completions", self._chat_completions)
+        self.yh_base_url = await self._serve(yh_app)
+        self.openai_base_url = f"{await self._serve(openai_app)}/v1"
+
+    async def close(self):
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners.clear()
+
+    async def __aenter__(self) -> "FakeUpstreams":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _serve(self, app: web.Application) -> str:
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        await web.SockSite(runner, sock).start()
+        self._runners.append(runner)
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+    async def _get_chart(self, request: web.Request) -> web.Response:
+        self.requests["yh-finance"] += 1
+        await asyncio.sleep(self.yh_latency)
+        key = (request.query["range"], request.query["interval"])
+        info = self.charts.get(key) or max(
+            self.charts.values(), key=lambda i: len(i["timestamp"])
+        )
+        info = chart_for_symbol(info, request.query["symbol"])
+        return web.json_response({"chart": {"result": [info], "error": None}})
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        self.requests["openai"] += 1
+        body = await request.json()
+        if body.get("stream"):
+            return await self._stream_chat_completion(request, body)
+        await asyncio.sleep(self.openai_latency)
+        return web.json_response(fake_chat_completion(body))
+
+    async def _stream_chat_completion(
+        self, request: web.Request, body: dict
+    ) -> web.StreamResponse:
+        # The latency is spread over the chunks, as a model generates them
+        chunks = fake_chat_completion_chunks(body)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for chunk in chunks:
+            await asyncio.sleep(self.openai_latency / len(chunks))
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
@@ -0,0 +1,294 @@
+"""Benchmarks the recommendation pipeline against local fake upstreams.
+
+    uv run python -m benchmarks.run
+    uv run python -m benchmarks.run --scales 1 10 100 1000 --openai-latency 0.5
+    uv run python -m benchmarks.run --update-baseline
+
+Results are compared against benchmarks/baseline.json; the run exits non-zero
+if any benchmark is slower than its baseline by more than --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+
+from benchmarks.fake_upstreams import (
+    RECOMMENDATION_CONTENT,
+    FakeUpstreams,
+    chart_for_symbol,
+    load_recorded_charts,
+)
+from src.application.pipeline import RecommendationPipeline
+from src.application.recommendation_engine import RecommendationEngine
+from src.application.sentiment_analyzer import SentimentAnalyzer
+from src.application.watchlist_scanner import WatchlistScanner
+from src.config import PROMPT_DIR, STRATEGIES_DIR
+from src.core.metrics import metrics
+from src.core.rate_limiter import RateLimiter
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetDataFetcher, decode_asset_data
+from src.data.ohlcv import OhlcvSeries
+from src.data.repository.asset_data import AssetDataRepository
+from src.data.repository.ohlcv_store import OhlcvStore
+from src.data.repository.recommendation import RecommendationRepository
+from src.data.repository.sentiment import SentimentRepository
+from src.data.repository.trading_strategy import get_all_trading_strategies
+from src.data.value_objects import Asset, AssetType, Sentiment, TimeRange
+from src.infrastructure.chart_renderer import (
+    ChartRenderer,
+    ChartRequest,
+    render_candlestick_chart,
+)
+from src.infrastructure.openai_client import (
+    OpenAIClient,
+    RecommendationResponse,
+    SentimentResponse,
+)
+from src.infrastructure.prompt_loader import PromptLoader
+
+BASELINE_FILE = "benchmarks/baseline.json"
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_TOLERANCE = 0.25
+TIME_FRAME = TimeFrame(TimeRange.DAY_5, TimeRange.MINS_30)
+
+# Quotas aren't what is being measured
+UNLIMITED = 1e9
+
+
+async def bench_pipeline(
+    n_symbols: int,
+    work_dir: str,
+    yh_latency: float,
+    openai_latency: float,
+    max_concurrency: int,
+) -> float:
+    """Seconds to scan `n_symbols` assets with one strategy, end to end."""
+    assets = [Asset(f"SYM{i:04d}", AssetType.STOCK) for i in range(n_symbols)]
+    strategies = get_all_trading_strategies(
+        STRATEGIES_DIR, PromptLoader(STRATEGIES_DIR)
+    )[:1]
+    prompt_loader = PromptLoader(PROMPT_DIR)
+    sentiment_repository = SentimentRepository(os.path.join(work_dir, "sentiment"))
+
+    async with (
+        FakeUpstreams(yh_latency, openai_latency) as upstreams,
+        AssetDataFetcher(
+            base_url=upstreams.yh_base_url,
+            rate_limiter=RateLimiter("yh-finance", UNLIMITED),
+        ) as fetcher,
+        ChartRenderer(persist_dir=None) as chart_renderer,
+        OpenAIClient(
+            base_url=upstreams.openai_base_url,
+            api_key="benchmark",
+            rate_limiter=RateLimiter("openai", UNLIMITED),
+        ) as openai_client,
+    ):
+        sentiment_analyzer = SentimentAnalyzer(openai_client, prompt_loader)
+        scanner = WatchlistScanner(
+            sentiment_analyzer,
+            RecommendationPipeline(
+                sentiment_analyzer,
+                RecommendationEngine(
+                    openai_client,
+                    prompt_loader,
+                    sentiment_repository,
+                    fetcher,
+                    AssetDataRepository(
+                        os.path.join(work_dir, "asset_data"),
+                        OhlcvStore(os.path.join(work_dir, "ohlcv")),
+                    ),
+                    chart_renderer=chart_renderer,
+                ),
+                sentiment_repository,
+                RecommendationRepository(os.path.join(work_dir, "recommendations")),
+            ),
+            max_concurrency=max_concurrency,
+        )
+
+        started = time.perf_counter()
+        results = [r async for r in scanner.scan(assets, strategies, TIME_FRAME)]
+        elapsed = time.perf_counter() - started
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        raise RuntimeError(f"{len(failed)} pipeline runs failed: {failed[0].error}")
+    return elapsed
+
+
+def bench(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """Median seconds per call over `repeat` rounds of `number` calls."""
+    func()
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - started) / number)
+    return statistics.median(rounds)
+
+
+async def bench_async(
+    func: Callable[[], Awaitable[object]], number: int, repeat: int = 5
+) -> float:
+    await func()
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            await func()
+        rounds.append((time.perf_counter() - started) / number)
+    return statistics.median(rounds)
+
+
+def run_micro_benchmarks(work_dir: str) -> dict[str, float]:
+    charts = load_recorded_charts()
+    info = chart_for_symbol(
+        max(charts.values(), key=lambda i: len(i["timestamp"])), "BENCH"
+    )
+    payload = json.dumps({"chart": {"result": [info]}}).encode()
+    bars = OhlcvSeries.from_chart(info)
+    chart_request = ChartRequest(
+        symbol="BENCH",
+        time_range=TimeRange.DAY_5,
+        timestamp=bars.timestamp,
+        open=bars.open,
+        high=bars.high,
+        low=bars.low,
+        close=bars.close,
+        volume=bars.volume,
+    )
+    recommendation_json = json.dumps(RECOMMENDATION_CONTENT)
+
+    results = {
+        "micro.render_chart": bench(
+            lambda: render_candlestick_chart(chart_request), number=1
+        ),
+        "micro.parse_asset_data": bench(
+            lambda: decode_asset_data("BENCH", payload), number=200
+        ),
+        "micro.parse_recommendation": bench(
+            lambda: RecommendationResponse.model_validate_json(recommendation_json),
+            number=2000,
+        ),
+    }
+
+    repository = SentimentRepository(os.path.join(work_dir, "sentiment_io"))
+    asset = Asset("BENCH", AssetType.STOCK)
+    sentiment = SentimentResponse(
+        sentiment=Sentiment.NEUTRAL, confidence=0.5, intent="x" * 200
+    )
+
+    async def sentiment_io():
+        append = await bench_async(
+            lambda: repository.append_sentiment(asset=asset, sentiment=sentiment),
+            number=200,
+        )
+        tail = await bench_async(lambda: repository.tail(asset, 5), number=200)
+        return append, tail
+
+    append, tail = asyncio.run(sentiment_io())
+    results["micro.sentiment_append"] = append
+    results["micro.sentiment_tail"] = tail
+    return results
+
+
+def run_benchmarks(args: argparse.Namespace) -> dict[str, float]:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="stonks-bench-") as work_dir:
+        for n in args.scales:
+            metrics.reset()
+            elapsed = asyncio.run(
+                bench_pipeline(
+                    n,
+                    os.path.join(work_dir, f"pipeline_{n}"),
+                    args.yh_latency,
+                    args.openai_latency,
+                    args.concurrency,
+                )
+            )
+            results[f"pipeline.{n}_symbols"] = elapsed
+            print(f"pipeline {n:>5} symbols: {elapsed:8.3f}s ({n / elapsed:.1f}/s)")
+        if not args.skip_micro:
+            for name, seconds in run_micro_benchmarks(work_dir).items():
+                results[name] = seconds
+                print(f"{name}: {seconds * 1000:.3f}ms")
+    return results
+
+
+def compare_to_baseline(
+    results: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    """Descriptions of the benchmarks that regressed beyond `tolerance`."""
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{name}: {seconds:.6f}s vs baseline {baseline[name]:.6f}s "
+                f"(+{(ratio - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pipeline benchmarks")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument(
+        "--yh-latency", type=float, default=0.05, help="fake yh-finance latency (s)"
+    )
+    parser.add_argument(
+        "--openai-latency", type=float, default=0.2, help="fake OpenAI latency (s)"
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="allowed slowdown against the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store these results as the new baseline instead of comparing",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    results = run_benchmarks(args)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        with open(args.baseline, mode="w") as f:
+            json.dump({**baseline, **results}, f, indent=4, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
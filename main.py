@@ -1,159 +1,470 @@
+import argparse
 import asyncio
-import json
 import os
+import signal
 import sys
-from datetime import datetime
 
-import aiofiles
-
-from src.application.recommendation_engine import RecommendationEngine
-from src.application.sentiment_analyzer import SentimentAnalyzer
-from src.config import PROMPT_DIR, STRATEGIES_DIR
+# Only what argument parsing needs is imported here. The pipeline, the SDKs
+# and the UI are imported by the code paths that use them, so `--help` and
+# runs served from local caches start quickly (see tests/test_startup.py)
+from src.config import (
+    ASSETS_FILE,
+    CASSETTE_DIR,
+    METRICS_DIR,
+    PROMPT_DIR,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    STRATEGIES_DIR,
+)
 from src.core.logger import get_logger, log_async
+from src.core.metrics import metrics
 from src.data.entities import TimeFrame
-from src.data.external.fetcher import AssetDataFetcher
-from src.data.repository.asset_data import AssetDataRepository
-from src.data.repository.sentiment import SentimentRepository
-from src.data.repository.trading_strategy import (
-    TradingStrategy,
-    get_all_trading_strategies,
-)
-from src.data.value_objects import Asset, AssetType
-from src.infrastructure.openai_client import (
-    OpenAIClient,
-    RecommendationResponse,
-    SentimentResponse,
-)
-from src.infrastructure.prompt_loader import PromptLoader
-from src.view.printers import pretty_print_recommendation
-from src.view.user_interface import UserInterface
+from src.data.value_objects import Asset, AssetType, TimeRange
+from src.infrastructure.cassette import Cassette, CassetteMode
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 logger = get_logger(__name__)
 
-ASSETS = []
 
-with open("data/stocks.txt", "r") as f:
-    for line in f:
-        if not line.strip():
-            continue
-        ASSETS.append(Asset(line.strip(), AssetType.STOCK))
+def load_assets(path: str = ASSETS_FILE) -> list[Asset]:
+    assets = []
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            assets.append(Asset(line.strip(), AssetType.STOCK))
+    return assets
 
 
 @log_async("INFO")
-async def save_recommendation(
-    asset: Asset,
-    time_frame: TimeFrame,
-    strategy: TradingStrategy,
-    sentiment: SentimentResponse,
-    rec_res: RecommendationResponse,
+async def main(
+    bypass_llm_cache: bool = False,
+    cassette: Cassette | None = None,
+    stream: bool = True,
 ):
-    today = datetime.now().strftime("%Y-%m-%d")
-    base_dir = f"recommendations/{today}"
-    now = datetime.now().strftime("%H-%M-%S")
-    os.makedirs(base_dir, exist_ok=True)
-    async with aiofiles.open(
-        f"{base_dir}/{asset.symbol}_{strategy.get_name()}_{now}.json",
-        mode="w",
-    ) as f:
-        await f.write(
-            json.dumps(
-                {
-                    "asset": asset.symbol,
-                    "strategy": strategy.get_name(),
-                    "time_range": time_frame.time_range.value,
-                    "time_interval": time_frame.time_interval.value,
-                    "sentiment": sentiment.to_dict(),
-                    "pattern": rec_res.pattern,
-                    "support_and_resistance": dict(rec_res.support_and_resistance),
-                    "entry": dict(rec_res.entry),
-                    "exit": dict(rec_res.exit),
-                    "position": rec_res.position,
-                    "recommendation": {
-                        "decision": rec_res.recommendation.name,
-                        "confidence": rec_res.confidence,
-                        "intent": rec_res.intent,
-                    },
-                },
-                indent=4,
-            )
-        )
-
+    from src.application.pipeline import RecommendationPipeline
+    from src.application.recommendation_engine import RecommendationEngine
+    from src.application.sentiment_analyzer import SentimentAnalyzer
+    from src.data.external.fetcher import AssetDataFetcher
+    from src.data.repository.asset_data import AssetDataRepository
+    from src.data.repository.recommendation import RecommendationRepository
+    from src.data.repository.sentiment import SentimentRepository
+    from src.data.repository.trading_strategy import get_all_trading_strategies
+    from src.infrastructure.chart_renderer import ChartRenderer
+    from src.infrastructure.llm_cache import LLMResponseCache
+    from src.infrastructure.openai_client import OpenAIClient
+    from src.infrastructure.prompt_loader import PromptLoader
+    from src.view.printers import (
+        LiveRecommendationView,
+        pretty_print_recommendation,
+    )
+    from src.view.user_interface import UserInterface
 
-@log_async("INFO")
-async def main():
     logger.info("Starting the application")
-    openai_client = OpenAIClient()
+    llm_cache = LLMResponseCache(bypass=bypass_llm_cache)
+    openai_client = OpenAIClient(response_cache=llm_cache, cassette=cassette)
     prompt_loader = PromptLoader(PROMPT_DIR)
 
     sentiment_repository = SentimentRepository()
-    asset_data_fetcher = AssetDataFetcher()
-    asset_data_repository = AssetDataRepository()
-
-    sentiment_analyzer = SentimentAnalyzer(openai_client, prompt_loader)
-    recommendation_engine = RecommendationEngine(
+    async with (
         openai_client,
-        prompt_loader,
-        sentiment_repository,
-        asset_data_fetcher,
-        asset_data_repository,
-    )
+        AssetDataFetcher(cassette=cassette) as asset_data_fetcher,
+        ChartRenderer() as chart_renderer,
+    ):
+        asset_data_repository = AssetDataRepository()
+
+        pipeline = RecommendationPipeline(
+            SentimentAnalyzer(openai_client, prompt_loader),
+            RecommendationEngine(
+                openai_client,
+                prompt_loader,
+                sentiment_repository,
+                asset_data_fetcher,
+                asset_data_repository,
+                chart_renderer=chart_renderer,
+            ),
+            sentiment_repository,
+            RecommendationRepository(),
+        )
+
+        strategies = get_all_trading_strategies(
+            STRATEGIES_DIR, PromptLoader(STRATEGIES_DIR)
+        )
+
+        logger.debug("Loaded %d strategies", len(strategies))
 
+        ui = UserInterface(load_assets(), strategies)
+
+        user_input = await ui.get_user_input()
+
+        if user_input is None:
+            logger.error("User input is invalid")
+            return
+
+        asset, time_frame, strategy = user_input
+
+        if not stream:
+            try:
+                result = await pipeline.run(
+                    asset=asset, strategy=strategy, time_frame=time_frame
+                )
+            except ValueError as e:
+                logger.error(str(e))
+                return
+            logger.info("Application finished, LLM cache: %s", llm_cache.stats())
+            pretty_print_recommendation(
+                asset=asset,
+                time_frame=time_frame,
+                strategy=strategy,
+                sentiment=result.sentiment,
+                rec_res=result.recommendation,
+            )
+            return
+
+        # Drawn up front and filled in while the recommendation streams
+        with LiveRecommendationView(asset, time_frame, strategy) as view:
+            try:
+                result = await pipeline.run(
+                    asset=asset,
+                    strategy=strategy,
+                    time_frame=time_frame,
+                    on_partial=view.update,
+                )
+            except ValueError as e:
+                logger.error(str(e))
+                return
+            view.finish(result.sentiment, result.recommendation)
+        logger.info("Application finished, LLM cache: %s", llm_cache.stats())
+
+
+@log_async("INFO")
+async def scan(
+    time_frame: TimeFrame,
+    max_concurrency: int,
+    bypass_llm_cache: bool = False,
+    batch: bool = False,
+    cassette: Cassette | None = None,
+    multi_strategy: bool = False,
+):
+    from src.application.pipeline import RecommendationPipeline
+    from src.application.recommendation_engine import RecommendationEngine
+    from src.application.sentiment_analyzer import SentimentAnalyzer
+    from src.application.watchlist_scanner import WatchlistScanner
+    from src.data.external.fetcher import AssetDataFetcher
+    from src.data.repository.asset_data import AssetDataRepository
+    from src.data.repository.recommendation import RecommendationRepository
+    from src.data.repository.sentiment import SentimentRepository
+    from src.data.repository.trading_strategy import get_all_trading_strategies
+    from src.infrastructure.chart_renderer import ChartRenderer
+    from src.infrastructure.llm_cache import LLMResponseCache
+    from src.infrastructure.openai_batch import BatchRunner, OpenAIBatchBackend
+    from src.infrastructure.openai_client import OpenAIClient
+    from src.infrastructure.prompt_loader import PromptLoader
+    from src.view.printers import pretty_print_recommendation
+
+    logger.info("Starting the watchlist scan")
+    assets = load_assets()
+    llm_cache = LLMResponseCache(bypass=bypass_llm_cache)
+    openai_client = OpenAIClient(response_cache=llm_cache, cassette=cassette)
+    prompt_loader = PromptLoader(PROMPT_DIR)
     strategies = get_all_trading_strategies(
         STRATEGIES_DIR, PromptLoader(STRATEGIES_DIR)
     )
+    if batch:
+        openai_client.batch_runner = BatchRunner(
+            OpenAIBatchBackend(openai_client.client)
+        )
+        # Every pair has to be waiting on the model for it to land in one batch
+        max_concurrency = max(max_concurrency, len(assets) * len(strategies))
+
+    sentiment_repository = SentimentRepository()
+    async with (
+        openai_client,
+        AssetDataFetcher(cassette=cassette) as asset_data_fetcher,
+        ChartRenderer() as chart_renderer,
+    ):
+        asset_data_repository = AssetDataRepository()
 
-    logger.debug(f"Loaded {len(strategies)} strategies")
+        sentiment_analyzer = SentimentAnalyzer(openai_client, prompt_loader)
+        scanner = WatchlistScanner(
+            sentiment_analyzer,
+            RecommendationPipeline(
+                sentiment_analyzer,
+                RecommendationEngine(
+                    openai_client,
+                    prompt_loader,
+                    sentiment_repository,
+                    asset_data_fetcher,
+                    asset_data_repository,
+                    chart_renderer=chart_renderer,
+                ),
+                sentiment_repository,
+                RecommendationRepository(),
+            ),
+            max_concurrency=max_concurrency,
+            multi_strategy=multi_strategy,
+        )
 
-    ui = UserInterface(ASSETS, strategies)
+        saved_sentiments: set[str] = set()
+        failed = 0
+        async for result in scanner.scan(assets, strategies, time_frame):
+            if (
+                result.sentiment is not None
+                and result.asset.symbol not in saved_sentiments
+            ):
+                saved_sentiments.add(result.asset.symbol)
+                await sentiment_repository.append_sentiment(
+                    asset=result.asset, sentiment=result.sentiment
+                )
+            if not result.ok:
+                failed += 1
+                continue
+            pretty_print_recommendation(
+                asset=result.asset,
+                time_frame=result.time_frame,
+                strategy=result.strategy,
+                sentiment=result.sentiment,
+                rec_res=result.recommendation,
+            )
 
-    user_input = await ui.get_user_input()
+        logger.info(
+            "Watchlist scan finished with %d failures, LLM cache: %s",
+            failed,
+            llm_cache.stats(),
+        )
 
-    if user_input is None:
-        logger.error("User input is invalid")
-        return
 
-    asset, time_frame, strategy = user_input
+@log_async("INFO")
+async def refresh(
+    time_interval: TimeRange, lookback: TimeRange, cassette: Cassette | None = None
+):
+    from src.application.market_data_refresher import MarketDataRefresher
+    from src.data.external.fetcher import AssetDataFetcher
+    from src.data.repository.asset_data import AssetDataRepository
 
-    sentiment = await sentiment_analyzer.analyze_sentiment(
-        asset=asset, time_frame=time_frame
+    assets = load_assets()
+    logger.info(
+        "Refreshing %s bars for %d assets, until interrupted",
+        time_interval.value,
+        len(assets),
     )
+    async with AssetDataFetcher(cassette=cassette) as asset_data_fetcher:
+        refresher = MarketDataRefresher(
+            asset_data_fetcher, AssetDataRepository(), lookback=lookback
+        )
+        await refresher.run(assets, [time_interval])
 
-    if sentiment is None:
-        logger.error("Sentiment could not be analyzed")
-        return
 
-    rec_res = await recommendation_engine.get_recommendation(
-        sentiment=sentiment.sentiment,
-        asset=asset,
-        strategy=strategy,
-        time_frame=time_frame,
-    )
+@log_async("INFO")
+async def serve(
+    host: str,
+    port: int,
+    max_concurrency: int,
+    bypass_llm_cache: bool = False,
+    cassette: Cassette | None = None,
+):
+    from aiohttp import web
 
-    if rec_res is None:
-        logger.error("Recommendation could not be generated")
-        return
+    from src.application.pipeline import RecommendationPipeline
+    from src.application.recommendation_engine import RecommendationEngine
+    from src.application.recommendation_service import RecommendationService
+    from src.application.sentiment_analyzer import SentimentAnalyzer
+    from src.data.external.fetcher import AssetDataFetcher
+    from src.data.repository.asset_data import AssetDataRepository
+    from src.data.repository.recommendation import RecommendationRepository
+    from src.data.repository.sentiment import SentimentRepository
+    from src.data.repository.trading_strategy import get_all_trading_strategies
+    from src.infrastructure.chart_renderer import ChartRenderer
+    from src.infrastructure.llm_cache import LLMResponseCache
+    from src.infrastructure.openai_client import OpenAIClient
+    from src.infrastructure.prompt_loader import PromptLoader
+    from src.view.http_api import create_app
+
+    llm_cache = LLMResponseCache(bypass=bypass_llm_cache)
+    openai_client = OpenAIClient(response_cache=llm_cache, cassette=cassette)
+    prompt_loader = PromptLoader(PROMPT_DIR)
+    sentiment_repository = SentimentRepository()
+    async with (
+        openai_client,
+        AssetDataFetcher(cassette=cassette) as asset_data_fetcher,
+        ChartRenderer() as chart_renderer,
+    ):
+        service = RecommendationService(
+            RecommendationPipeline(
+                SentimentAnalyzer(openai_client, prompt_loader),
+                RecommendationEngine(
+                    openai_client,
+                    prompt_loader,
+                    sentiment_repository,
+                    asset_data_fetcher,
+                    AssetDataRepository(),
+                    chart_renderer=chart_renderer,
+                ),
+                sentiment_repository,
+                RecommendationRepository(),
+            ),
+            get_all_trading_strategies(STRATEGIES_DIR, PromptLoader(STRATEGIES_DIR)),
+            max_concurrency=max_concurrency,
+        )
+        runner = web.AppRunner(create_app(service), access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+            logger.info("Serving recommendations on http://%s:%d", host, port)
+            # Stop on SIGTERM/SIGINT through the normal shutdown path, so the
+            # render workers are joined instead of left behind as orphans
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, stop.set)
+            await stop.wait()
+        finally:
+            await service.close()
+            await runner.cleanup()
+            logger.info("Service stopped, LLM cache: %s", llm_cache.stats())
 
-    await save_recommendation(
-        asset=asset,
-        time_frame=time_frame,
-        strategy=strategy,
-        sentiment=sentiment,
-        rec_res=rec_res,
-    )
-    await sentiment_repository.append_sentiment(asset=asset, sentiment=sentiment)
 
-    logger.info("Application finished")
+def write_metrics(metrics_dir: str):
+    os.makedirs(metrics_dir, exist_ok=True)
+    metrics.write_json(os.path.join(metrics_dir, "metrics.json"))
+    metrics.write_prometheus(os.path.join(metrics_dir, "metrics.prom"))
+    logger.info("Metrics written to %s", metrics_dir)
 
-    pretty_print_recommendation(
-        asset=asset,
-        time_frame=time_frame,
-        strategy=strategy,
-        sentiment=sentiment,
-        rec_res=rec_res,
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="LLM trading recommendations")
+    parser.add_argument(
+        "--scan",
+        action="store_true",
+        help="scan every asset and strategy without prompting",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="keep the bar history of every asset current, fetching only new bars",
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve recommendations over a local HTTP/JSON API with warm state",
+    )
+    parser.add_argument("--host", default=SERVICE_HOST, help="--serve address")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="--serve port")
+    parser.add_argument(
+        "--range",
+        dest="time_range",
+        type=TimeRange,
+        default=TimeRange.MONTH_1,
+        choices=list(TimeRange),
+        metavar="RANGE",
+        help="--scan time range and first --refresh lookback (default: 1mo)",
+    )
+    parser.add_argument(
+        "--interval",
+        dest="time_interval",
+        type=TimeRange,
+        default=TimeRange.DAY_1,
+        choices=list(TimeRange),
+        metavar="INTERVAL",
+        help="data point interval used by --scan/--refresh (default: 1d)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="maximum number of in-flight pipeline calls during --scan/--serve",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="always call the model; fresh responses still refresh the cache",
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="print the recommendation once complete instead of as it streams in",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="send --scan model calls through the OpenAI Batch API (slow, cheaper)",
+    )
+    parser.add_argument(
+        "--multi-strategy",
+        action="store_true",
+        help="recommend for every --scan strategy of an asset in one model call",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--record",
+        action="store_true",
+        help=f"record every upstream response to {CASSETTE_DIR}",
+    )
+    cassette.add_argument(
+        "--replay",
+        action="store_true",
+        help="serve upstream calls from recorded responses, without the network",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        help="seconds each replayed response takes, to simulate the upstreams",
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        default=METRICS_DIR,
+        help="write a JSON and a Prometheus metrics report to this directory",
+    )
+    return parser.parse_args()
+
+
+def get_cassette(args: argparse.Namespace) -> Cassette | None:
+    if args.record:
+        return Cassette(CassetteMode.RECORD)
+    if args.replay:
+        return Cassette(CassetteMode.REPLAY, latency=args.replay_latency)
+    return None
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    cassette = get_cassette(args)
+    try:
+        if args.serve:
+            asyncio.run(
+                serve(
+                    args.host,
+                    args.port,
+                    max_concurrency=args.concurrency,
+                    bypass_llm_cache=args.no_llm_cache,
+                    cassette=cassette,
+                )
+            )
+        elif args.refresh:
+            asyncio.run(refresh(args.time_interval, args.time_range, cassette=cassette))
+        elif args.scan:
+            asyncio.run(
+                scan(
+                    TimeFrame(
+                        time_range=args.time_range, time_interval=args.time_interval
+                    ),
+                    max_concurrency=args.concurrency,
+                    bypass_llm_cache=args.no_llm_cache,
+                    batch=args.batch,
+                    cassette=cassette,
+                    multi_strategy=args.multi_strategy,
+                )
+            )
+        else:
+            asyncio.run(
+                main(
+                    bypass_llm_cache=args.no_llm_cache,
+                    cassette=cassette,
+                    stream=not args.no_stream,
+                )
+            )
+    finally:
+        if args.metrics_dir:
+            write_metrics(args.metrics_dir)
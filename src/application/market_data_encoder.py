@@ -0,0 +1,207 @@
+import json
+import math
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.data.external.fetcher import AssetData
+from src.data.ohlcv import OhlcvSeries
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token holds well for numbers and English text
+    return math.ceil(len(text) / 4)
+
+
+def get_bars(asset_data: AssetData) -> OhlcvSeries:
+    return asset_data.info.bars
+
+
+def downsample(bars: OhlcvSeries, max_bars: int) -> OhlcvSeries:
+    """Aggregates consecutive bars into at most `max_bars` buckets, keeping
+    OHLCV semantics (first open, max high, min low, last close, summed volume).
+    The newest bars always end up in the last, complete bucket."""
+    n = len(bars)
+    max_bars = max(max_bars, 1)
+    if n <= max_bars:
+        return bars
+    size = math.ceil(n / max_bars)
+    # Buckets are aligned to the end so the latest bar closes the last bucket
+    starts = np.arange(n - size * (n // size), n, size)
+    if starts[0] != 0:
+        starts = np.concatenate([[0], starts])
+    ends = np.append(starts[1:], n) - 1
+    volume = np.add.reduceat(np.nan_to_num(bars.volume), starts)
+    return OhlcvSeries(
+        timestamp=np.asarray(bars.timestamp)[starts],
+        open=np.asarray(bars.open)[starts],
+        high=np.fmax.reduceat(bars.high, starts),
+        low=np.fmin.reduceat(bars.low, starts),
+        close=np.asarray(bars.close)[ends],
+        volume=volume,
+    )
+
+
+class MarketDataEncoder(ABC):
+    """Turns chart data into the `{asset_data}` block of the prompt."""
+
+    name: str
+
+    @abstractmethod
+    def encode(self, asset_data: AssetData) -> str: ...
+
+
+class JsonEncoder(MarketDataEncoder):
+    """The raw chart payload, as sent before encoders existed."""
+
+    name = "json"
+
+    def encode(self, asset_data: AssetData) -> str:
+        return json.dumps(asset_data.to_dict())
+
+
+class CsvOhlcvEncoder(MarketDataEncoder):
+    """A one-line header followed by one CSV row per bar."""
+
+    name = "csv"
+
+    def __init__(self, max_bars: int | None = None):
+        self.max_bars = max_bars
+
+    def encode(self, asset_data: AssetData) -> str:
+        bars = get_bars(asset_data)
+        if self.max_bars is not None:
+            bars = downsample(bars, self.max_bars)
+        return "\n".join(
+            [_format_header(asset_data, len(bars)), *_format_rows(asset_data, bars)]
+        )
+
+
+class DownsampledEncoder(CsvOhlcvEncoder):
+    """CSV rows after aggregating the series down to `max_bars` bars."""
+
+    name = "downsampled"
+
+    def __init__(self, max_bars: int = 120):
+        super().__init__(max_bars=max_bars)
+
+
+class FeatureSummaryEncoder(MarketDataEncoder):
+    """Summary statistics of the window plus the last few bars."""
+
+    name = "summary"
+
+    def __init__(self, recent_bars: int = 5):
+        self.recent_bars = recent_bars
+
+    def encode(self, asset_data: AssetData) -> str:
+        bars = get_bars(asset_data)
+        meta = asset_data.info.meta
+        digits = max(meta.priceHint, 0)
+        close = np.asarray(bars.close)
+        valid = close[~np.isnan(close)]
+        lines = [_format_header(asset_data, len(bars))]
+        if len(valid):
+            returns = np.diff(valid) / valid[:-1]
+            volatility = returns.std() * 100 if len(returns) else 0.0
+            lines += [
+                f"first_close={_num(valid[0], digits)}",
+                f"last_close={_num(valid[-1], digits)}",
+                f"change_pct={_num((valid[-1] / valid[0] - 1) * 100, 2)}",
+                f"high={_num(np.nanmax(bars.high), digits)}",
+                f"low={_num(np.nanmin(bars.low), digits)}",
+                f"avg_volume={_num(np.nanmean(bars.volume), 0)}",
+                f"return_std_pct={_num(volatility, 3)}",
+            ]
+        if self.recent_bars and len(bars):
+            recent = bars.slice(max(len(bars) - self.recent_bars, 0), len(bars))
+            lines.append("recent bars:")
+            lines += _format_rows(asset_data, recent)
+        return "\n".join(lines)
+
+
+class TokenBudgetEncoder(MarketDataEncoder):
+    """Wraps an encoder and degrades the output until it fits `token_budget`.
+
+    Over-budget output is re-encoded with progressively fewer downsampled
+    bars and finally as a feature summary."""
+
+    def __init__(self, encoder: MarketDataEncoder, token_budget: int):
+        self.encoder = encoder
+        self.token_budget = token_budget
+        self.name = encoder.name
+
+    def encode(self, asset_data: AssetData) -> str:
+        text = self.encoder.encode(asset_data)
+        if estimate_tokens(text) <= self.token_budget:
+            return text
+        max_bars = len(asset_data.info.bars)
+        while max_bars > 8:
+            max_bars //= 2
+            text = DownsampledEncoder(max_bars).encode(asset_data)
+            if estimate_tokens(text) <= self.token_budget:
+                return text
+        return FeatureSummaryEncoder().encode(asset_data)
+
+
+MARKET_DATA_ENCODERS: dict[str, type[MarketDataEncoder]] = {
+    encoder.name: encoder
+    for encoder in (
+        JsonEncoder,
+        CsvOhlcvEncoder,
+        DownsampledEncoder,
+        FeatureSummaryEncoder,
+    )
+}
+
+
+def get_market_data_encoder(name: str, token_budget: int) -> MarketDataEncoder:
+    if name not in MARKET_DATA_ENCODERS:
+        raise ValueError(
+            f"Unsupported market data encoding: {name} "
+            f"(expected one of {', '.join(MARKET_DATA_ENCODERS)})"
+        )
+    return TokenBudgetEncoder(MARKET_DATA_ENCODERS[name](), token_budget)
+
+
+def _format_header(asset_data: AssetData, n_bars: int) -> str:
+    meta = asset_data.info.meta
+    return (
+        f"symbol={meta.symbol} currency={meta.currency} "
+        f"exchange={meta.exchangeName} timezone={meta.exchangeTimezoneName} "
+        f"interval={meta.dataGranularity} range={meta.range} bars={n_bars} "
+        f"price={meta.regularMarketPrice} previous_close={meta.previousClose}"
+    )
+
+
+def _format_rows(asset_data: AssetData, bars: OhlcvSeries) -> list[str]:
+    meta = asset_data.info.meta
+    digits = max(meta.priceHint, 0)
+    rows = ["time,open,high,low,close,volume"]
+    for ts, o, h, l, c, v in zip(
+        bars.timestamp.tolist(),
+        bars.open.tolist(),
+        bars.high.tolist(),
+        bars.low.tolist(),
+        bars.close.tolist(),
+        bars.volume.tolist(),
+    ):
+        rows.append(
+            f"{_format_time(ts, meta.gmtoffset)},{_num(o, digits)},"
+            f"{_num(h, digits)},{_num(l, digits)},{_num(c, digits)},{_num(v, 0)}"
+        )
+    return rows
+
+
+def _format_time(ts: int, gmtoffset: int) -> str:
+    # Exchange-local wall time; the timezone is given once in the header
+    return datetime.fromtimestamp(ts + gmtoffset, timezone.utc).strftime(
+        "%Y-%m-%d %H:%M"
+    )
+
+
+def _num(value: float, digits: int) -> str:
+    if value is None or math.isnan(value):
+        return ""
+    return f"{value:.{digits}f}"
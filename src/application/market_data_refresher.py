@@ -0,0 +1,175 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from src.config import REFRESH_RETRY_SECONDS, REFRESH_SETTLE_SECONDS
+from src.core.logger import get_logger
+from src.core.metrics import metrics
+from src.core.rate_limiter import Priority, priority_lane
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetData, AssetDataFetcher
+from src.data.repository.asset_data import AssetDataRepository
+from src.data.repository.market_data_cache import get_expiry
+from src.data.resample import get_interval_seconds
+from src.data.value_objects import Asset, TimeRange
+
+logger = get_logger(__name__)
+
+# Fetch ranges from smallest to largest, with the shortest span each one is
+# guaranteed to cover
+FETCH_RANGES: list[tuple[TimeRange, timedelta]] = [
+    (TimeRange.DAY_1, timedelta(days=1)),
+    (TimeRange.DAY_5, timedelta(days=5)),
+    (TimeRange.MONTH_1, timedelta(days=28)),
+    (TimeRange.MONTH_3, timedelta(days=89)),
+    (TimeRange.MONTH_6, timedelta(days=181)),
+    (TimeRange.YEAR_1, timedelta(days=365)),
+    (TimeRange.YEAR_5, timedelta(days=5 * 365)),
+]
+
+
+def get_covering_range(
+    last_timestamp: int | None,
+    now: float,
+    interval: TimeRange,
+    lookback: TimeRange,
+) -> TimeRange:
+    """Returns the smallest fetch range that still reaches back to the last
+    stored bar, which is fetched again since it may have still been forming.
+
+    Yahoo's 1d range is the latest session rather than the last 24 hours, so
+    it is only used when the last bar is from the current (UTC) day.
+    """
+    if last_timestamp is None:
+        return lookback
+    needed = now - last_timestamp + get_interval_seconds(interval)
+    same_day = (
+        datetime.fromtimestamp(last_timestamp, timezone.utc).date()
+        == datetime.fromtimestamp(now, timezone.utc).date()
+    )
+    for time_range, span in FETCH_RANGES:
+        if time_range == TimeRange.DAY_1 and not same_day:
+            continue
+        if time_range == lookback or span.total_seconds() >= needed:
+            return time_range
+    return lookback
+
+
+def get_next_boundary(now: float, interval_seconds: float, origin: float) -> float:
+    """Returns the first bar boundary after `now`, for bars aligned to
+    `origin`."""
+    return origin + (math.floor((now - origin) / interval_seconds) + 1) * (
+        interval_seconds
+    )
+
+
+def get_wake_time(now: float, data: AssetData, interval: TimeRange) -> float:
+    """Returns when the next bar closes, skipping the hours the market is
+    closed and no new bars print.
+
+    Bars are aligned to the regular session open. `get_expiry` already knows
+    the session hours, so the wake time is the first boundary after both now
+    and the bar that expiry points at.
+    """
+    seconds = get_interval_seconds(interval)
+    origin = data.info.meta.currentTradingPeriod.regular.start
+    return max(
+        get_next_boundary(now, seconds, origin),
+        get_next_boundary(get_expiry(data, interval) - seconds, seconds, origin),
+    )
+
+
+class MarketDataRefresher:
+    """Keeps the local bar history of a watchlist current.
+
+    Each (symbol, interval) wakes once per bar and fetches the smallest range
+    that covers everything since its last stored bar, then saves it to the
+    `AssetDataRepository`, whose stored bars the `MarketDataCache` serves.
+    Steady-state cost is a 1d or 5d fetch per bar however long the history
+    grows; only a series with no history pulls the full lookback. Fetches run
+    in the batch priority lane, so interactive requests sharing the rate
+    limiter go first. A failing series backs off on its own and never stops
+    the others.
+    """
+
+    def __init__(
+        self,
+        fetcher: AssetDataFetcher,
+        repository: AssetDataRepository,
+        lookback: TimeRange = TimeRange.MONTH_1,
+        settle_seconds: float = REFRESH_SETTLE_SECONDS,
+        retry_seconds: float = REFRESH_RETRY_SECONDS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.fetcher = fetcher
+        self.repository = repository
+        self.lookback = lookback
+        self.settle_seconds = settle_seconds
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        self.sleep = sleep
+
+    async def run(self, assets: list[Asset], intervals: list[TimeRange]):
+        """Refreshes every asset and interval until cancelled."""
+        for interval in intervals:
+            get_interval_seconds(interval)
+        with priority_lane(Priority.BATCH):
+            await asyncio.gather(
+                *[
+                    self.watch(asset, interval)
+                    for asset in assets
+                    for interval in intervals
+                ]
+            )
+
+    async def watch(self, asset: Asset, interval: TimeRange):
+        interval_seconds = get_interval_seconds(interval)
+        failures = 0
+        while True:
+            try:
+                data = await self.refresh(asset, interval)
+            except Exception as e:
+                failures += 1
+                delay = min(self.retry_seconds * 2 ** (failures - 1), interval_seconds)
+                await logger.async_warning(
+                    "Refreshing %s bars for %s failed, retrying in %.0fs: %r",
+                    interval.value,
+                    asset.symbol,
+                    delay,
+                    e,
+                )
+                await self.sleep(delay)
+                continue
+            failures = 0
+            now = self.clock()
+            if data is None:
+                wake_at = now + interval_seconds
+            else:
+                wake_at = get_wake_time(now, data, interval)
+            await self.sleep(wake_at - now + self.settle_seconds)
+
+    async def refresh(self, asset: Asset, interval: TimeRange) -> AssetData | None:
+        """Fetches the bars since the last stored one and merges them in."""
+        last_timestamp = await self.repository.get_last_timestamp(asset, interval)
+        time_range = get_covering_range(
+            last_timestamp, self.clock(), interval, self.lookback
+        )
+        time_frame = TimeFrame(time_range=time_range, time_interval=interval)
+        data = await self.fetcher.fetch_asset_data(asset, time_frame)
+        if data is None:
+            return None
+        added = await self.repository.save_asset_data(asset, time_frame, data)
+        metrics.increment("refresh_fetches", range=time_range.value)
+        metrics.observe("refresh_fetched_bars", len(data.info.bars))
+        metrics.increment("refresh_new_bars", added)
+        await logger.async_info(
+            "Refreshed %s %s: %d new bars from a %s fetch",
+            asset.symbol,
+            interval.value,
+            added,
+            time_range.value,
+        )
+        return data
@@ -0,0 +1,249 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from src.application.recommendation_engine import RecommendationEngine
+from src.application.sentiment_analyzer import SentimentAnalyzer
+from src.core.logger import get_logger
+from src.core.metrics import metrics
+from src.data.entities import TimeFrame
+from src.data.repository.recommendation import RecommendationRepository
+from src.data.repository.sentiment import SentimentRepository
+from src.data.repository.trading_strategy import TradingStrategy
+from src.data.value_objects import Asset
+from src.infrastructure.openai_client import (
+    PartialCallback,
+    RecommendationResponse,
+    SentimentResponse,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[..., Awaitable[Any]]
+    # Results of these stages are passed to `run` as keyword arguments
+    depends_on: tuple[str, ...] = ()
+
+
+class DagScheduler:
+    """Runs stages as soon as all of their dependencies have finished.
+
+    Independent stages run concurrently. If any stage fails, the stages that
+    are still running are cancelled and the error is raised from `run`.
+    """
+
+    def __init__(self, stages: list[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self._check_graph()
+
+    async def run(self) -> tuple[dict[str, Any], dict[str, float]]:
+        """Returns each stage's result and its duration in seconds."""
+        tasks: dict[str, asyncio.Task] = {}
+        durations: dict[str, float] = {}
+
+        async def run_stage(stage: Stage):
+            inputs = {dep: await tasks[dep] for dep in stage.depends_on}
+            started = time.perf_counter()
+            try:
+                return await stage.run(**inputs)
+            finally:
+                durations[stage.name] = time.perf_counter() - started
+
+        # Tasks only await their dependencies, so creation order doesn't matter
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}, durations
+
+    def _check_graph(self):
+        visiting: set[str] = set()
+        done: set[str] = set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage dependency cycle through {name}")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+
+@dataclass
+class PipelineResult:
+    sentiment: SentimentResponse
+    recommendation: RecommendationResponse
+    durations: dict[str, float] = field(default_factory=dict)
+
+
+class RecommendationPipeline:
+    """One asset's recommendations as a DAG of stages:
+
+        fetch -> render --+
+        sentiment --------+--> recommend -> persist
+        history ----------+
+
+    Sentiment analysis overlaps with the market data fetch and chart
+    rendering, so latency is about max(sentiment, fetch + render) + recommend.
+    """
+
+    def __init__(
+        self,
+        sentiment_analyzer: SentimentAnalyzer,
+        recommendation_engine: RecommendationEngine,
+        sentiment_repository: SentimentRepository,
+        recommendation_repository: RecommendationRepository,
+    ):
+        self.sentiment_analyzer = sentiment_analyzer
+        self.recommendation_engine = recommendation_engine
+        self.sentiment_repository = sentiment_repository
+        self.recommendation_repository = recommendation_repository
+
+    async def run(
+        self,
+        asset: Asset,
+        strategy: TradingStrategy,
+        time_frame: TimeFrame,
+        sentiment: Awaitable[SentimentResponse | None] | None = None,
+        on_partial: PartialCallback | None = None,
+    ) -> PipelineResult:
+        """Runs the pipeline. A `sentiment` awaitable replaces the sentiment
+        stage, e.g. to share one analysis across strategies; the caller then
+        owns appending it to the sentiment history. `on_partial` streams the
+        recommendation, receiving its fields as they are generated."""
+
+        async def recommend(**inputs) -> list[RecommendationResponse | None]:
+            return [
+                await self.recommendation_engine.recommend(
+                    strategy=strategy, on_partial=on_partial, **inputs
+                )
+            ]
+
+        results = await self._run(asset, [strategy], time_frame, sentiment, recommend)
+        return results[0]
+
+    async def run_strategies(
+        self,
+        asset: Asset,
+        strategies: list[TradingStrategy],
+        time_frame: TimeFrame,
+        sentiment: Awaitable[SentimentResponse | None] | None = None,
+    ) -> list[PipelineResult]:
+        """Like `run`, but one model call recommends for every strategy.
+        Results follow the order of `strategies`, and the run fails if the
+        model leaves any of them out."""
+
+        async def recommend(**inputs) -> list[RecommendationResponse | None]:
+            return await self.recommendation_engine.recommend_strategies(
+                strategies=strategies, **inputs
+            )
+
+        return await self._run(asset, strategies, time_frame, sentiment, recommend)
+
+    async def _run(
+        self,
+        asset: Asset,
+        strategies: list[TradingStrategy],
+        time_frame: TimeFrame,
+        sentiment: Awaitable[SentimentResponse | None] | None,
+        recommend_with: Callable[..., Awaitable[list[RecommendationResponse | None]]],
+    ) -> list[PipelineResult]:
+        engine = self.recommendation_engine
+        owns_sentiment = sentiment is None
+
+        async def analyze_sentiment() -> SentimentResponse:
+            res = await (
+                sentiment
+                if sentiment is not None
+                else self.sentiment_analyzer.analyze_sentiment(
+                    asset=asset, time_frame=time_frame
+                )
+            )
+            if res is None:
+                raise ValueError(f"Sentiment could not be analyzed for {asset.symbol}")
+            return res
+
+        async def recommend(fetch, render, sentiment, history):
+            results = await recommend_with(
+                asset=asset,
+                sentiment=sentiment.sentiment,
+                time_frame=time_frame,
+                asset_data=fetch,
+                image=render,
+                recent_sentiments=history,
+            )
+            for strategy, res in zip(strategies, results):
+                if res is None:
+                    raise ValueError(
+                        f"Recommendation could not be generated for "
+                        f"{asset.symbol}/{strategy.get_name()}"
+                    )
+            return results
+
+        async def persist(sentiment, recommend):
+            for strategy, res in zip(strategies, recommend):
+                await self.recommendation_repository.save_recommendation(
+                    asset=asset,
+                    time_frame=time_frame,
+                    strategy=strategy,
+                    sentiment=sentiment,
+                    rec_res=res,
+                )
+            if owns_sentiment:
+                await self.sentiment_repository.append_sentiment(
+                    asset=asset, sentiment=sentiment
+                )
+
+        scheduler = DagScheduler(
+            [
+                Stage("fetch", lambda: engine.fetch_asset_data(asset, time_frame)),
+                Stage(
+                    "render",
+                    lambda fetch: engine.render_chart(fetch, time_frame.time_range),
+                    ("fetch",),
+                ),
+                Stage("sentiment", analyze_sentiment),
+                Stage("history", lambda: engine.get_recent_sentiments(asset)),
+                Stage(
+                    "recommend",
+                    recommend,
+                    ("fetch", "render", "sentiment", "history"),
+                ),
+                Stage("persist", persist, ("sentiment", "recommend")),
+            ]
+        )
+        results, durations = await scheduler.run()
+        for stage, duration in durations.items():
+            metrics.observe("pipeline_stage_seconds", duration, stage=stage)
+        await logger.async_debug(
+            "Pipeline stage durations for %s: %s",
+            asset.symbol,
+            {stage: round(duration, 3) for stage, duration in durations.items()},
+        )
+        return [
+            PipelineResult(
+                sentiment=results["sentiment"],
+                recommendation=recommendation,
+                durations=durations,
+            )
+            for recommendation in results["recommend"]
+        ]
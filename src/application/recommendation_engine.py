@@ -1,18 +1,35 @@
+import asyncio
 import json
 
-from src.config import RECOMMENDATION_PROMPT_FILE
+from src.application.market_data_encoder import (
+    MarketDataEncoder,
+    get_market_data_encoder,
+)
+from src.config import (
+    MARKET_DATA_ENCODING,
+    MARKET_DATA_TOKEN_BUDGET,
+    MULTI_STRATEGY_RECOMMENDATION_PROMPT_FILE,
+    RECOMMENDATION_PROMPT_FILE,
+)
 from src.core.logger import get_logger, log_async
 from src.data.entities import TimeFrame
 from src.data.external.fetcher import AssetData, AssetDataFetcher
+from src.data.indicators import compute_indicators
 from src.data.repository.asset_data import (
     AssetDataRepository,
     AssetImageRepository,
 )
+from src.data.repository.market_data_cache import MarketDataCache
 from src.data.repository.sentiment import SentimentRepository
 
 from ..data.repository.trading_strategy import TradingStrategy
 from ..data.value_objects import Asset, Sentiment, TimeRange
-from ..infrastructure.openai_client import OpenAIClient, RecommendationResponse
+from ..infrastructure.chart_renderer import ChartImage, ChartRenderer
+from ..infrastructure.openai_client import (
+    OpenAIClient,
+    PartialCallback,
+    RecommendationResponse,
+)
 from ..infrastructure.prompt_loader import PromptLoader
 
 logger = get_logger(__name__)
@@ -26,12 +43,34 @@ class RecommendationEngine:
         sentiment_repository: SentimentRepository,
         asset_data_fetcher: AssetDataFetcher,
         asset_data_repository: AssetDataRepository,
+        market_data_cache: MarketDataCache | None = None,
+        market_data_encoder: MarketDataEncoder | None = None,
+        chart_renderer: ChartRenderer | None = None,
     ):
         self.openai_client = openai_client
         self.prompt_loader = prompt_loader
         self.sentiment_repository = sentiment_repository
         self.asset_data_fetcher = asset_data_fetcher
         self.asset_data_repository = asset_data_repository
+        self.market_data_cache = market_data_cache or MarketDataCache(
+            asset_data_repository
+        )
+        self.market_data_encoder = market_data_encoder or get_market_data_encoder(
+            MARKET_DATA_ENCODING, MARKET_DATA_TOKEN_BUDGET
+        )
+        # A renderer we create is ours to close; an injected one is the caller's
+        self._owns_chart_renderer = chart_renderer is None
+        self.chart_renderer = chart_renderer or ChartRenderer()
+
+    async def close(self):
+        if self._owns_chart_renderer:
+            await self.chart_renderer.close()
+
+    async def __aenter__(self) -> "RecommendationEngine":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
 
     @log_async("INFO")
     async def get_recommendation(
@@ -43,48 +82,183 @@ class RecommendationEngine:
     ) -> RecommendationResponse | None:
         await logger.async_info("Preparing to generate recommendation")
 
-        asset_data = await self._get_asset_data(asset, time_frame)
-        image_path = self._get_asset_image(asset_data, time_frame.time_range)
+        asset_data = await self.fetch_asset_data(asset, time_frame)
+        image = await self.render_chart(asset_data, time_frame.time_range)
+        recent_sentiments = await self.get_recent_sentiments(asset)
+
+        return await self.recommend(
+            asset=asset,
+            sentiment=sentiment,
+            strategy=strategy,
+            time_frame=time_frame,
+            asset_data=asset_data,
+            image=image,
+            recent_sentiments=recent_sentiments,
+        )
+
+    @log_async("DEBUG")
+    async def fetch_asset_data(self, asset: Asset, time_frame: TimeFrame) -> AssetData:
+        asset_data = await self.market_data_cache.get_or_resample(asset, time_frame)
+        if asset_data is not None:
+            return asset_data
+        await logger.async_debug("Fetching asset data for %s", asset.symbol)
+        asset_data = await self.asset_data_fetcher.fetch_asset_data(asset, time_frame)
+        if asset_data is None:
+            raise ValueError("Failed to fetch asset data")
+        await self.market_data_cache.put(asset, time_frame, asset_data)
+        return asset_data
+
+    @log_async("DEBUG")
+    async def render_chart(
+        self, asset_data: AssetData, time_range: TimeRange
+    ) -> ChartImage:
+        await logger.async_debug(
+            "Generating candlestick chart for %s", asset_data.symbol
+        )
+        request = AssetImageRepository(asset_data).build_chart_request(time_range)
+        return await self.chart_renderer.render(request)
+
+    @log_async("DEBUG")
+    async def get_recent_sentiments(self, asset: Asset, n: int = 5) -> list[str]:
+        sentiment_history = await self.sentiment_repository.tail(asset, n)
+        return [entry.sentiment.sentiment.value for entry in sentiment_history]
 
+    @log_async("INFO")
+    async def recommend(
+        self,
+        asset: Asset,
+        sentiment: Sentiment,
+        strategy: TradingStrategy,
+        time_frame: TimeFrame,
+        asset_data: AssetData,
+        image: ChartImage,
+        recent_sentiments: list[str],
+        on_partial: PartialCallback | None = None,
+    ) -> RecommendationResponse | None:
         await logger.async_debug("Loading the recommendation prompt")
-        prompt = await self.prompt_loader.load_prompt(RECOMMENDATION_PROMPT_FILE)
+        prompt = await self.prompt_loader.load_template(RECOMMENDATION_PROMPT_FILE)
         strategy_content = await strategy.get_strategy_content()
 
-        sentiment_history = await self.sentiment_repository.get_sentiment_history(asset)
-        recent_sentiments = [
-            entry.sentiment.sentiment.value for entry in sentiment_history[-5:]
-        ]
-
         formatted_prompt = prompt.format(
-            asset=asset.symbol,
-            asset_type=asset.asset_type.value,
-            sentiment=sentiment.value,
-            sentiment_history=", ".join(recent_sentiments),
-            time_range=time_frame.time_range.value,
-            time_interval=time_frame.time_interval.value,
             strategy=strategy_content,
-            asset_data=json.dumps(asset_data.to_dict()),
+            **self._get_prompt_values(
+                asset, sentiment, time_frame, asset_data, recent_sentiments
+            ),
         )
 
         await logger.async_debug(
-            f"- - - Formatted prompt - - -\n{formatted_prompt}\n- - - - - - - - - - - - -"
+            "- - - Formatted prompt - - -\n%s\n- - - - - - - - - - - - -",
+            formatted_prompt,
         )
 
-        res = await self.openai_client.get_recommendation(formatted_prompt, image_path)
-        await logger.async_debug(f"Recommendation: {res}")
+        res = await self.openai_client.get_recommendation(
+            formatted_prompt, image, on_partial=on_partial
+        )
+        await logger.async_debug("Recommendation: %s", res)
         if res is None:
             await logger.async_warning("Failed to generate recommendation")
             return None
         return res
 
-    async def _get_asset_data(self, asset: Asset, time_frame: TimeFrame):
-        await logger.async_debug(f"Fetching asset data for {asset.symbol}")
-        asset_data = await AssetDataFetcher().fetch_asset_data(asset, time_frame)
-        if asset_data is None:
-            raise ValueError("Failed to fetch asset data")
-        await self.asset_data_repository.save_asset_data(asset, asset_data)
-        return asset_data
+    @log_async("INFO")
+    async def recommend_strategies(
+        self,
+        asset: Asset,
+        sentiment: Sentiment,
+        strategies: list[TradingStrategy],
+        time_frame: TimeFrame,
+        asset_data: AssetData,
+        image: ChartImage,
+        recent_sentiments: list[str],
+    ) -> list[RecommendationResponse | None]:
+        """Recommends for every strategy in one model call, so the chart and
+        the asset data are sent once instead of once per strategy.
+
+        Results follow the order of `strategies`, with None for any strategy
+        the model left out.
+        """
+        await logger.async_debug("Loading the multi-strategy recommendation prompt")
+        prompt = await self.prompt_loader.load_template(
+            MULTI_STRATEGY_RECOMMENDATION_PROMPT_FILE
+        )
+        strategy_contents = await asyncio.gather(
+            *(strategy.get_strategy_content() for strategy in strategies)
+        )
+
+        formatted_prompt = prompt.format(
+            strategies="\n\n".join(
+                f'Strategy "{strategy.get_name()}":\n{content.strip()}'
+                for strategy, content in zip(strategies, strategy_contents)
+            ),
+            **self._get_prompt_values(
+                asset, sentiment, time_frame, asset_data, recent_sentiments
+            ),
+        )
+
+        await logger.async_debug(
+            "- - - Formatted prompt - - -\n%s\n- - - - - - - - - - - - -",
+            formatted_prompt,
+        )
+
+        res = await self.openai_client.get_strategy_recommendations(
+            formatted_prompt, image
+        )
+        await logger.async_debug("Recommendations: %s", res)
+        if res is None:
+            await logger.async_warning("Failed to generate recommendations")
+            return [None] * len(strategies)
+
+        by_name = {
+            _normalize_strategy_name(item.strategy): item
+            for item in res.recommendations
+        }
+        results = []
+        for strategy in strategies:
+            item = by_name.get(_normalize_strategy_name(strategy.get_name()))
+            if item is None:
+                await logger.async_warning(
+                    "No recommendation for strategy %r, the model returned %s",
+                    strategy.get_name(),
+                    [item.strategy for item in res.recommendations],
+                )
+                results.append(None)
+                continue
+            results.append(
+                RecommendationResponse.model_validate(
+                    item.model_dump(exclude={"strategy"})
+                )
+            )
+        return results
+
+    def _get_prompt_values(
+        self,
+        asset: Asset,
+        sentiment: Sentiment,
+        time_frame: TimeFrame,
+        asset_data: AssetData,
+        recent_sentiments: list[str],
+    ) -> dict[str, str]:
+        return {
+            "asset": asset.symbol,
+            "asset_type": asset.asset_type.value,
+            "sentiment": sentiment.value,
+            "sentiment_history": ", ".join(recent_sentiments),
+            "time_range": time_frame.time_range.value,
+            "time_interval": time_frame.time_interval.value,
+            "asset_data": self.market_data_encoder.encode(asset_data),
+            "indicators": json.dumps(self._get_indicators(asset_data)),
+        }
+
+    @staticmethod
+    def _get_indicators(asset_data: AssetData) -> dict:
+        if len(asset_data.info.bars) == 0:
+            return {}
+        return compute_indicators({asset_data.symbol: asset_data.info.bars})[
+            asset_data.symbol
+        ].to_dict()
+
 
-    def _get_asset_image(self, asset_data: AssetData, time_range: TimeRange) -> str:
-        logger.debug(f"Generating candlestick chart for {asset_data.symbol}")
-        return AssetImageRepository(asset_data).generate_candlestick_chart(time_range)
+def _normalize_strategy_name(name: str) -> str:
+    """The model echoes strategy names back, not always in the same case or
+    with the same surrounding whitespace."""
+    return name.strip().casefold()
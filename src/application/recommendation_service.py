@@ -0,0 +1,80 @@
+import asyncio
+
+from src.application.pipeline import PipelineResult, RecommendationPipeline
+from src.core.coalescing import Coalescer
+from src.core.logger import get_logger
+from src.core.metrics import metrics
+from src.data.entities import TimeFrame
+from src.data.repository.trading_strategy import TradingStrategy
+from src.data.value_objects import Asset
+
+logger = get_logger(__name__)
+
+RequestKey = tuple[str, str, str, str, str]
+
+
+class UnknownStrategyError(LookupError):
+    pass
+
+
+class RecommendationService:
+    """Serves recommendations from one long-lived pipeline, so its clients,
+    connection pools, caches and render workers stay warm between requests.
+
+    Identical requests that arrive while one is running join it instead of
+    running the pipeline again. The shared run is detached from its callers,
+    so a caller that goes away does not cancel it for the others.
+    """
+
+    def __init__(
+        self,
+        pipeline: RecommendationPipeline,
+        strategies: list[TradingStrategy],
+        max_concurrency: int = 8,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.pipeline = pipeline
+        self.strategies = {strategy.get_name(): strategy for strategy in strategies}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Coalescer[RequestKey, PipelineResult] = Coalescer()
+
+    def get_strategy(self, name: str) -> TradingStrategy:
+        try:
+            return self.strategies[name]
+        except KeyError:
+            raise UnknownStrategyError(
+                f"Unknown strategy: {name} (expected one of "
+                f"{', '.join(sorted(self.strategies))})"
+            )
+
+    async def recommend(
+        self, asset: Asset, strategy_name: str, time_frame: TimeFrame
+    ) -> PipelineResult:
+        strategy = self.get_strategy(strategy_name)
+        key = (
+            asset.symbol,
+            asset.asset_type.value,
+            strategy_name,
+            time_frame.time_range.value,
+            time_frame.time_interval.value,
+        )
+        if key in self._in_flight:
+            metrics.increment("service_coalesced_requests")
+            await logger.async_debug("Joining in-flight request for %s", key)
+        return await self._in_flight.run(
+            key, lambda: self._run(asset, strategy, time_frame)
+        )
+
+    async def close(self):
+        """Cancels the runs that are still in flight."""
+        await self._in_flight.cancel_all()
+
+    async def _run(
+        self, asset: Asset, strategy: TradingStrategy, time_frame: TimeFrame
+    ) -> PipelineResult:
+        async with self._semaphore:
+            with metrics.span("RecommendationService.recommend"):
+                return await self.pipeline.run(
+                    asset=asset, strategy=strategy, time_frame=time_frame
+                )
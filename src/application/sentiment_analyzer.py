@@ -23,20 +23,20 @@ class SentimentAnalyzer:
     async def analyze_sentiment(
         self, asset: Asset, time_frame: TimeFrame
     ) -> SentimentResponse | None:
-        await logger.async_info(f"Analyzing sentiment for {asset.symbol}")
-        prompt = await self.prompt_loader.load_prompt(SENTIMENTS_PROMPT_FILE)
+        await logger.async_info("Analyzing sentiment for %s", asset.symbol)
+        template = await self.prompt_loader.load_template(SENTIMENTS_PROMPT_FILE)
         now = date.today()
-        prompt = prompt.format(
+        prompt = template.format(
             asset=asset.symbol,
             asset_type=asset.asset_type,
             time_range=time_frame.time_range.value,
             time_interval=time_frame.time_interval.value,
             now=now,
         )
-        await logger.async_debug(f"Prompt: {prompt}")
+        await logger.async_debug("Prompt: %s", prompt)
         res = await self.openai_client.get_sentiment(prompt)
         if res is None:
             await logger.async_error("Failed to analyze sentiment")
             return None
-        logger.debug(f"Sentiment: {res}")
+        logger.debug("Sentiment: %s", res)
         return res
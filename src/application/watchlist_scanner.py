@@ -0,0 +1,185 @@
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from src.application.pipeline import RecommendationPipeline
+from src.application.sentiment_analyzer import SentimentAnalyzer
+from src.core.logger import get_logger
+from src.core.rate_limiter import Priority, priority_lane
+from src.data.entities import TimeFrame
+from src.data.repository.trading_strategy import TradingStrategy
+from src.data.value_objects import Asset
+from src.infrastructure.openai_client import RecommendationResponse, SentimentResponse
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class ScanResult:
+    asset: Asset
+    strategy: TradingStrategy
+    time_frame: TimeFrame
+    sentiment: SentimentResponse | None
+    recommendation: RecommendationResponse | None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.recommendation is not None
+
+
+class WatchlistScanner:
+    """Runs every asset x strategy pair through the pipeline concurrently.
+
+    Sentiment only depends on the asset and time frame, so it is computed once
+    per asset and shared by all of that asset's strategies. Appending it to
+    the sentiment history is left to the caller.
+
+    With `multi_strategy`, each asset instead runs the pipeline once, and a
+    single model call recommends for all of its strategies.
+    """
+
+    def __init__(
+        self,
+        sentiment_analyzer: SentimentAnalyzer,
+        pipeline: RecommendationPipeline,
+        max_concurrency: int = 8,
+        multi_strategy: bool = False,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.sentiment_analyzer = sentiment_analyzer
+        self.pipeline = pipeline
+        self.max_concurrency = max_concurrency
+        self.multi_strategy = multi_strategy
+
+    async def scan(
+        self,
+        assets: list[Asset],
+        strategies: list[TradingStrategy],
+        time_frame: TimeFrame,
+    ) -> AsyncIterator[ScanResult]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Pipelines wait on sentiment while holding a slot, so sentiment calls
+        # need their own limit or a full scan could deadlock
+        sentiment_semaphore = asyncio.Semaphore(self.max_concurrency)
+        sentiment_tasks: dict[str, asyncio.Task] = {}
+
+        def get_sentiment_task(asset: Asset) -> asyncio.Task:
+            if asset.symbol not in sentiment_tasks:
+                sentiment_tasks[asset.symbol] = asyncio.create_task(
+                    self._bounded(
+                        sentiment_semaphore,
+                        lambda: self.sentiment_analyzer.analyze_sentiment(
+                            asset=asset, time_frame=time_frame
+                        ),
+                    )
+                )
+            return sentiment_tasks[asset.symbol]
+
+        # Tasks copy the context, so all of their upstream calls queue behind
+        # interactive requests sharing the same rate limiters
+        groups = (
+            [strategies]
+            if self.multi_strategy
+            else [[strategy] for strategy in strategies]
+        )
+        with priority_lane(Priority.BATCH):
+            tasks = [
+                asyncio.create_task(
+                    self._scan_group(
+                        semaphore,
+                        get_sentiment_task(asset),
+                        asset,
+                        group,
+                        time_frame,
+                    )
+                )
+                for asset in assets
+                for group in groups
+            ]
+        await logger.async_info(
+            "Scanning %d assets x %d strategies with concurrency %d",
+            len(assets),
+            len(strategies),
+            self.max_concurrency,
+        )
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for result in await next_done:
+                    yield result
+        finally:
+            for task in [*tasks, *sentiment_tasks.values()]:
+                task.cancel()
+
+    async def _scan_group(
+        self,
+        semaphore: asyncio.Semaphore,
+        sentiment_task: asyncio.Task,
+        asset: Asset,
+        strategies: list[TradingStrategy],
+        time_frame: TimeFrame,
+    ) -> list[ScanResult]:
+        results = [
+            ScanResult(
+                asset=asset,
+                strategy=strategy,
+                time_frame=time_frame,
+                sentiment=None,
+                recommendation=None,
+            )
+            for strategy in strategies
+        ]
+        try:
+            # Shielded so one cancelled strategy doesn't cancel the shared task
+            sentiment = asyncio.shield(sentiment_task)
+            if self.multi_strategy:
+                pipeline_results = await self._bounded(
+                    semaphore,
+                    lambda: self.pipeline.run_strategies(
+                        asset=asset,
+                        strategies=strategies,
+                        time_frame=time_frame,
+                        sentiment=sentiment,
+                    ),
+                )
+            else:
+                pipeline_results = [
+                    await self._bounded(
+                        semaphore,
+                        lambda: self.pipeline.run(
+                            asset=asset,
+                            strategy=strategies[0],
+                            time_frame=time_frame,
+                            sentiment=sentiment,
+                        ),
+                    )
+                ]
+            for result, pipeline_result in zip(results, pipeline_results):
+                result.sentiment = pipeline_result.sentiment
+                result.recommendation = pipeline_result.recommendation
+        except Exception as e:
+            await logger.async_error(
+                "Scan failed for %s/%s: %s",
+                asset.symbol,
+                ", ".join(strategy.get_name() for strategy in strategies),
+                e,
+            )
+            for result in results:
+                result.error = e
+                if sentiment_task.done() and not sentiment_task.cancelled():
+                    if sentiment_task.exception() is None:
+                        result.sentiment = sentiment_task.result()
+        return results
+
+    @staticmethod
+    async def _bounded(
+        semaphore: asyncio.Semaphore, make_coro: Callable[[], Awaitable[T]]
+    ) -> T:
+        # The coroutine is only created once it has a slot, so runs that are
+        # cancelled while queued leave no never-awaited coroutine behind
+        async with semaphore:
+            return await make_coro()
@@ -9,14 +9,74 @@ today = date.today().strftime("%Y-%m-%d")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or ""
 YH_RAPID_API_KEY = os.getenv("YH_RAPID_API_KEY") or ""
+# Point these at local fakes for benchmarks and offline runs
+YH_BASE_URL = os.getenv("YH_BASE_URL") or "https://yh-finance.p.rapidapi.com"
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
 
-LOG_FILEPATH = f"logs/{today}.log"
+YH_CONNECTION_LIMIT = int(os.getenv("YH_CONNECTION_LIMIT") or 100)
+YH_CONNECTION_LIMIT_PER_HOST = int(os.getenv("YH_CONNECTION_LIMIT_PER_HOST") or 20)
+YH_DNS_CACHE_TTL = int(os.getenv("YH_DNS_CACHE_TTL") or 300)
+YH_KEEPALIVE_TIMEOUT = float(os.getenv("YH_KEEPALIVE_TIMEOUT") or 30)
+YH_REQUESTS_PER_SECOND = float(os.getenv("YH_REQUESTS_PER_SECOND") or 5)
 
-os.makedirs("logs", exist_ok=True)
+OPENAI_REQUESTS_PER_SECOND = float(os.getenv("OPENAI_REQUESTS_PER_SECOND") or 8)
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE") or 30_000)
+# Retries after rate limited (429) or overloaded (5xx) responses
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES") or 5)
+
+# Created on the first record written to it
+LOG_FILEPATH = os.getenv("LOG_FILEPATH") or f"logs/{today}.log"
+# Console level; the log file always gets DEBUG
+LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").upper()
+# Longer messages are cut so large payloads can't flood the log
+LOG_MAX_MESSAGE_LENGTH = int(os.getenv("LOG_MAX_MESSAGE_LENGTH") or 4000)
 
 STRATEGIES_DIR = "data/strategies"
+ASSETS_FILE = "data/stocks.txt"
 
 PROMPT_DIR = "prompts"
 
+# One of: json, csv, downsampled, summary
+MARKET_DATA_ENCODING = os.getenv("MARKET_DATA_ENCODING") or "csv"
+# Upper bound for the {asset_data} block of the recommendation prompt
+MARKET_DATA_TOKEN_BUDGET = int(os.getenv("MARKET_DATA_TOKEN_BUDGET") or 6000)
+
+CHART_RENDER_WORKERS = int(
+    os.getenv("CHART_RENDER_WORKERS") or min(os.cpu_count() or 1, 4)
+)
+CHART_CACHE_ENTRIES = int(os.getenv("CHART_CACHE_ENTRIES") or 256)
+# Charts are kept in memory; set a directory to also write them to disk
+CHART_PERSIST_DIR = os.getenv("CHART_PERSIST_DIR") or None
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR") or "repository/llm_cache"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL") or 12 * 60 * 60)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES") or 10_000)
+
+OPENAI_BATCH_DIR = os.getenv("OPENAI_BATCH_DIR") or "repository/batches"
+# Requests are collected until none arrive for this many seconds
+OPENAI_BATCH_LINGER = float(os.getenv("OPENAI_BATCH_LINGER") or 2)
+OPENAI_BATCH_MAX_REQUESTS = int(os.getenv("OPENAI_BATCH_MAX_REQUESTS") or 50_000)
+OPENAI_BATCH_POLL_INTERVAL = float(os.getenv("OPENAI_BATCH_POLL_INTERVAL") or 30)
+
+CASSETTE_DIR = os.getenv("CASSETTE_DIR") or "repository/cassettes"
+# Masked out of request bodies before they are keyed, so recordings still
+# match when a prompt mentions today's date
+CASSETTE_IGNORE_PATTERNS = (r"\d{4}-\d{2}-\d{2}",)
+
+# Refreshes wait this long after a bar boundary so the closed bar is
+# published upstream before it is fetched
+REFRESH_SETTLE_SECONDS = float(os.getenv("REFRESH_SETTLE_SECONDS") or 5)
+
+# A failed refresh is retried after this long, doubling with every failure in
+# a row up to one bar
+REFRESH_RETRY_SECONDS = float(os.getenv("REFRESH_RETRY_SECONDS") or 30)
+
+# Address of the --serve JSON API
+SERVICE_HOST = os.getenv("SERVICE_HOST") or "127.0.0.1"
+SERVICE_PORT = int(os.getenv("SERVICE_PORT") or 8080)
+
+# Set to write metrics.json and metrics.prom there when a run finishes
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+
 SENTIMENTS_PROMPT_FILE = "sentiment_analysis.txt"
 RECOMMENDATION_PROMPT_FILE = "recommendation.txt"
+MULTI_STRATEGY_RECOMMENDATION_PROMPT_FILE = "multi_strategy_recommendation.txt"
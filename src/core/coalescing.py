@@ -0,0 +1,48 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class Coalescer(Generic[K, T]):
+    """Runs at most one call per key at a time; callers asking for a key that
+    is already running join that call instead of starting another.
+
+    The call runs as a detached task that every caller, the first one
+    included, awaits through `asyncio.shield`, so a caller that is cancelled
+    stops waiting without cancelling the call for the others.
+    """
+
+    def __init__(self):
+        self._tasks: dict[K, asyncio.Task[T]] = {}
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def run(self, key: K, make_coro: Callable[[], Awaitable[T]]) -> T:
+        """Returns the result of the call running for `key`, starting it with
+        `make_coro` if there is none."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_coro())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    async def cancel_all(self):
+        """Cancels the calls that are still running and waits for them."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _forget(self, key: K, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark retrieved so a failure nobody waited for doesn't warn on GC
+        if not task.cancelled():
+            task.exception()
@@ -1,9 +1,21 @@
+import atexit
+import copy
 import logging
+import os
+import queue
+import reprlib
 import sys
-from typing import Union
+import threading
+from contextlib import contextmanager
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING, Any, Iterator, Union
 
-from src.config import LOG_FILEPATH
+from src.config import LOG_FILEPATH, LOG_LEVEL, LOG_MAX_MESSAGE_LENGTH
+from src.core.metrics import metrics
+
+if TYPE_CHECKING:
+    from rich.console import Console
 
 
 class AsyncLogger(logging.Logger):
@@ -30,45 +42,188 @@ class AsyncLogger(logging.Logger):
         await self.async_log(logging.CRITICAL, msg, *args, **kwargs)
 
 
-def get_logger(name: str) -> AsyncLogger:
-    logger = AsyncLogger(name)
-    logger.setLevel(logging.DEBUG)  # Set to the lowest level, handlers will filter
+class Truncated:
+    """Log argument that renders a bounded repr of `value`, and only if the
+    record is actually emitted."""
 
-    # Console Handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter(
+    _repr = reprlib.Repr(maxlevel=3, maxdict=8, maxlist=8, maxstring=200)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return self._repr.repr(self.value)
+
+
+class TruncatingQueueHandler(QueueHandler):
+    """Hands records to the background listener, capping message length.
+
+    Only the message itself is rendered in the caller's thread, and it is cut
+    before being handed on. The line layout is left to the listener's
+    handlers.
+    """
+
+    def __init__(self, log_queue: queue.Queue, max_length: int):
+        super().__init__(log_queue)
+        self.max_length = max_length
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        message = record.getMessage()
+        if len(message) > self.max_length:
+            omitted = len(message) - self.max_length
+            message = f"{message[: self.max_length]}... [{omitted} chars truncated]"
+        record.msg, record.args = message, None
+        return super().prepare(record)
+
+
+class LazyFileHandler(logging.FileHandler):
+    """File handler that creates its file, and directory, only once the first
+    record is written to it."""
+
+    def __init__(self, path: str):
+        super().__init__(path, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+    def set_path(self, path: str):
+        with self.lock:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self.baseFilename = os.path.abspath(path)
+
+
+_loggers: dict[str, AsyncLogger] = {}
+_lock = threading.Lock()
+_queue_handler: TruncatingQueueHandler | None = None
+_listener: QueueListener | None = None
+_file_handler: LazyFileHandler | None = None
+_console_handler: logging.Handler | None = None
+
+
+def _get_queue_handler() -> TruncatingQueueHandler:
+    """Starts the shared listener that does the actual console and file I/O on
+    a background thread."""
+    global _queue_handler, _listener, _file_handler, _console_handler
+    if _queue_handler is not None:
+        return _queue_handler
+
+    formatter = logging.Formatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
-    console_handler.setFormatter(console_formatter)
+
+    # Console Handler
+    _console_handler = logging.StreamHandler(sys.stdout)
+    _console_handler.setLevel(LOG_LEVEL)
+    _console_handler.setFormatter(formatter)
 
     # File Handler
-    file_handler = logging.FileHandler(LOG_FILEPATH)
-    file_handler.setLevel(logging.DEBUG)
-    file_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    _file_handler = LazyFileHandler(LOG_FILEPATH)
+    _file_handler.setLevel(logging.DEBUG)
+    _file_handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    _listener = QueueListener(
+        log_queue, _console_handler, _file_handler, respect_handler_level=True
     )
-    file_handler.setFormatter(file_formatter)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    _queue_handler = TruncatingQueueHandler(log_queue, LOG_MAX_MESSAGE_LENGTH)
+    return _queue_handler
+
+
+def set_log_file(path: str):
+    """Writes the log file to `path` from now on, e.g. to keep test runs out
+    of the working tree."""
+    with _lock:
+        _get_queue_handler()
+    _file_handler.set_path(path)
+
+
+@contextmanager
+def log_to_console(console: "Console") -> Iterator[None]:
+    """Prints console records through `console` while in the block.
+
+    Rich draws a `Live` display by moving the cursor back over it, so records
+    written straight to stdout from the listener thread would tear it; its
+    console prints them above the display instead.
+    """
+    from rich.logging import RichHandler
+
+    with _lock:
+        _get_queue_handler()
+        listener, console_handler = _listener, _console_handler
+    if listener is None:
+        yield
+        return
+    handler = RichHandler(
+        console=console,
+        show_time=False,
+        show_level=False,
+        show_path=False,
+        markup=False,
+    )
+    handler.setLevel(console_handler.level)
+    handler.setFormatter(console_handler.formatter)
+    listener.handlers = _replace_handler(listener.handlers, console_handler, handler)
+    try:
+        yield
+    finally:
+        listener.handlers = _replace_handler(
+            listener.handlers, handler, console_handler
+        )
+
+
+def _replace_handler(
+    handlers: tuple[logging.Handler, ...], old: logging.Handler, new: logging.Handler
+) -> tuple[logging.Handler, ...]:
+    return tuple(new if handler is old else handler for handler in handlers)
+
+
+def shutdown_logging():
+    """Writes out queued records and stops the background listener."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
 
-    return logger
+def get_logger(name: str) -> AsyncLogger:
+    with _lock:
+        if name in _loggers:
+            return _loggers[name]
+        logger = AsyncLogger(name)
+        logger.setLevel(logging.DEBUG)  # Set to the lowest level, handlers will filter
+        logger.propagate = False
+        logger.addHandler(_get_queue_handler())
+        _loggers[name] = logger
+        return logger
 
 
 def log_async(level: str):
     def decorator(func):
+        logger = get_logger(func.__module__)
+        log_method = getattr(logger, f"async_{level.lower()}")
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            logger = get_logger(func.__module__)
-            log_method = getattr(logger, f"async_{level.lower()}")
-            await log_method(f"Calling {func.__name__}")
+            await log_method("Calling %s", func.__name__)
             try:
-                result = await func(*args, **kwargs)
-                await log_method(f"{func.__name__} completed successfully")
+                with metrics.span(func.__qualname__) as span:
+                    result = await func(*args, **kwargs)
+                await log_method(
+                    "%s completed successfully in %.3fs", func.__name__, span.duration
+                )
                 return result
             except Exception as e:
-                await logger.async_error(f"Error in {func.__name__}: {str(e)}")
+                await logger.async_error("Error in %s: %s", func.__name__, e)
                 raise
 
         return wrapper
@@ -0,0 +1,181 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Upper bound on the samples kept per histogram; beyond it percentiles are
+# estimated from a uniform reservoir so memory stays flat on long runs
+MAX_SAMPLES = 10_000
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.samples: list[float] = []
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.samples) < self.max_samples:
+            self.samples.append(value)
+        else:
+            i = random.randrange(self.count)
+            if i < self.max_samples:
+                self.samples[i] = value
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile, `q` in [0, 100]."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(math.ceil(q / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class Span:
+    """A timed section of work. Attributes recorded on it become histograms
+    labelled with the span name."""
+
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self.registry = registry
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration: float | None = None
+
+    def observe(self, metric: str, value: float, **labels: str):
+        self.registry.observe(metric, value, span=self.name, **labels)
+
+    def count(self, metric: str, value: float = 1, **labels: str):
+        self.registry.increment(metric, value, span=self.name, **labels)
+
+
+class MetricsRegistry:
+    """Process-wide histograms and counters, exportable as a JSON report or in
+    the Prometheus text format."""
+
+    def __init__(self, namespace: str = "stonks"):
+        self.namespace = namespace
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, metric: str, value: float, **labels: str):
+        key = (metric, _to_labels(labels))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def increment(self, metric: str, value: float = 1, **labels: str):
+        key = (metric, _to_labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """Times the body into the `span_seconds` histogram, also when it
+        raises (counted in `span_errors`)."""
+        span = Span(self, name)
+        try:
+            yield span
+        except BaseException:
+            self.increment("span_errors", span=name)
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.started
+            self.observe("span_seconds", span.duration, span=name)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def report(self) -> dict:
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        return {
+            "histograms": [
+                {"name": name, "labels": dict(labels), **histogram.summary()}
+                for (name, labels), histogram in histograms
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in counters
+            ],
+        }
+
+    def to_prometheus(self) -> str:
+        """Histograms are exported as summaries with 0.5 and 0.95 quantiles."""
+        lines = []
+        report = self.report()
+        typed = set()
+        for entry in report["histograms"]:
+            name = self._metric_name(entry["name"])
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} summary")
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95")):
+                labels = {**entry["labels"], "quantile": quantile}
+                lines.append(f"{name}{_format_labels(labels)} {entry[key]}")
+            labels = _format_labels(entry["labels"])
+            lines.append(f"{name}_sum{labels} {entry['sum']}")
+            lines.append(f"{name}_count{labels} {entry['count']}")
+        for entry in report["counters"]:
+            name = self._metric_name(entry["name"]) + "_total"
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(entry['labels'])} {entry['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str):
+        with open(path, mode="w") as f:
+            json.dump(self.report(), f, indent=4)
+
+    def write_prometheus(self, path: str):
+        with open(path, mode="w") as f:
+            f.write(self.to_prometheus())
+
+    def _metric_name(self, metric: str) -> str:
+        return re.sub(r"[^a-zA-Z0-9_]", "_", f"{self.namespace}_{metric}")
+
+
+def _to_labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for k, v in labels.items():
+        v = v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{k}="{v}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,208 @@
+import asyncio
+import heapq
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Callable, Iterator, Mapping
+
+from src.core.metrics import metrics
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+_priority: ContextVar[Priority] = ContextVar(
+    "request_priority", default=Priority.INTERACTIVE
+)
+
+
+def get_priority() -> Priority:
+    return _priority.get()
+
+
+@contextmanager
+def priority_lane(priority: Priority) -> Iterator[None]:
+    """Sets the priority of rate limited calls made in this context, including
+    tasks created inside it."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_retry_after(headers: Mapping[str, str] | None) -> float | None:
+    """Seconds to wait according to `retry-after-ms` or `Retry-After` (either
+    delta-seconds or an HTTP date)."""
+    if headers is None:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+    except ValueError:
+        pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float]):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.level = capacity
+        self.updated = clock()
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` can be taken."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Takes (or gives back, if negative) `amount` after the fact. The level
+        may go negative, which delays the next callers."""
+        self._refill()
+        self.level = min(self.level - amount, self.capacity)
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    wake: asyncio.Event = field(compare=False, default_factory=asyncio.Event)
+
+
+class RateLimiter:
+    """Token bucket limiter for one upstream, on requests per second and
+    optionally on tokens per minute.
+
+    Waiters are served by priority (see `priority_lane`), first come first
+    served within a lane. The request rate adapts: each rate limited response
+    halves it and pauses everyone for `Retry-After` (or an exponential
+    backoff), and each success restores a tenth of the configured rate.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float,
+        tokens_per_minute: float | None = None,
+        burst: float | None = None,
+        min_rate_fraction: float = 0.1,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_rate = requests_per_second
+        self.min_rate = requests_per_second * min_rate_fraction
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.requests = TokenBucket(
+            requests_per_second, burst or max(requests_per_second, 1), clock
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute, clock)
+            if tokens_per_minute
+            else None
+        )
+        self.rate_limited = 0
+        self._backoff = 1.0
+        self._paused_until = 0.0
+        self._waiters: list[_Waiter] = []
+        self._seq = 0
+
+    @property
+    def rate(self) -> float:
+        return self.requests.rate
+
+    async def acquire(self, tokens: int = 0, priority: Priority | None = None):
+        """Waits for a request slot and `tokens` tokens of budget."""
+        self._seq += 1
+        waiter = _Waiter(get_priority() if priority is None else priority, self._seq)
+        started = time.perf_counter()
+        heapq.heappush(self._waiters, waiter)
+        try:
+            while True:
+                if self._waiters[0] is not waiter:
+                    waiter.wake.clear()
+                    await waiter.wake.wait()
+                    continue
+                delay = self._get_delay(tokens)
+                if delay <= 0:
+                    break
+                # Re-checked afterwards; a higher priority waiter may be first now
+                await asyncio.sleep(delay)
+            self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+        finally:
+            self._remove(waiter)
+        metrics.observe(
+            "rate_limit_wait_seconds",
+            time.perf_counter() - started,
+            limiter=self.name,
+            priority=Priority(waiter.priority).name,
+        )
+
+    def record_usage(self, estimated: int, actual: int):
+        """Corrects the token budget once the real usage of a call is known."""
+        if self.tokens is not None:
+            self.tokens.adjust(actual - estimated)
+
+    def on_success(self):
+        self.requests.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+        self._backoff = 1.0
+
+    def on_rate_limited(self, retry_after: float | None = None):
+        self.rate_limited += 1
+        self.requests.rate = max(self.min_rate, self.rate / 2)
+        # No burst right after the pause
+        self.requests.level = min(self.requests.level, 0)
+        pause = retry_after if retry_after is not None else self._backoff
+        self._backoff = min(self.max_backoff, self._backoff * 2)
+        self._paused_until = max(self._paused_until, self.clock() + pause)
+
+    def _get_delay(self, tokens: int) -> float:
+        delay = max(self.requests.delay(1), self._paused_until - self.clock())
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.delay(tokens))
+        return delay
+
+    def _remove(self, waiter: _Waiter):
+        if self._waiters[0] is waiter:
+            heapq.heappop(self._waiters)
+        else:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+        if self._waiters:
+            self._waiters[0].wake.set()
@@ -1,16 +1,37 @@
+import asyncio
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import aiohttp
-from pydantic import BaseModel
+import orjson
+from pydantic import BaseModel, ConfigDict, model_serializer, model_validator
 
-from src.config import YH_RAPID_API_KEY
-from src.core.logger import get_logger, log_async
+from src.config import (
+    RATE_LIMIT_MAX_RETRIES,
+    YH_BASE_URL,
+    YH_CONNECTION_LIMIT,
+    YH_CONNECTION_LIMIT_PER_HOST,
+    YH_DNS_CACHE_TTL,
+    YH_KEEPALIVE_TIMEOUT,
+    YH_RAPID_API_KEY,
+    YH_REQUESTS_PER_SECOND,
+)
+from src.core.coalescing import Coalescer
+from src.core.logger import Truncated, get_logger, log_async
+from src.core.metrics import metrics
+from src.core.rate_limiter import RateLimiter, parse_retry_after
 from src.data.entities import TimeFrame
+from src.data.ohlcv import OhlcvSeries
 from src.data.value_objects import Asset, AssetType
+from src.infrastructure.cassette import Cassette, RecordedResponse
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logger = get_logger(__name__)
 
+# Quota exhausted or upstream overloaded; worth retrying after backing off
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
 
 class TradingPeriod(BaseModel):
     timezone: str
@@ -47,14 +68,33 @@ class Meta(BaseModel):
     validRanges: list[str]
 
 
-class Indicator(BaseModel):
-    quote: list[dict]
+class StockInfo(BaseModel):
+    """Chart meta plus its bars as an `OhlcvSeries`.
 
+    Validates from, and serializes to, the Yahoo chart layout (`timestamp`
+    plus `indicators.quote`), but the bars themselves are only converted to
+    arrays, never validated element by element.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
 
-class StockInfo(BaseModel):
     meta: Meta
-    timestamp: list[int]
-    indicators: Indicator
+    bars: OhlcvSeries
+
+    @model_validator(mode="before")
+    @classmethod
+    def _decode_bars(cls, data):
+        if isinstance(data, dict) and "bars" not in data:
+            return {"meta": data.get("meta"), "bars": OhlcvSeries.from_chart(data)}
+        return data
+
+    @model_serializer
+    def _encode_bars(self) -> dict:
+        return {
+            "meta": self.meta,
+            "timestamp": self.bars.timestamp.tolist(),
+            "indicators": {"quote": [self.bars.to_quote()] if len(self.bars) else []},
+        }
 
 
 class AssetData(BaseModel):
@@ -65,21 +105,86 @@ class AssetData(BaseModel):
     def to_dict(self):
         return {
             "symbol": self.symbol,
-            "info": self.info.dict(),
+            "info": self.info.model_dump(),
             "created_at": self.created_at.isoformat(),
         }
 
 
+def decode_asset_data(symbol: str, body: bytes) -> AssetData:
+    """Parses a get-chart response body; the bar arrays go straight from the
+    decoded JSON lists into NumPy."""
+    result = orjson.loads(body)["chart"]["result"][0]
+    return AssetData(
+        symbol=symbol,
+        info=StockInfo(
+            meta=Meta.model_validate(result["meta"]),
+            bars=OhlcvSeries.from_chart(result),
+        ),
+        created_at=datetime.now(),
+    )
+
+
 # INFO: Main class below
 
 
 class AssetDataFetcher:
-    def __init__(self):
+    def __init__(
+        self,
+        connection_limit: int = YH_CONNECTION_LIMIT,
+        connection_limit_per_host: int = YH_CONNECTION_LIMIT_PER_HOST,
+        dns_cache_ttl: int = YH_DNS_CACHE_TTL,
+        keepalive_timeout: float = YH_KEEPALIVE_TIMEOUT,
+        rate_limiter: RateLimiter | None = None,
+        max_retries: int = RATE_LIMIT_MAX_RETRIES,
+        base_url: str = YH_BASE_URL,
+        cassette: Cassette | None = None,
+    ):
         self.base_headers = {
             "Content-Type": "application/json",
             "x-rapidapi-host": "yh-finance.p.rapidapi.com",
             "x-rapidapi-key": YH_RAPID_API_KEY,
         }
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.rate_limiter = rate_limiter or RateLimiter(
+            "yh-finance", YH_REQUESTS_PER_SECOND
+        )
+        self.max_retries = max_retries
+        self.base_url = base_url.rstrip("/")
+        self.cassette = cassette
+        self._session: "aiohttp.ClientSession | None" = None
+        self._in_flight: Coalescer[tuple[str, str, str], AssetData | None] = Coalescer()
+
+    async def __aenter__(self) -> "AssetDataFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        # Created lazily so the connector binds to the running event loop, and
+        # so runs served from local data never import aiohttp
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.base_headers, connector=connector
+            )
+        return self._session
+
+    async def close(self) -> None:
+        await self._in_flight.cancel_all()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     @log_async("DEBUG")
     async def fetch_asset_data(
@@ -95,25 +200,73 @@ class AssetDataFetcher:
     async def fetch_stock_data(
         self, asset: Asset, time_frame: TimeFrame
     ) -> Optional[AssetData]:
-        await logger.async_info(f"Fetching stock data for {asset.symbol}")
+        key = (
+            asset.symbol,
+            time_frame.time_range.value,
+            time_frame.time_interval.value,
+        )
+        if key in self._in_flight:
+            await logger.async_debug("Joining in-flight request for %s", key)
+        return await self._in_flight.run(
+            key, lambda: self._request_stock_data(asset, time_frame)
+        )
+
+    async def _request_stock_data(
+        self, asset: Asset, time_frame: TimeFrame
+    ) -> Optional[AssetData]:
+        await logger.async_info("Fetching stock data for %s", asset.symbol)
 
-        url = "https://yh-finance.p.rapidapi.com/stock/v3/get-chart?interval={time_interval}&symbol={symbol}&range={time_range}&region=US&includePrePost=false&useYfid=true&includeAdjustedClose=true&events=capitalGain%2Cdiv%2Csplit".format(
+        url = "{base_url}/stock/v3/get-chart?interval={time_interval}&symbol={symbol}&range={time_range}&region=US&includePrePost=false&useYfid=true&includeAdjustedClose=true&events=capitalGain%2Cdiv%2Csplit".format(
+            base_url=self.base_url,
             symbol=asset.symbol,
             time_interval=time_frame.time_interval.value,
             time_range=time_frame.time_range.value,
         )
 
-        async with aiohttp.ClientSession(headers=self.base_headers) as session:
-            response = await session.get(url=url, headers=self.base_headers)
+        for attempt in range(self.max_retries + 1):
+            response = await self._get(url)
+            if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                retry_after = parse_retry_after(response.headers)
+                self.rate_limiter.on_rate_limited(retry_after)
+                await logger.async_warning(
+                    "Got %s for %s, retrying (attempt %d, retry after %s)",
+                    response.status,
+                    asset.symbol,
+                    attempt + 1,
+                    retry_after,
+                )
+                continue
             if response.status != 200:
-                await logger.async_error(f"Failed to fetch data for {asset.symbol}")
-                await logger.async_debug(f"Response code: {response.status}")
-                await logger.async_debug(f"Response text: {response.text()}")
+                await logger.async_error("Failed to fetch data for %s", asset.symbol)
+                await logger.async_debug("Response code: %s", response.status)
+                await logger.async_debug(
+                    "Response text: %s",
+                    Truncated(response.body.decode(errors="replace")),
+                )
                 return None
-            data = await response.json()
-            logger.debug(f"Received Data from API : {data}")
-            return AssetData(
-                symbol=asset.symbol,
-                info=StockInfo(**data["chart"]["result"][0]),
-                created_at=datetime.now(),
+            self.rate_limiter.on_success()
+            break
+        metrics.observe(
+            "payload_bytes", len(response.body), span="yh-finance", payload="chart"
+        )
+        await logger.async_debug(
+            "Received Data from API : %s", Truncated(response.body)
+        )
+        return decode_asset_data(asset.symbol, response.body)
+
+    async def _get(self, url: str) -> RecordedResponse:
+        """GETs `url`, or replays it from the cassette; replayed responses
+        don't count against the rate limit."""
+        if self.cassette is not None and self.cassette.replaying:
+            return await self.cassette.replay("GET", url)
+
+        await self.rate_limiter.acquire()
+        async with self._get_session().get(url=url) as response:
+            recorded = RecordedResponse(
+                status=response.status,
+                headers={k.lower(): v for k, v in response.headers.items()},
+                body=await response.read(),
             )
+        if self.cassette is not None:
+            await self.cassette.record("GET", url, None, recorded)
+        return recorded
@@ -0,0 +1,206 @@
+"""Vectorized technical indicators.
+
+Every function takes (symbols x bars) float arrays and works on all symbols in
+one pass. Series of different lengths are stacked right-aligned with NaN
+padding (see `stack`), so the last column is always the latest bar. Recursive
+smoothers (EMA, Wilder) loop over bars but stay vectorized across symbols.
+"""
+
+import warnings
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from src.data.ohlcv import OhlcvSeries
+
+
+def stack(series: list[np.ndarray]) -> np.ndarray:
+    """Stacks 1-D series into a right-aligned, NaN-padded 2-D array."""
+    width = max((len(s) for s in series), default=0)
+    out = np.full((len(series), width), np.nan)
+    for row, s in zip(out, series):
+        if len(s):
+            row[width - len(s) :] = s
+    return out
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; NaN until `window` valid bars are available."""
+    valid = ~np.isnan(x)
+    sums = np.cumsum(np.where(valid, x, 0.0), axis=-1)
+    counts = np.cumsum(valid, axis=-1)
+    sums[..., window:] = sums[..., window:] - sums[..., :-window]
+    counts[..., window:] = counts[..., window:] - counts[..., :-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts == window, sums / window, np.nan)
+
+
+def ema(x: np.ndarray, span: int | None = None, alpha: float | None = None):
+    """Exponential moving average seeded with each row's first valid value.
+
+    NaN inputs carry the previous value forward."""
+    if alpha is None:
+        if span is None:
+            raise ValueError("Either span or alpha is required")
+        alpha = 2.0 / (span + 1)
+    x = np.atleast_2d(x)
+    out = np.full_like(x, np.nan, dtype=np.float64)
+    prev = np.full(x.shape[0], np.nan)
+    for t in range(x.shape[1]):
+        current = x[:, t]
+        prev = np.where(
+            np.isnan(prev),
+            current,
+            np.where(np.isnan(current), prev, alpha * current + (1 - alpha) * prev),
+        )
+        out[:, t] = prev
+    return out
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Relative strength index with Wilder smoothing."""
+    delta = np.diff(close, axis=-1, prepend=np.nan)
+    gain = ema(np.clip(delta, 0, None), alpha=1.0 / window)
+    loss = ema(np.clip(-delta, 0, None), alpha=1.0 / window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rs = gain / loss
+        return np.where(
+            loss == 0, np.where(gain == 0, 50.0, 100.0), 100 - 100 / (1 + rs)
+        )
+
+
+def macd(
+    close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the MACD line, signal line and histogram."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = np.roll(close, 1, axis=-1)
+    prev_close[..., 0] = np.nan
+    return np.fmax(
+        high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))
+    )
+
+
+def atr(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14
+) -> np.ndarray:
+    """Average true range with Wilder smoothing."""
+    return ema(true_range(high, low, close), alpha=1.0 / window)
+
+
+def vwap(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray
+) -> np.ndarray:
+    """Cumulative volume-weighted average price over the whole window."""
+    typical = (high + low + close) / 3
+    weighted = np.nancumsum(typical * volume, axis=-1)
+    total = np.nancumsum(np.where(np.isnan(typical), np.nan, volume), axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, weighted / total, np.nan)
+
+
+def support_resistance(
+    low: np.ndarray, high: np.ndarray, window: int = 14
+) -> tuple[np.ndarray, np.ndarray]:
+    """Lowest low and highest high over the last `window` bars."""
+    with warnings.catch_warnings(action="ignore", category=RuntimeWarning):
+        return (
+            np.nanmin(low[..., -window:], axis=-1),
+            np.nanmax(high[..., -window:], axis=-1),
+        )
+
+
+def volume_profile(
+    close: np.ndarray, volume: np.ndarray, bins: int = 12
+) -> tuple[np.ndarray, np.ndarray]:
+    """Volume traded per price bucket.
+
+    Returns (edges, volume_per_bin) shaped (symbols, bins + 1) and
+    (symbols, bins). Each symbol gets `bins` equal buckets between its own
+    lowest and highest close."""
+    close = np.atleast_2d(close)
+    volume = np.atleast_2d(volume)
+    with warnings.catch_warnings(action="ignore", category=RuntimeWarning):
+        lo = np.nanmin(close, axis=-1, keepdims=True)
+        hi = np.nanmax(close, axis=-1, keepdims=True)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    valid = ~(np.isnan(close) | np.isnan(volume))
+    index = np.clip(
+        np.floor((np.nan_to_num(close) - np.nan_to_num(lo)) / span * bins), 0, bins - 1
+    ).astype(np.int64)
+    flat = (np.arange(close.shape[0])[:, None] * bins + index)[valid]
+    profile = np.bincount(
+        flat, weights=volume[valid], minlength=close.shape[0] * bins
+    ).reshape(close.shape[0], bins)
+    edges = lo + (hi - lo) * np.linspace(0, 1, bins + 1)
+    return edges, profile
+
+
+@dataclass
+class IndicatorSnapshot:
+    last_close: float
+    support: float
+    resistance: float
+    sma_20: float
+    sma_50: float
+    ema_12: float
+    ema_26: float
+    rsi_14: float
+    macd: float
+    macd_signal: float
+    macd_histogram: float
+    atr_14: float
+    vwap: float
+    volume_point_of_control: float
+
+    def to_dict(self, digits: int = 4) -> dict[str, float | None]:
+        return {
+            k: None if np.isnan(v) else round(float(v), digits)
+            for k, v in asdict(self).items()
+        }
+
+
+def compute_indicators(bars: dict[str, OhlcvSeries]) -> dict[str, IndicatorSnapshot]:
+    """Computes the latest value of every indicator for many symbols at once."""
+    if not bars:
+        return {}
+    symbols = list(bars)
+    high = stack([np.asarray(bars[s].high) for s in symbols])
+    low = stack([np.asarray(bars[s].low) for s in symbols])
+    close = stack([np.asarray(bars[s].close) for s in symbols])
+    volume = stack([np.asarray(bars[s].volume) for s in symbols])
+    if close.shape[1] == 0:
+        high = low = close = volume = np.full((len(symbols), 1), np.nan)
+
+    support, resistance = support_resistance(low, high, 14)
+    macd_line, macd_signal, macd_hist = macd(close)
+    edges, profile = volume_profile(close, volume)
+    poc = np.argmax(profile, axis=-1)
+    rows = np.arange(len(symbols))
+    poc_price = (edges[rows, poc] + edges[rows, poc + 1]) / 2
+
+    columns = dict(
+        last_close=close[:, -1],
+        support=support,
+        resistance=resistance,
+        sma_20=sma(close, 20)[:, -1],
+        sma_50=sma(close, 50)[:, -1],
+        ema_12=ema(close, 12)[:, -1],
+        ema_26=ema(close, 26)[:, -1],
+        rsi_14=rsi(close, 14)[:, -1],
+        macd=macd_line[:, -1],
+        macd_signal=macd_signal[:, -1],
+        macd_histogram=macd_hist[:, -1],
+        atr_14=atr(high, low, close, 14)[:, -1],
+        vwap=vwap(high, low, close, volume)[:, -1],
+        volume_point_of_control=poc_price,
+    )
+    return {
+        symbol: IndicatorSnapshot(**{k: v[i] for k, v in columns.items()})
+        for i, symbol in enumerate(symbols)
+    }
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+COLUMN_DTYPES: dict[str, np.dtype] = {
+    "timestamp": np.dtype(np.int64),
+    "open": np.dtype(np.float64),
+    "high": np.dtype(np.float64),
+    "low": np.dtype(np.float64),
+    "close": np.dtype(np.float64),
+    "volume": np.dtype(np.float64),
+}
+
+VALUE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(eq=False)
+class OhlcvSeries:
+    """Bars as one contiguous NumPy array per column, sorted by timestamp.
+
+    Missing bars (null in the Yahoo payload) are NaN in every value column.
+    """
+
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OhlcvSeries):
+            return NotImplemented
+        return np.array_equal(self.timestamp, other.timestamp) and all(
+            np.array_equal(self.column(name), other.column(name), equal_nan=True)
+            for name in VALUE_COLUMNS
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        return getattr(self, name)
+
+    def slice(self, start: int, stop: int) -> "OhlcvSeries":
+        return OhlcvSeries(
+            **{name: self.column(name)[start:stop] for name in COLUMN_DTYPES}
+        )
+
+    def resample(self, interval_seconds: int, origin: int) -> "OhlcvSeries":
+        """Aggregates into bars of `interval_seconds` aligned to `origin`,
+        each labelled with its start: first open, highest high, lowest low,
+        last close and summed volume. Missing bars are dropped first."""
+        bars = self.take(~np.isnan(self.close))
+        if len(bars) == 0:
+            return OhlcvSeries.empty()
+        buckets = (bars.timestamp - origin) // interval_seconds
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(bars)] - 1
+        return OhlcvSeries(
+            timestamp=origin + buckets[starts] * interval_seconds,
+            open=bars.open[starts],
+            high=np.fmax.reduceat(bars.high, starts),
+            low=np.fmin.reduceat(bars.low, starts),
+            close=bars.close[ends],
+            volume=np.add.reduceat(np.nan_to_num(bars.volume), starts),
+        )
+
+    def take(self, mask: np.ndarray) -> "OhlcvSeries":
+        return OhlcvSeries(**{name: self.column(name)[mask] for name in COLUMN_DTYPES})
+
+    @classmethod
+    def empty(cls) -> "OhlcvSeries":
+        return cls(
+            **{name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        )
+
+    @classmethod
+    def from_chart(cls, result: dict) -> "OhlcvSeries":
+        """Decodes one `chart.result` entry. Yahoo leaves out `timestamp` and
+        sends an empty quote when the range has no bars."""
+        quote = result.get("indicators", {}).get("quote") or [{}]
+        return cls.from_quote(result.get("timestamp") or [], quote[0])
+
+    @classmethod
+    def from_quote(cls, timestamp: list[int], quote: dict) -> "OhlcvSeries":
+        # NumPy turns the nulls into NaN while converting, so no per-element
+        # Python pass is needed
+        return cls(
+            timestamp=np.asarray(timestamp, dtype=COLUMN_DTYPES["timestamp"]),
+            **{
+                name: np.asarray(quote.get(name, []), dtype=COLUMN_DTYPES[name])
+                for name in VALUE_COLUMNS
+            },
+        )
+
+    def to_quote(self) -> dict[str, list]:
+        quote = {
+            name: [None if np.isnan(v) else v for v in self.column(name).tolist()]
+            for name in VALUE_COLUMNS
+        }
+        quote["volume"] = [None if v is None else int(v) for v in quote["volume"]]
+        return quote
@@ -1,50 +1,232 @@
+import asyncio
 import json
 import os
 from datetime import datetime
-from typing import Any
 
 import aiofiles
-import mplfinance as mpf
-import pandas as pd
 
 from src.core.logger import get_logger, log_async
-from src.data.external.fetcher import AssetData
-from src.data.value_objects import Asset, TimeRange, get_offset_by_from_time_range
+from src.data.entities import TimeFrame
+from src.data import indicators
+from src.data.external.fetcher import AssetData, Meta, StockInfo
+from src.data.ohlcv import OhlcvSeries
+from src.data.repository.ohlcv_store import OhlcvStore
+from src.data.resample import (
+    SESSION_RANGES,
+    get_range_start,
+    is_range_covered,
+    slice_range,
+)
+from src.data.value_objects import Asset, TimeRange
+from src.infrastructure.chart_renderer import (
+    ChartRequest,
+    render_candlestick_chart,
+)
 
 logger = get_logger(__name__)
 
 
 class AssetDataRepository:
-    def __init__(self, base_dir: str = "repository/asset_data"):
+    """Persists chart data as deduplicated bars plus small JSON headers.
+
+    Bars go to an `OhlcvStore` keyed by (symbol, interval), so storage grows
+    with unique bars rather than with the number of fetches. Two kinds of
+    header point into them: the latest fetch per time frame, which is enough
+    to rebuild the `AssetData` that was saved, and per interval the meta of
+    the latest save plus how far back the stored bars reach without gaps,
+    which serves any range they cover.
+    """
+
+    def __init__(
+        self,
+        base_dir: str = "repository/asset_data",
+        ohlcv_store: OhlcvStore | None = None,
+    ):
         self.base_dir = base_dir
+        self.ohlcv_store = ohlcv_store or OhlcvStore()
         os.makedirs(self.base_dir, exist_ok=True)
+        self._series_locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    @log_async("DEBUG")
+    async def save_asset_data(
+        self, asset: Asset, time_frame: TimeFrame, data: AssetData
+    ) -> int:
+        """Merges the bars of `data` into the store. Returns the number of
+        previously unseen bars."""
+        await logger.async_debug("Saving asset data for %s", asset.symbol)
+        if len(data.info.bars) == 0:
+            return 0
+        interval = time_frame.time_interval
+        granularity = data.info.meta.dataGranularity
+        since = get_fetch_start(data, time_frame.time_range)
+        lock = self._series_locks.setdefault(
+            (asset.symbol, interval.value), asyncio.Lock()
+        )
+        async with lock:
+            header = await self._read_series_header(asset, interval)
+            last_timestamp = self.ohlcv_store.last_timestamp(asset.symbol, granularity)
+            added = await self.ohlcv_store.merge(
+                asset.symbol, granularity, data.info.bars
+            )
+            # A fetch reaching back to the last stored bar extends the series
+            # without a gap, anything else starts it over
+            if (
+                header is not None
+                and last_timestamp is not None
+                and since <= last_timestamp
+            ):
+                since = min(since, header["since"])
+            await self._write_series_header(
+                asset,
+                interval,
+                {
+                    "symbol": data.symbol,
+                    "meta": data.info.meta.model_dump(),
+                    "created_at": data.created_at.isoformat(),
+                    "since": since,
+                },
+            )
+        return added
+
+    @log_async("DEBUG")
+    async def get_last_timestamp(
+        self, asset: Asset, time_interval: TimeRange
+    ) -> int | None:
+        header = await self._read_series_header(asset, time_interval)
+        if header is None:
+            return None
+        return self.ohlcv_store.last_timestamp(
+            asset.symbol, header["meta"]["dataGranularity"]
+        )
 
     @log_async("DEBUG")
-    async def save_asset_data(self, asset: Asset, data: AssetData):
+    async def save_latest_asset_data(
+        self, asset: Asset, time_frame: TimeFrame, data: AssetData
+    ):
         os.makedirs(
             os.path.join(self.base_dir, asset.symbol.replace("/", "_")), exist_ok=True
         )
-        file_path = self._get_file_path(asset)
-        await logger.async_debug(f"Saving asset data for {asset.symbol}")
+        file_path = self._get_latest_file_path(asset, time_frame)
+        await logger.async_debug(
+            "Saving latest %s/%s asset data for %s",
+            time_frame.time_range.value,
+            time_frame.time_interval.value,
+            asset.symbol,
+        )
+        timestamps = data.info.bars.timestamp
+        header = {
+            "symbol": data.symbol,
+            "meta": data.info.meta.model_dump(),
+            "created_at": data.created_at.isoformat(),
+            "start": int(timestamps[0]) if len(timestamps) else None,
+            "end": int(timestamps[-1]) if len(timestamps) else None,
+        }
         async with aiofiles.open(file_path, mode="w") as f:
-            await f.write(json.dumps(data.to_dict(), indent=2))
+            await f.write(json.dumps(header))
 
     @log_async("DEBUG")
-    async def get_asset_data(self, asset: Asset) -> dict:
-        file_path = self._get_file_path(asset)
-        await logger.async_debug(f"Retrieving asset data for {asset.symbol}")
+    async def get_asset_data(
+        self, asset: Asset, time_frame: TimeFrame
+    ) -> AssetData | None:
+        file_path = self._get_latest_file_path(asset, time_frame)
+        await logger.async_debug("Retrieving asset data for %s", asset.symbol)
         if not os.path.exists(file_path):
-            return {}
+            return None
         async with aiofiles.open(file_path, mode="r") as f:
             content = await f.read()
-            return json.loads(content) if content else {}
+        if not content:
+            return None
+        header = json.loads(content)
+        meta = Meta(**header["meta"])
+        if header["start"] is None:
+            bars = OhlcvSeries.empty()
+        else:
+            bars = self.ohlcv_store.window(
+                asset.symbol, meta.dataGranularity, header["start"], header["end"]
+            )
+            if len(bars) == 0:
+                return None
+        return AssetData(
+            symbol=header["symbol"],
+            info=StockInfo(meta=meta, bars=bars),
+            created_at=datetime.fromisoformat(header["created_at"]),
+        )
 
-    def _get_file_path(self, asset: Asset) -> str:
-        now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    @log_async("DEBUG")
+    async def get_stored_asset_data(
+        self, asset: Asset, time_frame: TimeFrame
+    ) -> AssetData | None:
+        """Rebuilds `time_frame` from the stored bars as of the latest save of
+        its interval, or returns None if they don't cover the range."""
+        header = await self._read_series_header(asset, time_frame.time_interval)
+        if header is None:
+            return None
+        meta = Meta(**header["meta"])
+        created_at = datetime.fromisoformat(header["created_at"])
+        session_start = meta.currentTradingPeriod.regular.start
+        bars = slice_range(
+            self.ohlcv_store.window(asset.symbol, meta.dataGranularity),
+            time_frame.time_range,
+            created_at.timestamp(),
+            session_start,
+        )
+        if not is_range_covered(
+            bars,
+            header["since"],
+            time_frame.time_range,
+            created_at.timestamp(),
+            session_start,
+        ):
+            return None
+        return AssetData(
+            symbol=header["symbol"],
+            info=StockInfo(
+                meta=meta.model_copy(update={"range": time_frame.time_range.value}),
+                bars=bars,
+            ),
+            created_at=created_at,
+        )
+
+    async def _read_series_header(
+        self, asset: Asset, time_interval: TimeRange
+    ) -> dict | None:
+        file_path = self._get_series_file_path(asset, time_interval)
+        if not os.path.exists(file_path):
+            return None
+        async with aiofiles.open(file_path, mode="r") as f:
+            content = await f.read()
+        return json.loads(content) if content else None
+
+    async def _write_series_header(
+        self, asset: Asset, time_interval: TimeRange, header: dict
+    ):
+        file_path = self._get_series_file_path(asset, time_interval)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        async with aiofiles.open(file_path, mode="w") as f:
+            await f.write(json.dumps(header))
+
+    def _get_series_file_path(self, asset: Asset, time_interval: TimeRange) -> str:
         return os.path.join(
-            self.base_dir, f"{asset.symbol.replace('/', '_')}/{now}.json"
+            self.base_dir,
+            asset.symbol.replace("/", "_"),
+            f"series_{time_interval.value}.json",
         )
 
+    def _get_latest_file_path(self, asset: Asset, time_frame: TimeFrame) -> str:
+        return os.path.join(
+            self.base_dir,
+            asset.symbol.replace("/", "_"),
+            f"latest_{time_frame.time_range.value}_{time_frame.time_interval.value}.json",
+        )
+
+
+def get_fetch_start(data: AssetData, time_range: TimeRange) -> float:
+    """Returns how far back a `time_range` fetch reached. Session ranges are
+    counted in trading days, so they only vouch for their first bar."""
+    if time_range in SESSION_RANGES:
+        return int(data.info.bars.timestamp[0])
+    return get_range_start(time_range, data.created_at.timestamp())
+
 
 class AssetImageRepository:
     def __init__(
@@ -56,47 +238,29 @@ class AssetImageRepository:
 
     @staticmethod
     def calculate_support_resistance(df, window=14):
-        support = df["Low"].rolling(window=window).min().iloc[-1]
-        resistance = df["High"].rolling(window=window).max().iloc[-1]
-        return support, resistance
-
-    def generate_candlestick_chart(self, time_range: TimeRange) -> str:
-        logger.debug(f"Generating candlestick chart for {self.data.symbol}")
-        dates = pd.to_datetime(self.data.info.timestamp, unit="s")
-        df: pd.DataFrame = pd.DataFrame(
-            {
-                "Open": self.data.info.indicators.quote[0]["open"],
-                "High": self.data.info.indicators.quote[0]["high"],
-                "Low": self.data.info.indicators.quote[0]["low"],
-                "Close": self.data.info.indicators.quote[0]["close"],
-                "Volume": self.data.info.indicators.quote[0]["volume"],
-            },
-            index=dates,
+        support, resistance = indicators.support_resistance(
+            df["Low"].to_numpy(), df["High"].to_numpy(), window
         )
+        return float(support), float(resistance)
 
-        offset_by: Any = get_offset_by_from_time_range(time_range)
-        back_till = df.index[-1] - pd.DateOffset(**offset_by)
-        df = df.loc[df.index >= back_till]
-
-        support, resistance = self.calculate_support_resistance(df, window=14)
-
-        logger.debug(f"Support: {support}, Resistance: {resistance}")
-
-        save_filepath = f"{self.base_dir}/{self.data.symbol.replace('/', '_')}/{time_range.value}.png"
-
-        mpf.plot(
-            df,
-            type="candle",
-            volume=True,
-            style="yahoo",
-            savefig=save_filepath,
-            scale_width_adjustment=dict(volume=0.7),
-            figsize=(16, 9),
-            xrotation=0,
-            tight_layout=True,
-            hlines=dict(
-                hlines=[support, resistance], colors=["g", "r"], linestyle="-."
-            ),
+    def build_chart_request(self, time_range: TimeRange) -> ChartRequest:
+        bars = self.data.info.bars
+        return ChartRequest(
+            symbol=self.data.symbol,
+            time_range=time_range,
+            timestamp=bars.timestamp,
+            open=bars.open,
+            high=bars.high,
+            low=bars.low,
+            close=bars.close,
+            volume=bars.volume,
         )
 
+    def generate_candlestick_chart(self, time_range: TimeRange) -> str:
+        logger.debug("Generating candlestick chart for %s", self.data.symbol)
+        dir_path = os.path.join(self.base_dir, self.data.symbol.replace("/", "_"))
+        os.makedirs(dir_path, exist_ok=True)
+        save_filepath = os.path.join(dir_path, f"{time_range.value}.png")
+        with open(save_filepath, "wb") as f:
+            f.write(render_candlestick_chart(self.build_chart_request(time_range)))
         return save_filepath
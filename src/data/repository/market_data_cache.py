@@ -0,0 +1,195 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from src.core.logger import get_logger
+from src.core.metrics import metrics
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetData
+from src.data.repository.asset_data import AssetDataRepository
+from src.data.resample import get_resample_sources, resample_asset_data
+from src.data.value_objects import Asset, TimeRange, get_offset_by_from_time_range
+
+logger = get_logger(__name__)
+
+CacheKey = tuple[str, str, str]
+
+INTRADAY_INTERVALS = {
+    TimeRange.MINS_15,
+    TimeRange.MINS_30,
+    TimeRange.HOURS_1,
+    TimeRange.HOURS_2,
+    TimeRange.HOURS_4,
+    TimeRange.HOURS_6,
+    TimeRange.HOURS_8,
+}
+
+DAY = 24 * 60 * 60
+
+
+def get_expiry(data: AssetData, time_interval: TimeRange) -> float:
+    """Returns the epoch second at which `data` stops being fresh.
+
+    Intraday series expire one bar after they were fetched while the market is
+    open. Daily and longer series only change at session boundaries, so they
+    stay fresh until the next open or close. Outside regular hours no new bars
+    are printed and every series is fresh until the next open, which after a
+    Friday close is Monday's.
+    """
+    fetched_at = data.created_at.timestamp()
+    session = data.info.meta.currentTradingPeriod.regular
+
+    if fetched_at < session.start:
+        return session.start
+    if fetched_at >= session.end:
+        # Yahoo still reports the session that just closed
+        return get_next_session_start(session.start, data.info.meta.gmtoffset)
+    if time_interval in INTRADAY_INTERVALS:
+        interval = timedelta(**get_offset_by_from_time_range(time_interval))
+        return fetched_at + interval.total_seconds()
+    return session.end
+
+
+def get_next_session_start(session_start: int, gmtoffset: int) -> int:
+    """Returns the open of the trading day after the one opening at
+    `session_start`, skipping weekends in the exchange's time zone.
+
+    Exchange holidays aren't known here and count as trading days.
+    """
+    start = session_start + DAY
+    while datetime.fromtimestamp(start + gmtoffset, timezone.utc).weekday() >= 5:
+        start += DAY
+    return start
+
+
+class MarketDataCache:
+    """Read-through cache for chart data with a memory and two disk tiers.
+
+    The memory tier is a small LRU. On disk, `AssetDataRepository` keeps the
+    latest fetch per (symbol, range, interval), and the stored bars per
+    interval, which also serve any range they cover, e.g. the series kept
+    current by `MarketDataRefresher`.
+    """
+
+    def __init__(
+        self,
+        repository: AssetDataRepository,
+        max_entries: int = 128,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.repository = repository
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[CacheKey, tuple[AssetData, float]] = OrderedDict()
+
+    async def get(
+        self, asset: Asset, time_frame: TimeFrame, from_store: bool = True
+    ) -> AssetData | None:
+        key = self._get_key(asset, time_frame)
+        entry = self._entries.get(key)
+        if entry is not None:
+            data, expires_at = entry
+            if self.clock() < expires_at:
+                self._entries.move_to_end(key)
+                await logger.async_debug("Memory cache hit for %s", key)
+                return data
+            del self._entries[key]
+
+        tiers = [("Disk", self.repository.get_asset_data)]
+        if from_store:
+            tiers.append(("Store", self.repository.get_stored_asset_data))
+        for tier, read in tiers:
+            data = await read(asset, time_frame)
+            if data is None:
+                continue
+            expires_at = get_expiry(data, time_frame.time_interval)
+            if self.clock() >= expires_at:
+                await logger.async_debug("%s cache entry for %s is stale", tier, key)
+                continue
+            await logger.async_debug("%s cache hit for %s", tier, key)
+            self._remember(key, data, expires_at)
+            return data
+        await logger.async_debug("Cache miss for %s", key)
+        return None
+
+    async def put(self, asset: Asset, time_frame: TimeFrame, data: AssetData):
+        self._remember(
+            self._get_key(asset, time_frame),
+            data,
+            get_expiry(data, time_frame.time_interval),
+        )
+        # Bars first, the latest header points into them
+        await self.repository.save_asset_data(asset, time_frame, data)
+        await self.repository.save_latest_asset_data(asset, time_frame, data)
+
+    async def get_or_resample(
+        self, asset: Asset, time_frame: TimeFrame
+    ) -> AssetData | None:
+        """Like `get`, but falls back to aggregating a cached finer-grained
+        series, e.g. 1mo/1h from 1mo/15m, before reporting a miss. Derived
+        series only live in the memory tier.
+
+        Stored bars are windowed to the requested range, so they are only
+        read once per source interval: a longer range can't be covered when
+        the requested one isn't.
+        """
+        data = await self.get(asset, time_frame)
+        if data is not None:
+            return data
+        for source in get_resample_sources(time_frame):
+            source_data = await self.get(
+                asset, source, from_store=source.time_range == time_frame.time_range
+            )
+            if source_data is None or len(source_data.info.bars) == 0:
+                continue
+            data = resample_asset_data(source_data, time_frame)
+            # A derived series is no fresher than the one it came from
+            expires_at = min(
+                get_expiry(data, time_frame.time_interval),
+                get_expiry(source_data, source.time_interval),
+            )
+            self._remember(self._get_key(asset, time_frame), data, expires_at)
+            metrics.increment(
+                "market_data_resampled",
+                source=source.time_interval.value,
+                interval=time_frame.time_interval.value,
+            )
+            await logger.async_debug(
+                "Resampled %s %s/%s into %s/%s",
+                asset.symbol,
+                source.time_range.value,
+                source.time_interval.value,
+                time_frame.time_range.value,
+                time_frame.time_interval.value,
+            )
+            return data
+        return None
+
+    async def get_or_fetch(
+        self,
+        asset: Asset,
+        time_frame: TimeFrame,
+        fetch: Callable[[], Awaitable[AssetData | None]],
+    ) -> AssetData | None:
+        data = await self.get(asset, time_frame)
+        if data is not None:
+            return data
+        data = await fetch()
+        if data is not None:
+            await self.put(asset, time_frame, data)
+        return data
+
+    def _remember(self, key: CacheKey, data: AssetData, expires_at: float):
+        self._entries[key] = (data, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _get_key(asset: Asset, time_frame: TimeFrame) -> CacheKey:
+        return (
+            asset.symbol,
+            time_frame.time_range.value,
+            time_frame.time_interval.value,
+        )
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import uuid
+
+import numpy as np
+
+from src.core.logger import get_logger
+from src.data.ohlcv import COLUMN_DTYPES, OhlcvSeries
+
+logger = get_logger(__name__)
+
+# Bytes per bar across all columns
+ROW_SIZE = sum(dtype.itemsize for dtype in COLUMN_DTYPES.values())
+
+
+class OhlcvStore:
+    """Columnar bar store with one raw file per (symbol, interval).
+
+    A file holds each column's fixed-width values in turn, sorted by
+    timestamp, and is read back as memory maps, so a time window is a
+    zero-copy slice. A merge writes the merged series to a temporary file and
+    renames it over the old one: readers only ever see a whole version, and
+    maps handed out earlier keep the version they were made from.
+    """
+
+    def __init__(self, base_dir: str = "repository/ohlcv"):
+        self.base_dir = base_dir
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    async def merge(self, symbol: str, interval: str, bars: OhlcvSeries) -> int:
+        """Merges `bars` into the stored series, newer values winning on
+        duplicate timestamps. Returns the number of previously unseen bars."""
+        lock = self._locks.setdefault((symbol, interval), asyncio.Lock())
+        async with lock:
+            added = await asyncio.to_thread(self._merge, symbol, interval, bars)
+        await logger.async_debug(
+            "Merged %d new %s bars for %s", added, interval, symbol
+        )
+        return added
+
+    def load(self, symbol: str, interval: str) -> OhlcvSeries | None:
+        file_path = self._get_file_path(symbol, interval)
+        try:
+            f = open(file_path, "rb")
+        except FileNotFoundError:
+            return None
+        # Every column maps the same open file, even if a merge replaces it
+        with f:
+            length = os.fstat(f.fileno()).st_size // ROW_SIZE
+            if length == 0:
+                return OhlcvSeries.empty()
+            columns = {}
+            offset = 0
+            for name, dtype in COLUMN_DTYPES.items():
+                columns[name] = np.memmap(
+                    f, dtype=dtype, mode="r", offset=offset, shape=(length,)
+                )
+                offset += length * dtype.itemsize
+        return OhlcvSeries(**columns)
+
+    def window(
+        self,
+        symbol: str,
+        interval: str,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> OhlcvSeries:
+        """Returns the bars with start <= timestamp <= end as views into the
+        memory-mapped columns."""
+        bars = self.load(symbol, interval)
+        if bars is None:
+            return OhlcvSeries.empty()
+        lo = 0 if start is None else int(np.searchsorted(bars.timestamp, start, "left"))
+        hi = (
+            len(bars)
+            if end is None
+            else int(np.searchsorted(bars.timestamp, end, "right"))
+        )
+        return bars.slice(lo, hi)
+
+    def last_timestamp(self, symbol: str, interval: str) -> int | None:
+        bars = self.load(symbol, interval)
+        if bars is None or len(bars) == 0:
+            return None
+        return int(bars.timestamp[-1])
+
+    def _merge(self, symbol: str, interval: str, bars: OhlcvSeries) -> int:
+        bars = _sort_unique(bars)
+        if len(bars) == 0:
+            return 0
+        file_path = self._get_file_path(symbol, interval)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        existing = self.load(symbol, interval)
+        if existing is None:
+            existing = OhlcvSeries.empty()
+        # Only the bars from the first fetched timestamp on need sorting
+        cut = int(np.searchsorted(existing.timestamp, bars.timestamp[0], "left"))
+        old_tail = existing.slice(cut, len(existing))
+        tail = _sort_unique(_concat(old_tail, bars))
+        merged = _concat(existing.slice(0, cut), tail)
+
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for name in COLUMN_DTYPES:
+                    f.write(np.ascontiguousarray(merged.column(name)).tobytes())
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return len(tail) - len(old_tail)
+
+    def _get_file_path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.base_dir, symbol.replace("/", "_"), f"{interval}.bin")
+
+
+def _concat(first: OhlcvSeries, second: OhlcvSeries) -> OhlcvSeries:
+    return OhlcvSeries(
+        **{
+            name: np.concatenate([first.column(name), second.column(name)])
+            for name in COLUMN_DTYPES
+        }
+    )
+
+
+def _sort_unique(bars: OhlcvSeries) -> OhlcvSeries:
+    """Sorts by timestamp and keeps the last occurrence of each timestamp."""
+    order = np.argsort(bars.timestamp, kind="stable")
+    ts = bars.timestamp[order]
+    keep = np.ones(len(ts), dtype=bool)
+    keep[:-1] = ts[1:] != ts[:-1]
+    index = order[keep]
+    return OhlcvSeries(**{name: bars.column(name)[index] for name in COLUMN_DTYPES})
@@ -0,0 +1,58 @@
+import json
+import os
+from datetime import datetime
+
+import aiofiles
+
+from src.core.logger import get_logger, log_async
+from src.data.entities import TimeFrame
+from src.data.repository.trading_strategy import TradingStrategy
+from src.data.value_objects import Asset
+from src.infrastructure.openai_client import RecommendationResponse, SentimentResponse
+
+logger = get_logger(__name__)
+
+
+class RecommendationRepository:
+    def __init__(self, base_dir: str = "recommendations"):
+        self.base_dir = base_dir
+
+    @log_async("INFO")
+    async def save_recommendation(
+        self,
+        asset: Asset,
+        time_frame: TimeFrame,
+        strategy: TradingStrategy,
+        sentiment: SentimentResponse,
+        rec_res: RecommendationResponse,
+    ):
+        today = datetime.now().strftime("%Y-%m-%d")
+        base_dir = os.path.join(self.base_dir, today)
+        now = datetime.now().strftime("%H-%M-%S")
+        os.makedirs(base_dir, exist_ok=True)
+        async with aiofiles.open(
+            f"{base_dir}/{asset.symbol}_{strategy.get_name()}_{now}.json",
+            mode="w",
+        ) as f:
+            await f.write(
+                json.dumps(
+                    {
+                        "asset": asset.symbol,
+                        "strategy": strategy.get_name(),
+                        "time_range": time_frame.time_range.value,
+                        "time_interval": time_frame.time_interval.value,
+                        "sentiment": sentiment.to_dict(),
+                        "pattern": rec_res.pattern,
+                        "support_and_resistance": dict(rec_res.support_and_resistance),
+                        "entry": dict(rec_res.entry),
+                        "exit": dict(rec_res.exit),
+                        "position": rec_res.position,
+                        "recommendation": {
+                            "decision": rec_res.recommendation.name,
+                            "confidence": rec_res.confidence,
+                            "intent": rec_res.intent,
+                        },
+                    },
+                    indent=4,
+                )
+            )
@@ -1,5 +1,7 @@
+import asyncio
 import json
 import os
+import uuid
 from datetime import datetime
 from typing import List
 
@@ -26,39 +28,111 @@ class SentimentHistory(BaseModel):
 
 
 class SentimentRepository:
+    """Append-only sentiment log with one JSON line per entry.
+
+    Appends never touch existing entries and `tail` reads the file backwards,
+    so both cost O(1) in the length of the history.
+    """
+
+    TAIL_BLOCK_SIZE = 4096
+
     def __init__(self, base_dir: str = "repository/sentiment"):
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
+        self._migration_locks: dict[str, asyncio.Lock] = {}
 
     @log_async("DEBUG")
     async def append_sentiment(self, asset: Asset, sentiment: SentimentResponse):
-        logger.debug(f"Saving sentiment {sentiment} for {asset.symbol}")
-        file_path = self._get_file_path(asset)
-        history = await self.get_sentiment_history(asset)
-        nl = [e.to_dict() for e in history]
-        nl.append(
-            SentimentHistory(sentiment=sentiment, timestamp=datetime.now()).to_dict()
-        )
-        async with aiofiles.open(file_path, mode="w") as f:
-            await f.write(json.dumps(nl, indent=2))
-        logger.debug(f"Sentiment {sentiment.sentiment} added for {asset.symbol}")
+        logger.debug("Saving sentiment %s for %s", sentiment, asset.symbol)
+        await self._migrate_legacy_file(self._get_file_stem(asset))
+        entry = SentimentHistory(sentiment=sentiment, timestamp=datetime.now())
+        async with aiofiles.open(self._get_file_path(asset), mode="a") as f:
+            await f.write(json.dumps(entry.to_dict()) + "\n")
+        logger.debug("Sentiment %s added for %s", sentiment.sentiment, asset.symbol)
 
     @log_async("DEBUG")
     async def get_sentiment_history(self, asset: Asset) -> List[SentimentHistory]:
-        logger.debug(f"Getting sentiment history for {asset.symbol}")
+        logger.debug("Getting sentiment history for %s", asset.symbol)
+        await self._migrate_legacy_file(self._get_file_stem(asset))
         file_path = self._get_file_path(asset)
         if not os.path.exists(file_path):
             return []
         async with aiofiles.open(file_path, mode="r") as f:
             content = await f.read()
-            loaded = json.loads(content) if content else []
-            return [
-                SentimentHistory(
-                    sentiment=SentimentResponse(**e["sentiment"]),
-                    timestamp=datetime.fromisoformat(e["timestamp"]),
-                )
-                for e in loaded
-            ]
+        return [self._parse_line(line) for line in content.splitlines() if line]
+
+    @log_async("DEBUG")
+    async def tail(self, asset: Asset, n: int) -> List[SentimentHistory]:
+        """Returns the last `n` entries, oldest first."""
+        await self._migrate_legacy_file(self._get_file_stem(asset))
+        file_path = self._get_file_path(asset)
+        if n <= 0 or not os.path.exists(file_path):
+            return []
+        async with aiofiles.open(file_path, mode="rb") as f:
+            position = await f.seek(0, os.SEEK_END)
+            buffer = b""
+            # n entries need n + 1 line breaks unless the file starts first
+            while position > 0 and buffer.count(b"\n") <= n:
+                step = min(self.TAIL_BLOCK_SIZE, position)
+                position -= step
+                await f.seek(position)
+                buffer = await f.read(step) + buffer
+        lines = [line for line in buffer.decode("utf-8").splitlines() if line]
+        if position > 0:
+            # The first line is cut off unless we read from the start
+            lines = lines[1:]
+        return [self._parse_line(line) for line in lines[-n:]]
+
+    async def migrate_legacy_files(self) -> int:
+        """Converts every legacy JSON array file to the log format. Returns the
+        number of files migrated."""
+        migrated = 0
+        for filename in os.listdir(self.base_dir):
+            if filename.endswith(".json"):
+                migrated += await self._migrate_legacy_file(filename[: -len(".json")])
+        return migrated
+
+    async def _migrate_legacy_file(self, file_stem: str) -> bool:
+        legacy_path = os.path.join(self.base_dir, f"{file_stem}.json")
+        if not os.path.exists(legacy_path):
+            return False
+        lock = self._migration_locks.setdefault(file_stem, asyncio.Lock())
+        async with lock:
+            # Another caller may have migrated it while we waited
+            if not os.path.exists(legacy_path):
+                return False
+            await self._migrate(legacy_path, file_stem)
+        return True
+
+    async def _migrate(self, legacy_path: str, file_stem: str):
+        file_path = os.path.join(self.base_dir, f"{file_stem}.jsonl")
+        await logger.async_info("Migrating sentiment history for %s", file_stem)
+        async with aiofiles.open(legacy_path, mode="r") as f:
+            content = await f.read()
+        lines = [json.dumps(e) + "\n" for e in (json.loads(content) if content else [])]
+        # Entries already in the log are newer than the legacy ones
+        existing = ""
+        if os.path.exists(file_path):
+            async with aiofiles.open(file_path, mode="r") as f:
+                existing = await f.read()
+        # Unique per writer, in case another process migrates the same file
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        async with aiofiles.open(tmp_path, mode="w") as f:
+            await f.write("".join(lines) + existing)
+        os.replace(tmp_path, file_path)
+        os.remove(legacy_path)
+
+    @staticmethod
+    def _parse_line(line: str) -> SentimentHistory:
+        e = json.loads(line)
+        return SentimentHistory(
+            sentiment=SentimentResponse(**e["sentiment"]),
+            timestamp=datetime.fromisoformat(e["timestamp"]),
+        )
 
     def _get_file_path(self, asset: Asset) -> str:
-        return os.path.join(self.base_dir, f"{asset.symbol.replace('/', '_')}.json")
+        return os.path.join(self.base_dir, f"{self._get_file_stem(asset)}.jsonl")
+
+    @staticmethod
+    def _get_file_stem(asset: Asset) -> str:
+        return asset.symbol.replace("/", "_")
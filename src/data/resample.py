@@ -0,0 +1,163 @@
+import calendar
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetData, Meta, StockInfo
+from src.data.ohlcv import OhlcvSeries
+from src.data.value_objects import TimeRange, get_offset_by_from_time_range
+
+# Intervals with a fixed length, which bars can be bucketed into
+FIXED_INTERVALS = {
+    TimeRange.MINS_15,
+    TimeRange.MINS_30,
+    TimeRange.HOURS_1,
+    TimeRange.HOURS_2,
+    TimeRange.HOURS_4,
+    TimeRange.HOURS_6,
+    TimeRange.HOURS_8,
+    TimeRange.DAY_1,
+    TimeRange.WEEK_1,
+}
+
+# Chart ranges from shortest to longest
+RANGE_ORDER = [
+    TimeRange.DAY_1,
+    TimeRange.DAY_5,
+    TimeRange.MONTH_1,
+    TimeRange.MONTH_3,
+    TimeRange.MONTH_6,
+    TimeRange.YEAR_1,
+    TimeRange.YEAR_5,
+]
+
+# Yahoo counts these ranges in sessions rather than calendar days
+SESSION_RANGES = {TimeRange.DAY_1: 1, TimeRange.DAY_5: 5}
+
+DAY = 24 * 60 * 60
+
+
+def get_interval_seconds(interval: TimeRange) -> int:
+    if interval not in FIXED_INTERVALS:
+        raise ValueError(f"{interval.value} bars don't have a fixed length")
+    return int(timedelta(**get_offset_by_from_time_range(interval)).total_seconds())
+
+
+def get_resample_sources(time_frame: TimeFrame) -> list[TimeFrame]:
+    """Returns the time frames whose bars aggregate exactly into
+    `time_frame`, finest interval and shortest range first.
+
+    A source has to span at least the requested range, and its interval has
+    to divide the requested one.
+    """
+    interval, time_range = time_frame.time_interval, time_frame.time_range
+    if interval not in FIXED_INTERVALS or time_range not in RANGE_ORDER:
+        return []
+    seconds = get_interval_seconds(interval)
+    intervals = sorted(
+        (
+            source
+            for source in FIXED_INTERVALS
+            if source != interval and seconds % get_interval_seconds(source) == 0
+        ),
+        key=get_interval_seconds,
+    )
+    ranges = RANGE_ORDER[RANGE_ORDER.index(time_range) :]
+    return [
+        TimeFrame(source_range, source)
+        for source in intervals
+        for source_range in ranges
+    ]
+
+
+def resample_asset_data(data: AssetData, time_frame: TimeFrame) -> AssetData:
+    """Derives `time_frame` from the finer-grained `data`, which must come
+    from one of `get_resample_sources(time_frame)`.
+
+    Bars are aligned to the regular session open, and weekly bars to
+    Monday's open. Alignment uses the current session, so bars from before a
+    DST change are off by the hour it shifted.
+    """
+    meta = data.info.meta
+    session_start = meta.currentTradingPeriod.regular.start
+    bars = data.info.bars.resample(
+        get_interval_seconds(time_frame.time_interval),
+        get_origin(meta, time_frame.time_interval),
+    )
+    bars = slice_range(
+        bars, time_frame.time_range, data.created_at.timestamp(), session_start
+    )
+    return AssetData(
+        symbol=data.symbol,
+        info=StockInfo(
+            meta=meta.model_copy(
+                update={
+                    "dataGranularity": time_frame.time_interval.value,
+                    "range": time_frame.time_range.value,
+                }
+            ),
+            bars=bars,
+        ),
+        created_at=data.created_at,
+    )
+
+
+def get_origin(meta: Meta, interval: TimeRange) -> int:
+    start = meta.currentTradingPeriod.regular.start
+    if interval != TimeRange.WEEK_1:
+        return start
+    weekday = datetime.fromtimestamp(start + meta.gmtoffset, timezone.utc).weekday()
+    return start - weekday * DAY
+
+
+def slice_range(
+    bars: OhlcvSeries, time_range: TimeRange, now: float, session_start: int
+) -> OhlcvSeries:
+    """Keeps the bars that a `time_range` fetch at `now` would return."""
+    if len(bars) == 0:
+        return bars
+    if time_range in SESSION_RANGES:
+        sessions = get_sessions(bars, session_start)
+        first = sessions[max(len(sessions) - SESSION_RANGES[time_range], 0)]
+        start = session_start + int(first) * DAY
+    else:
+        start = get_range_start(time_range, now)
+    return bars.slice(int(np.searchsorted(bars.timestamp, start, "left")), len(bars))
+
+
+def is_range_covered(
+    bars: OhlcvSeries,
+    since: float,
+    time_range: TimeRange,
+    now: float,
+    session_start: int,
+) -> bool:
+    """Tells whether `bars`, sliced from a series with no gaps since `since`,
+    hold everything that a `time_range` fetch at `now` would return."""
+    if len(bars) == 0:
+        return False
+    if time_range in SESSION_RANGES:
+        # Fewer sessions are all there were if the series reaches back further
+        first = bars.timestamp[0]
+        return since < first or (
+            since == first
+            and len(get_sessions(bars, session_start)) == SESSION_RANGES[time_range]
+        )
+    return since <= get_range_start(time_range, now)
+
+
+def get_sessions(bars: OhlcvSeries, session_start: int) -> np.ndarray:
+    """Returns the distinct sessions of `bars` as day offsets from
+    `session_start`."""
+    return np.unique((bars.timestamp - session_start) // DAY)
+
+
+def get_range_start(time_range: TimeRange, now: float) -> float:
+    offset = get_offset_by_from_time_range(time_range)
+    months = offset.pop("months", 0) + 12 * offset.pop("years", 0)
+    end = datetime.fromtimestamp(now, timezone.utc)
+    year, month = divmod(end.year * 12 + end.month - 1 - months, 12)
+    day = min(end.day, calendar.monthrange(year, month + 1)[1])
+    start = end.replace(year=year, month=month + 1, day=day) - timedelta(**offset)
+    return start.timestamp()
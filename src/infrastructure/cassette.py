@@ -0,0 +1,140 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiofiles
+
+from src.config import CASSETTE_DIR, CASSETTE_IGNORE_PATTERNS
+from src.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CassetteMode(Enum):
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class CassetteMissError(LookupError):
+    pass
+
+
+@dataclass
+class RecordedResponse:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "headers": self.headers,
+            "body": base64.b64encode(self.body).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RecordedResponse":
+        return cls(
+            status=data["status"],
+            headers=data["headers"],
+            body=base64.b64decode(data["body"]),
+        )
+
+
+class Cassette:
+    """Stores upstream responses keyed by a normalized request, and serves
+    them back in replay mode without touching the network.
+
+    Requests are normalized by sorting query parameters and JSON keys and by
+    masking every match of `ignore_patterns` (by default ISO dates, so
+    prompts that mention today's date still match on a later day). Replay
+    waits `latency` seconds per response to simulate the upstream.
+    """
+
+    def __init__(
+        self,
+        mode: CassetteMode,
+        base_dir: str = CASSETTE_DIR,
+        latency: float = 0.0,
+        ignore_patterns: tuple[str, ...] = CASSETTE_IGNORE_PATTERNS,
+    ):
+        self.mode = mode
+        self.base_dir = base_dir
+        self.latency = latency
+        self.ignore_patterns = [re.compile(p) for p in ignore_patterns]
+        self.hits = 0
+        self.recorded = 0
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == CassetteMode.REPLAY
+
+    def make_key(self, method: str, url: str, body: bytes | None = None) -> str:
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        normalized_url = urlunsplit(
+            (parts.scheme, parts.netloc.lower(), parts.path, query, "")
+        )
+        h = hashlib.sha256()
+        for part in (method.upper(), normalized_url, self._normalize_body(body)):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    async def replay(
+        self, method: str, url: str, body: bytes | None = None
+    ) -> RecordedResponse:
+        key = self.make_key(method, url, body)
+        try:
+            async with aiofiles.open(self._get_file_path(key), mode="r") as f:
+                entry = json.loads(await f.read())
+        except FileNotFoundError:
+            raise CassetteMissError(f"No recorded response for {method} {url}")
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.hits += 1
+        return RecordedResponse.from_dict(entry["response"])
+
+    async def record(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None,
+        response: RecordedResponse,
+    ):
+        # Throttled and failed responses aren't worth replaying
+        if response.status == 429 or response.status >= 500:
+            return
+        key = self.make_key(method, url, body)
+        path = self._get_file_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "request": {"method": method.upper(), "url": url},
+            "response": response.to_dict(),
+        }
+        async with aiofiles.open(path, mode="w") as f:
+            await f.write(json.dumps(entry))
+        self.recorded += 1
+        await logger.async_debug("Recorded %s %s as %s", method, url, key)
+
+    def _normalize_body(self, body: bytes | None) -> str:
+        if not body:
+            return ""
+        text = body.decode(errors="replace")
+        try:
+            text = json.dumps(json.loads(text), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            pass
+        for pattern in self.ignore_patterns:
+            text = pattern.sub("<ignored>", text)
+        return text
+
+    def _get_file_path(self, key: str) -> str:
+        return os.path.join(self.base_dir, key[:2], f"{key}.json")
@@ -0,0 +1,56 @@
+import httpx
+
+from src.infrastructure.cassette import Cassette, RecordedResponse
+
+# Hop-by-hop and encoding headers don't apply to the stored, decoded body
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records through to `transport`, or replays from
+    the cassette without any network access."""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.cassette = cassette
+        self.transport = transport or httpx.AsyncHTTPTransport(
+            # Same pool size as the OpenAI SDK's default client
+            limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        url = str(request.url)
+        if self.cassette.replaying:
+            recorded = await self.cassette.replay(request.method, url, body)
+            return httpx.Response(
+                recorded.status,
+                headers=recorded.headers,
+                content=recorded.body,
+                request=request,
+            )
+
+        response = await self.transport.handle_async_request(request)
+        content = await response.aread()
+        recorded = RecordedResponse(
+            status=response.status_code,
+            headers={
+                k: v
+                for k, v in response.headers.items()
+                if k.lower() not in DROPPED_HEADERS
+            },
+            body=content,
+        )
+        await self.cassette.record(request.method, url, body, recorded)
+        return httpx.Response(
+            recorded.status,
+            headers=recorded.headers,
+            content=content,
+            request=request,
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
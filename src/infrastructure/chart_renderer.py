@@ -0,0 +1,248 @@
+import asyncio
+import base64
+import hashlib
+import io
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import aiofiles
+import numpy as np
+
+from src.config import (
+    CHART_CACHE_ENTRIES,
+    CHART_PERSIST_DIR,
+    CHART_RENDER_WORKERS,
+)
+from src.core.coalescing import Coalescer
+from src.core.logger import get_logger
+from src.core.metrics import metrics
+from src.data import indicators
+from src.data.value_objects import TimeRange, get_offset_by_from_time_range
+
+logger = get_logger(__name__)
+
+
+class EmptyChartError(ValueError):
+    """Raised for a chart request without any bars, e.g. for a newly listed
+    or illiquid symbol."""
+
+
+@dataclass(frozen=True)
+class ChartRequest:
+    symbol: str
+    time_range: TimeRange
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def digest(self) -> str:
+        """Content hash of the bars and render parameters."""
+        h = hashlib.sha256()
+        h.update(f"{RENDER_VERSION}|{self.time_range.value}".encode())
+        for column in (
+            self.timestamp,
+            self.open,
+            self.high,
+            self.low,
+            self.close,
+            self.volume,
+        ):
+            h.update(np.ascontiguousarray(column).tobytes())
+        return h.hexdigest()
+
+    def check_not_empty(self):
+        if len(self.timestamp) == 0:
+            raise EmptyChartError(f"No bars to chart for {self.symbol}")
+
+
+@dataclass
+class ChartImage:
+    png: bytes
+    digest: str
+    symbol: str
+    time_range: TimeRange
+    mime_type: str = field(default="image/png")
+
+    @cached_property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.png).decode()}"
+
+
+# Bump whenever render_candlestick_chart output changes to invalidate the cache
+RENDER_VERSION = 1
+
+
+def render_candlestick_chart(request: ChartRequest) -> bytes:
+    """Renders `request` and returns the PNG bytes.
+
+    Runs inside the render workers, so it must stay a picklable module-level
+    function."""
+    request.check_not_empty()
+    import mplfinance as mpf
+    import pandas as pd
+
+    df = pd.DataFrame(
+        {
+            "Open": request.open,
+            "High": request.high,
+            "Low": request.low,
+            "Close": request.close,
+            "Volume": request.volume,
+        },
+        index=pd.to_datetime(request.timestamp, unit="s"),
+    )
+
+    offset_by = get_offset_by_from_time_range(request.time_range)
+    back_till = df.index[-1] - pd.DateOffset(**offset_by)
+    df = df.loc[df.index >= back_till]
+
+    support, resistance = indicators.support_resistance(
+        df["Low"].to_numpy(), df["High"].to_numpy(), 14
+    )
+
+    buffer = io.BytesIO()
+    mpf.plot(
+        df,
+        type="candle",
+        volume=True,
+        style="yahoo",
+        savefig=dict(fname=buffer, format="png"),
+        scale_width_adjustment=dict(volume=0.7),
+        figsize=(16, 9),
+        xrotation=0,
+        tight_layout=True,
+        hlines=dict(
+            hlines=[float(support), float(resistance)],
+            colors=["g", "r"],
+            linestyle="-.",
+        ),
+    )
+    return buffer.getvalue()
+
+
+def _warm_worker():
+    # Pay the matplotlib import and font cache cost once per worker
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    import mplfinance  # noqa: F401
+    import pandas  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class ChartRenderer:
+    """Renders candlestick charts in a pool of pre-warmed worker processes,
+    keeping matplotlib off the event loop.
+
+    Images stay in memory. They are cached by the content hash of the
+    request, so identical bars are rendered and base64-encoded once, and are
+    only written to `persist_dir` (if set) in the background.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = CHART_RENDER_WORKERS,
+        max_cached: int = CHART_CACHE_ENTRIES,
+        persist_dir: str | None = CHART_PERSIST_DIR,
+    ):
+        self.max_workers = max_workers
+        self.max_cached = max_cached
+        self.persist_dir = persist_dir
+        self._executor: ProcessPoolExecutor | None = None
+        self._cache: OrderedDict[str, ChartImage] = OrderedDict()
+        self._in_flight: Coalescer[str, ChartImage] = Coalescer()
+        self._pending_writes: set[asyncio.Task] = set()
+
+    async def start(self):
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(
+            *[
+                loop.run_in_executor(self._executor, _ping)
+                for _ in range(self.max_workers)
+            ]
+        )
+        await logger.async_debug("Started %d chart render workers", len(set(pids)))
+
+    async def render(self, request: ChartRequest) -> ChartImage:
+        # Fail here rather than in a worker process
+        request.check_not_empty()
+        digest = request.digest()
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            await logger.async_debug("Chart cache hit for %s", request.symbol)
+            return self._cache[digest]
+        return await self._in_flight.run(digest, lambda: self._render(request, digest))
+
+    async def render_many(self, requests: list[ChartRequest]) -> list[ChartImage]:
+        return list(await asyncio.gather(*[self.render(r) for r in requests]))
+
+    async def close(self):
+        await self._in_flight.cancel_all()
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown)
+
+    async def __aenter__(self) -> "ChartRenderer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _render(self, request: ChartRequest, digest: str) -> ChartImage:
+        await self.start()
+        await logger.async_debug("Rendering candlestick chart for %s", request.symbol)
+        with metrics.span("ChartRenderer.render") as span:
+            png = await asyncio.get_running_loop().run_in_executor(
+                self._executor, render_candlestick_chart, request
+            )
+            span.observe("payload_bytes", len(png), payload="png")
+        image = ChartImage(
+            png=png,
+            digest=digest,
+            symbol=request.symbol,
+            time_range=request.time_range,
+        )
+        self._cache[digest] = image
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        if self.persist_dir:
+            task = asyncio.create_task(self._persist(image))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+        return image
+
+    async def _persist(self, image: ChartImage):
+        # Content-addressed names, so concurrent runs never clobber each other
+        dir_path = os.path.join(self.persist_dir, image.symbol.replace("/", "_"))
+        os.makedirs(dir_path, exist_ok=True)
+        path = os.path.join(
+            dir_path, f"{image.time_range.value}_{image.digest[:16]}.png"
+        )
+        try:
+            async with aiofiles.open(path, mode="wb") as f:
+                await f.write(image.png)
+        except OSError as e:
+            await logger.async_warning("Failed to persist chart %s: %s", path, e)
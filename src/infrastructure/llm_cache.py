@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Callable
+
+import aiofiles
+
+from src.config import LLM_CACHE_DIR, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL
+from src.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LLMResponseCache:
+    """On-disk memo of parsed model responses, one JSON file per key.
+
+    Entries expire after `ttl_seconds` and the least recently used ones are
+    evicted once there are more than `max_entries`. With `bypass` set, reads
+    always miss but fresh responses are still written back.
+    """
+
+    def __init__(
+        self,
+        base_dir: str = LLM_CACHE_DIR,
+        ttl_seconds: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        bypass: bool = False,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.base_dir = base_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entry_count: int | None = None
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        image_digest: str | None = None,
+    ) -> str:
+        h = hashlib.sha256()
+        for part in (model, system_prompt, user_prompt, image_digest or ""):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    async def get(self, key: str) -> dict | None:
+        if self.bypass:
+            self.misses += 1
+            return None
+        path = self._get_file_path(key)
+        try:
+            async with aiofiles.open(path, mode="r") as f:
+                entry = json.loads(await f.read())
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if self.clock() - entry["created_at"] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            # Reads refresh the mtime, which is what eviction orders by
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["response"]
+
+    async def put(self, key: str, response: dict):
+        path = self._get_file_path(key)
+        is_new = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        async with aiofiles.open(path, mode="w") as f:
+            await f.write(
+                json.dumps({"created_at": self.clock(), "response": response})
+            )
+        if is_new:
+            await self._after_insert()
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def _after_insert(self):
+        if self._entry_count is None:
+            self._entry_count = len(await asyncio.to_thread(self._list_entries))
+        else:
+            self._entry_count += 1
+        if self._entry_count > self.max_entries:
+            evicted, self._entry_count = await asyncio.to_thread(self._evict)
+            self.evictions += evicted
+            await logger.async_debug("Evicted %d LLM cache entries", evicted)
+
+    def _list_entries(self) -> list[os.DirEntry]:
+        entries = []
+        for shard in os.scandir(self.base_dir):
+            if shard.is_dir():
+                entries += [e for e in os.scandir(shard.path) if e.is_file()]
+        return entries
+
+    def _evict(self) -> tuple[int, int]:
+        """Drops expired entries, then the least recently used ones down to 90%
+        of `max_entries`. Returns (evicted, remaining)."""
+        now = self.clock()
+        entries = sorted(self._list_entries(), key=lambda e: e.stat().st_mtime)
+        target = int(self.max_entries * 0.9)
+        evicted = 0
+        for entry in entries:
+            remaining = len(entries) - evicted
+            expired = now - entry.stat().st_mtime > self.ttl_seconds
+            if remaining <= target and not expired:
+                break
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            evicted += 1
+        return evicted, len(entries) - evicted
+
+    def _get_file_path(self, key: str) -> str:
+        return os.path.join(self.base_dir, key[:2], f"{key}.json")
@@ -0,0 +1,352 @@
+import asyncio
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, TypeVar
+
+import aiofiles
+from pydantic import BaseModel
+
+from src.config import (
+    OPENAI_BATCH_DIR,
+    OPENAI_BATCH_LINGER,
+    OPENAI_BATCH_MAX_REQUESTS,
+    OPENAI_BATCH_POLL_INTERVAL,
+)
+from src.core.logger import get_logger
+
+if TYPE_CHECKING:
+    import openai
+
+logger = get_logger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batch states after which the output will not change anymore
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchRequestError(RuntimeError):
+    pass
+
+
+def get_response_format(model: type[BaseModel]) -> dict:
+    """The strict `json_schema` response format for `model`, as the SDK's
+    `parse` sends it. Built here because the SDK only exposes this privately.
+    """
+    schema = model.model_json_schema()
+
+    def make_strict(node):
+        if isinstance(node, dict):
+            if node.get("type") == "object" and "properties" in node:
+                node["additionalProperties"] = False
+                node["required"] = list(node["properties"])
+            for value in node.values():
+                make_strict(value)
+        elif isinstance(node, list):
+            for value in node:
+                make_strict(value)
+
+    make_strict(schema)
+    return {
+        "type": "json_schema",
+        "json_schema": {"schema": schema, "name": model.__name__, "strict": True},
+    }
+
+
+@dataclass
+class BatchStatus:
+    status: str
+    output_file_id: str | None = None
+    error_file_id: str | None = None
+
+
+class BatchBackend(ABC):
+    """Where batch input files are submitted and their results come from."""
+
+    @abstractmethod
+    async def submit(self, input_path: str) -> str:
+        """Submits a Batch API JSONL file and returns the batch id."""
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> BatchStatus: ...
+
+    @abstractmethod
+    async def read_file(self, file_id: str) -> str: ...
+
+
+class OpenAIBatchBackend(BatchBackend):
+    def __init__(self, client: "openai.AsyncOpenAI", completion_window: str = "24h"):
+        self.client = client
+        self.completion_window = completion_window
+
+    async def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            input_file = await self.client.files.create(file=f, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> BatchStatus:
+        batch = await self.client.batches.retrieve(batch_id)
+        return BatchStatus(
+            status=batch.status,
+            output_file_id=batch.output_file_id,
+            error_file_id=batch.error_file_id,
+        )
+
+    async def read_file(self, file_id: str) -> str:
+        content = await self.client.files.content(file_id)
+        return content.text
+
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in for the Batch API, for running offline.
+
+    `responder` receives the request body of each input line and returns the
+    chat completion body the API would have returned. Batches are processed
+    on the first status poll and results are written next to the input using
+    the Batch API output format.
+    """
+
+    def __init__(self, base_dir: str, responder: Callable[[dict], dict]):
+        self.base_dir = base_dir
+        self.responder = responder
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    async def submit(self, input_path: str) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        async with aiofiles.open(input_path, mode="r") as f:
+            lines = await f.read()
+        async with aiofiles.open(self._get_path(batch_id, "input"), mode="w") as f:
+            await f.write(lines)
+        return batch_id
+
+    async def status(self, batch_id: str) -> BatchStatus:
+        output_path = self._get_path(batch_id, "output")
+        if not os.path.exists(self._get_path(batch_id, "input")):
+            return BatchStatus(status="failed")
+        if not os.path.exists(output_path):
+            await self._process(batch_id)
+        return BatchStatus(status="completed", output_file_id=output_path)
+
+    async def read_file(self, file_id: str) -> str:
+        async with aiofiles.open(file_id, mode="r") as f:
+            return await f.read()
+
+    async def _process(self, batch_id: str):
+        async with aiofiles.open(self._get_path(batch_id, "input"), mode="r") as f:
+            requests = [json.loads(line) for line in await f.readlines() if line]
+        lines = []
+        for request in requests:
+            try:
+                response = {
+                    "status_code": 200,
+                    "request_id": uuid.uuid4().hex,
+                    "body": self.responder(request["body"]),
+                }
+                error = None
+            except Exception as e:
+                response = None
+                error = {"code": type(e).__name__, "message": str(e)}
+            lines.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": response,
+                        "error": error,
+                    }
+                )
+            )
+        async with aiofiles.open(self._get_path(batch_id, "output"), mode="w") as f:
+            await f.write("\n".join(lines) + "\n")
+
+    def _get_path(self, batch_id: str, kind: str) -> str:
+        return os.path.join(self.base_dir, f"{batch_id}.{kind}.jsonl")
+
+
+@dataclass
+class _PendingRequest:
+    custom_id: str
+    body: dict
+    response_format: type[BaseModel]
+    future: asyncio.Future
+
+
+class BatchRunner:
+    """Collects chat completion requests into Batch API jobs.
+
+    Callers await `submit` as if it were a regular completion. Requests are
+    gathered until none arrive for `linger_seconds` (or `max_requests` are
+    waiting), then written to a JSONL file, submitted and polled every
+    `poll_interval` seconds. Results are parsed back into each caller's
+    response format.
+    """
+
+    def __init__(
+        self,
+        backend: BatchBackend,
+        base_dir: str = OPENAI_BATCH_DIR,
+        linger_seconds: float = OPENAI_BATCH_LINGER,
+        max_requests: int = OPENAI_BATCH_MAX_REQUESTS,
+        poll_interval: float = OPENAI_BATCH_POLL_INTERVAL,
+    ):
+        self.backend = backend
+        self.base_dir = base_dir
+        self.linger_seconds = linger_seconds
+        self.max_requests = max_requests
+        self.poll_interval = poll_interval
+        self.batches_submitted = 0
+        self._pending: list[_PendingRequest] = []
+        self._linger_handle: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task] = set()
+        self._next_id = 0
+        self._next_batch = 0
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    async def submit(self, body: dict, response_format: type[T]) -> T | None:
+        """Queues one request and waits for its parsed result. Returns None if
+        the model refused to answer."""
+        self._next_id += 1
+        request = _PendingRequest(
+            custom_id=f"req-{self._next_id}",
+            body={
+                **body,
+                "response_format": get_response_format(response_format),
+            },
+            response_format=response_format,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._pending.append(request)
+        if len(self._pending) >= self.max_requests:
+            self.flush()
+        else:
+            self._schedule_flush()
+        return await request.future
+
+    def flush(self):
+        """Submits whatever is queued right away."""
+        if self._linger_handle is not None:
+            self._linger_handle.cancel()
+            self._linger_handle = None
+        if not self._pending:
+            return
+        requests, self._pending = self._pending, []
+        self._next_batch += 1
+        task = asyncio.create_task(self._run_batch(self._next_batch, requests))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def close(self):
+        self.flush()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def __aenter__(self) -> "BatchRunner":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _schedule_flush(self):
+        if self._linger_handle is not None:
+            self._linger_handle.cancel()
+        self._linger_handle = asyncio.get_running_loop().call_later(
+            self.linger_seconds, self.flush
+        )
+
+    async def _run_batch(self, number: int, requests: list[_PendingRequest]):
+        try:
+            input_path = await self._write_input(number, requests)
+            batch_id = await self.backend.submit(input_path)
+            self.batches_submitted += 1
+            await logger.async_info(
+                "Submitted batch %s with %d requests", batch_id, len(requests)
+            )
+            status = await self.backend.status(batch_id)
+            while status.status not in TERMINAL_STATUSES:
+                await asyncio.sleep(self.poll_interval)
+                status = await self.backend.status(batch_id)
+            await logger.async_info("Batch %s finished as %s", batch_id, status.status)
+            results = {}
+            for file_id in (status.output_file_id, status.error_file_id):
+                if file_id:
+                    results |= self._parse_output(await self.backend.read_file(file_id))
+        except asyncio.CancelledError:
+            for request in requests:
+                request.future.cancel()
+            raise
+        except Exception as e:
+            await logger.async_error(
+                "Batch of %d requests failed: %s", len(requests), e
+            )
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        for request in requests:
+            # The caller may have given up on it already
+            if request.future.done():
+                continue
+            try:
+                request.future.set_result(
+                    self._parse_result(request, results.get(request.custom_id))
+                )
+            except Exception as e:
+                request.future.set_exception(e)
+
+    async def _write_input(self, number: int, requests: list[_PendingRequest]) -> str:
+        now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = os.path.join(self.base_dir, f"{now}_{number}.input.jsonl")
+        async with aiofiles.open(path, mode="w") as f:
+            await f.write(
+                "".join(
+                    json.dumps(
+                        {
+                            "custom_id": request.custom_id,
+                            "method": "POST",
+                            "url": BATCH_ENDPOINT,
+                            "body": request.body,
+                        }
+                    )
+                    + "\n"
+                    for request in requests
+                )
+            )
+        return path
+
+    @staticmethod
+    def _parse_output(text: str) -> dict[str, dict]:
+        results = {}
+        for line in text.splitlines():
+            if line.strip():
+                result = json.loads(line)
+                results[result["custom_id"]] = result
+        return results
+
+    @staticmethod
+    def _parse_result(
+        request: _PendingRequest, result: dict | None
+    ) -> BaseModel | None:
+        if result is None:
+            raise BatchRequestError(f"No batch output for {request.custom_id}")
+        response = result.get("response")
+        if result.get("error") or not response or response["status_code"] != 200:
+            raise BatchRequestError(
+                f"Batch request {request.custom_id} failed: "
+                f"{result.get('error') or (response or {}).get('body')}"
+            )
+        message = response["body"]["choices"][0]["message"]
+        if message.get("refusal") or message.get("content") is None:
+            return None
+        return request.response_format.model_validate_json(message["content"])
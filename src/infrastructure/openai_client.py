@@ -1,11 +1,30 @@
-import base64
+import json
+import math
+import time
+from typing import TYPE_CHECKING, Callable, TypeVar
 
-import openai
 from pydantic import BaseModel
 
+from src.config import (
+    OPENAI_REQUESTS_PER_SECOND,
+    OPENAI_TOKENS_PER_MINUTE,
+    RATE_LIMIT_MAX_RETRIES,
+)
+from src.core.logger import get_logger
+from src.core.metrics import metrics
+from src.core.rate_limiter import RateLimiter, parse_retry_after
 from src.data.value_objects import Recommendation, Sentiment
+from src.infrastructure.cassette import Cassette, CassetteMissError
+from src.infrastructure.chart_renderer import ChartImage
+from src.infrastructure.llm_cache import LLMResponseCache
+from src.infrastructure.openai_batch import BatchRunner
 
-from ..config import OPENAI_API_KEY
+from ..config import OPENAI_API_KEY, OPENAI_BASE_URL
+
+if TYPE_CHECKING:
+    import openai
+
+logger = get_logger(__name__)
 
 SENTIMENT_BASE_PROMPT = """You are an AI trained in financial market analysis with expertise in sentiment evaluation. Your task is to analyze the sentiment surrounding a given asset (stock) based on recent news, market trends, and provided data. Consider the following in your analysis:
 
@@ -30,6 +49,16 @@ RECOMMENDATON_BASE_PROMPT = """You are an AI financial advisor with extensive kn
 Your recommendation should be clear, actionable, and tailored to the specific asset and strategy. Consider both potential risks and opportunities in your analysis. Provide a confidence level for your recommendation and explain the key factors influencing your decision. Your advice should be rational and supported by data-driven insights, not emotional or speculative."""
 
 
+T = TypeVar("T", bound=BaseModel)
+
+# Called with the fields of a structured response parsed so far
+PartialCallback = Callable[[dict], None]
+
+# Budgeted up front for each call and corrected once the real usage is known
+IMAGE_TOKEN_ESTIMATE = 1000
+COMPLETION_TOKEN_ESTIMATE = 500
+
+
 class SentimentResponse(BaseModel):
     sentiment: Sentiment
     confidence: float
@@ -65,44 +94,136 @@ class RecommendationResponse(BaseModel):
     exit: EntryExit
 
 
+class StrategyRecommendation(RecommendationResponse):
+    strategy: str
+
+
+class StrategyRecommendationsResponse(BaseModel):
+    recommendations: list[StrategyRecommendation]
+
+
 class OpenAIClient:
-    def __init__(self):
+    """Structured chat completions, optionally memoized by `response_cache`.
+
+    With a `batch_runner`, requests go through the Batch API instead of the
+    interactive endpoint: cheaper and higher throughput, but each call only
+    returns once its whole batch has finished.
+
+    Interactive calls share `rate_limiter`, which retries rate limited and
+    overloaded responses itself so it can adapt to them.
+
+    With a `cassette`, HTTP exchanges are recorded to it or replayed from it,
+    depending on its mode.
+
+    Calls given an `on_partial` callback stream the response and report the
+    fields parsed so far after every chunk. They return the same validated
+    object as the non-streaming call.
+    """
+
+    def __init__(
+        self,
+        response_cache: LLMResponseCache | None = None,
+        batch_runner: BatchRunner | None = None,
+        rate_limiter: RateLimiter | None = None,
+        max_retries: int = RATE_LIMIT_MAX_RETRIES,
+        base_url: str | None = OPENAI_BASE_URL,
+        api_key: str = OPENAI_API_KEY,
+        cassette: Cassette | None = None,
+    ):
         self.model = "gpt-4o-2024-08-06"
-        self.client = openai.AsyncOpenAI(
-            api_key=OPENAI_API_KEY,
-            max_retries=3,
+        self.base_url = base_url
+        self.api_key = api_key
+        self.cassette = cassette
+        self._client: "openai.AsyncOpenAI | None" = None
+        self.response_cache = response_cache
+        self.batch_runner = batch_runner
+        self.rate_limiter = rate_limiter or RateLimiter(
+            "openai", OPENAI_REQUESTS_PER_SECOND, OPENAI_TOKENS_PER_MINUTE
         )
+        self.max_retries = max_retries
+
+    @property
+    def client(self) -> "openai.AsyncOpenAI":
+        # Built on first use; importing the SDK costs more than a run that is
+        # served entirely from the response cache
+        if self._client is None:
+            import openai
+
+            http_client = None
+            if self.cassette is not None:
+                from src.infrastructure.cassette_transport import CassetteTransport
+
+                http_client = openai.DefaultAsyncHttpxClient(
+                    transport=CassetteTransport(self.cassette)
+                )
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,
+                http_client=http_client,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def __aenter__(self) -> "OpenAIClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
 
     async def get_sentiment(self, prompt: str) -> SentimentResponse | None:
-        response = await self.client.beta.chat.completions.parse(
-            model=self.model,
-            messages=[
+        key = self._get_cache_key(SENTIMENT_BASE_PROMPT, prompt)
+        cached = await self._get_cached(key, SentimentResponse)
+        if cached is not None:
+            return cached
+
+        parsed = await self._complete(
+            [
                 {"role": "system", "content": SENTIMENT_BASE_PROMPT},
                 {"role": "user", "content": prompt},
             ],
-            response_format=SentimentResponse,
+            SentimentResponse,
         )
-        return response.choices[0].message.parsed
+        await self._put_cached(key, parsed)
+        return parsed
 
     async def get_recommendation(
-        self, prompt: str, image_path: str
+        self,
+        prompt: str,
+        image: ChartImage,
+        on_partial: PartialCallback | None = None,
     ) -> RecommendationResponse | None:
-        mime_types = {
-            "png": "image/png",
-            "jpg": "image/jpeg",
-            "jpeg": "image/jpeg",
-            "gif": "image/gif",
-            "webp": "image/webp",
-        }
-        file_extension = image_path.split(".")[-1].lower()
-        mime_type = mime_types.get(file_extension, "application/octet-stream")
+        return await self._recommend(
+            prompt, image, RecommendationResponse, on_partial=on_partial
+        )
 
-        with open(image_path, "rb") as img_file:
-            img_b64_str = base64.b64encode(img_file.read()).decode("utf-8")
+    async def get_strategy_recommendations(
+        self, prompt: str, image: ChartImage
+    ) -> StrategyRecommendationsResponse | None:
+        """One recommendation per strategy described in `prompt`, from a
+        single call that sends the chart only once."""
+        return await self._recommend(prompt, image, StrategyRecommendationsResponse)
 
-        response = await self.client.beta.chat.completions.parse(
-            model=self.model,
-            messages=[
+    async def _recommend(
+        self,
+        prompt: str,
+        image: ChartImage,
+        response_format: type[T],
+        on_partial: PartialCallback | None = None,
+    ) -> T | None:
+        key = self._get_cache_key(RECOMMENDATON_BASE_PROMPT, prompt, image.digest)
+        cached = await self._get_cached(key, response_format)
+        if cached is not None:
+            if on_partial is not None:
+                on_partial(cached.model_dump(mode="json"))
+            return cached
+
+        parsed = await self._complete(
+            [
                 {"role": "system", "content": RECOMMENDATON_BASE_PROMPT},
                 {
                     "role": "user",
@@ -110,13 +231,178 @@ class OpenAIClient:
                         {"type": "text", "text": prompt},
                         {
                             "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{img_b64_str}"
-                            },
+                            "image_url": {"url": image.data_url},
                         },
                     ],
                 },
             ],
-            response_format=RecommendationResponse,
+            response_format,
+            on_partial=on_partial,
+        )
+        await self._put_cached(key, parsed)
+        return parsed
+
+    async def _complete(
+        self,
+        messages: list[dict],
+        response_format: type[T],
+        on_partial: PartialCallback | None = None,
+    ) -> T | None:
+        if self.batch_runner is not None:
+            return await self.batch_runner.submit(
+                {"model": self.model, "messages": messages}, response_format
+            )
+        import openai
+
+        call = response_format.__name__
+        estimated = self._estimate_tokens(messages)
+        metrics.observe(
+            "payload_bytes", self._payload_size(messages), span="openai", payload=call
         )
-        return response.choices[0].message.parsed
+        # Replayed calls never reach the API, so they don't spend its quota
+        replaying = self.cassette is not None and self.cassette.replaying
+        for attempt in range(self.max_retries + 1):
+            if not replaying:
+                await self.rate_limiter.acquire(tokens=estimated)
+            try:
+                with metrics.span(f"openai.{call}"):
+                    if on_partial is None:
+                        response = await self.client.beta.chat.completions.parse(
+                            model=self.model,
+                            messages=messages,
+                            response_format=response_format,
+                        )
+                    else:
+                        response = await self._stream(
+                            messages, response_format, on_partial
+                        )
+            except (openai.RateLimitError, openai.InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = parse_retry_after(e.response.headers)
+                self.rate_limiter.on_rate_limited(retry_after)
+                await logger.async_warning(
+                    "OpenAI returned %s, retrying (attempt %d, retry after %s)",
+                    e.status_code,
+                    attempt + 1,
+                    retry_after,
+                )
+                continue
+            except openai.APIConnectionError as e:
+                # The SDK wraps transport errors; a replay miss won't go away
+                if isinstance(e.__cause__, CassetteMissError):
+                    raise e.__cause__
+                if attempt == self.max_retries:
+                    raise
+                self.rate_limiter.on_rate_limited()
+                await logger.async_warning("OpenAI connection failed, retrying: %s", e)
+                continue
+            self.rate_limiter.on_success()
+            if response.usage is not None:
+                self.rate_limiter.record_usage(estimated, response.usage.total_tokens)
+                self._record_usage(call, response.usage)
+            return response.choices[0].message.parsed
+
+    async def _stream(
+        self,
+        messages: list[dict],
+        response_format: type[T],
+        on_partial: PartialCallback,
+    ) -> "openai.types.chat.ParsedChatCompletion[T]":
+        started = time.perf_counter()
+        first_chunk = True
+        async with self.client.beta.chat.completions.stream(
+            model=self.model,
+            messages=messages,
+            response_format=response_format,
+            stream_options={"include_usage": True},
+        ) as stream:
+            async for event in stream:
+                if event.type != "content.delta" or event.parsed is None:
+                    continue
+                if first_chunk:
+                    first_chunk = False
+                    metrics.observe(
+                        "openai_first_chunk_seconds",
+                        time.perf_counter() - started,
+                        call=response_format.__name__,
+                    )
+                on_partial(event.parsed)
+            return await stream.get_final_completion()
+
+    @staticmethod
+    def _record_usage(call: str, usage):
+        # The pinned SDK doesn't model prompt_tokens_details yet, so it arrives
+        # as an extra field
+        details = getattr(usage, "prompt_tokens_details", None) or {}
+        if not isinstance(details, dict):
+            details = details.model_dump()
+        cached = details.get("cached_tokens") or 0
+        for kind, tokens in (
+            ("prompt", usage.prompt_tokens),
+            ("completion", usage.completion_tokens),
+            ("cached", cached),
+        ):
+            metrics.increment("openai_tokens", tokens, call=call, kind=kind)
+        # Share of the prompt served from the provider's prefix cache
+        if usage.prompt_tokens:
+            ratio = cached / usage.prompt_tokens
+            metrics.observe("openai_cached_token_ratio", ratio, call=call)
+            logger.debug(
+                "%s used %d prompt tokens, %.0f%% cached",
+                call,
+                usage.prompt_tokens,
+                ratio * 100,
+            )
+
+    @staticmethod
+    def _payload_size(messages: list[dict]) -> int:
+        size = 0
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                size += len(content)
+                continue
+            for part in content:
+                if part["type"] == "image_url":
+                    size += len(part["image_url"]["url"])
+                else:
+                    size += len(part["text"])
+        return size
+
+    @staticmethod
+    def _estimate_tokens(messages: list[dict]) -> int:
+        text = 0
+        images = 0
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                text += len(content)
+                continue
+            for part in content:
+                if part["type"] == "image_url":
+                    images += 1
+                else:
+                    text += len(json.dumps(part))
+        return (
+            math.ceil(text / 4)
+            + images * IMAGE_TOKEN_ESTIMATE
+            + COMPLETION_TOKEN_ESTIMATE
+        )
+
+    def _get_cache_key(
+        self, system_prompt: str, prompt: str, image_digest: str | None = None
+    ) -> str:
+        return LLMResponseCache.make_key(
+            self.model, system_prompt, prompt, image_digest
+        )
+
+    async def _get_cached(self, key: str, model: type[T]) -> T | None:
+        if self.response_cache is None:
+            return None
+        cached = await self.response_cache.get(key)
+        return None if cached is None else model.model_validate(cached)
+
+    async def _put_cached(self, key: str, parsed: BaseModel | None):
+        if self.response_cache is not None and parsed is not None:
+            await self.response_cache.put(key, parsed.model_dump(mode="json"))
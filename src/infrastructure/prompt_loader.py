@@ -1,12 +1,60 @@
 import aiofiles
 import os
+from functools import cached_property
+from string import Formatter
+
+from src.core.logger import get_logger, log_async
+
+logger = get_logger(__name__)
+
+
+class PromptTemplate:
+    """A `str.format` template split into literal text and fields the first
+    time it is formatted, so formatting it again is a single join."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @cached_property
+    def parts(self) -> list[tuple[str, str | None]]:
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(self.text):
+            if spec or conversion or (field is not None and not field.isidentifier()):
+                raise ValueError(f"Only plain {{name}} fields are supported: {field}")
+            parts.append((literal, field))
+        return parts
+
+    @property
+    def fields(self) -> set[str]:
+        return {field for _, field in self.parts if field is not None}
+
+    def format(self, **values) -> str:
+        return "".join(
+            literal if field is None else literal + str(values[field])
+            for literal, field in self.parts
+        )
 
 
 class PromptLoader:
+    """Serves prompt files from memory, re-reading one only when its mtime
+    changes, so edits are picked up without a restart."""
+
     def __init__(self, base_dir: str):
         self.base_dir = base_dir
+        self._templates: dict[str, tuple[int, PromptTemplate]] = {}
 
+    @log_async("DEBUG")
     async def load_prompt(self, filename: str, subdir: str = "") -> str:
+        return (await self.load_template(filename, subdir)).text
+
+    async def load_template(self, filename: str, subdir: str = "") -> PromptTemplate:
         path = os.path.join(self.base_dir, subdir, filename)
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._templates.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        await logger.async_debug("Loading prompt template %s", path)
         async with aiofiles.open(path, mode="r") as file:
-            return await file.read()
+            template = PromptTemplate(await file.read())
+        self._templates[path] = (mtime, template)
+        return template
@@ -0,0 +1,113 @@
+import asyncio
+import re
+
+import aiohttp
+from aiohttp import web
+
+from src.application.pipeline import PipelineResult
+from src.application.recommendation_service import (
+    RecommendationService,
+    UnknownStrategyError,
+)
+from src.core.logger import get_logger
+from src.core.metrics import metrics
+from src.data.entities import TimeFrame
+from src.data.value_objects import Asset, AssetType, TimeRange
+from src.infrastructure.cassette import CassetteMissError
+
+logger = get_logger(__name__)
+
+# Tickers like TSLA, BRK-B, ^GSPC or EURUSD=X. Symbols end up in upstream URLs
+# and file paths, so nothing else gets through, and `.` can't lead
+SYMBOL_PATTERN = re.compile(r"[A-Z0-9^][A-Z0-9.\-^=]{0,14}")
+
+SERVICE_KEY = web.AppKey("service", RecommendationService)
+
+
+def create_app(service: RecommendationService) -> web.Application:
+    """JSON API over `service`:
+
+    GET  /health
+    GET  /strategies
+    POST /recommendations  {"symbol", "strategy", "range", "interval",
+                            "asset_type"}
+    GET  /metrics          (Prometheus text format)
+    """
+    app = web.Application()
+    app[SERVICE_KEY] = service
+    app.router.add_get("/health", health)
+    app.router.add_get("/strategies", list_strategies)
+    app.router.add_post("/recommendations", recommend)
+    app.router.add_get("/metrics", get_metrics)
+    return app
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+async def list_strategies(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    return web.json_response({"strategies": sorted(service.strategies)})
+
+
+async def recommend(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    try:
+        body = await request.json()
+        asset = Asset(
+            _parse_symbol(body["symbol"]), AssetType(body.get("asset_type", "stock"))
+        )
+        time_frame = TimeFrame(
+            time_range=TimeRange(body.get("range", TimeRange.MONTH_1.value)),
+            time_interval=TimeRange(body.get("interval", TimeRange.DAY_1.value)),
+        )
+        strategy = body["strategy"]
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return _error(400, f"Invalid request: {e!r}")
+
+    try:
+        result = await service.recommend(asset, strategy, time_frame)
+    except UnknownStrategyError as e:
+        return _error(404, str(e))
+    except (
+        ValueError,
+        NotImplementedError,
+        KeyError,
+        aiohttp.ClientError,
+        asyncio.TimeoutError,
+        CassetteMissError,
+    ) as e:
+        # Upstream data or the model could not produce a recommendation
+        await logger.async_warning("Recommendation for %s failed: %r", asset.symbol, e)
+        return _error(502, str(e) or type(e).__name__)
+    return web.json_response(_to_json(asset, strategy, time_frame, result))
+
+
+async def get_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+
+def _parse_symbol(symbol: str) -> str:
+    symbol = symbol.strip().upper()
+    if not SYMBOL_PATTERN.fullmatch(symbol):
+        raise ValueError(f"Invalid symbol: {symbol!r}")
+    return symbol
+
+
+def _to_json(
+    asset: Asset, strategy: str, time_frame: TimeFrame, result: PipelineResult
+) -> dict:
+    return {
+        "asset": asset.to_dict(),
+        "strategy": strategy,
+        "range": time_frame.time_range.value,
+        "interval": time_frame.time_interval.value,
+        "sentiment": result.sentiment.to_dict(),
+        "recommendation": result.recommendation.model_dump(mode="json"),
+        "durations": result.durations,
+    }
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({"error": message}, status=status)
@@ -1,8 +1,12 @@
+from contextlib import ExitStack
+
 from rich import box
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
 
+from src.core.logger import log_to_console
 from src.data.entities import TimeFrame
 from src.data.repository.trading_strategy import TradingStrategy
 from src.data.value_objects import Asset
@@ -11,6 +15,9 @@ from src.infrastructure.openai_client import (
     SentimentResponse,
 )
 
+# Shown for fields that haven't been generated yet
+PENDING = "[dim]...[/dim]"
+
 
 def pretty_print_recommendation(
     asset: Asset,
@@ -19,8 +26,75 @@ def pretty_print_recommendation(
     sentiment: SentimentResponse,
     rec_res: RecommendationResponse,
 ):
-    console = Console()
+    Console().print(
+        build_recommendation_view(
+            asset, time_frame, strategy, sentiment, rec_res.model_dump(mode="json")
+        )
+    )
+
+
+class LiveRecommendationView:
+    """Redraws the recommendation in place while it streams in.
+
+    Pass `update` as the pipeline's `on_partial` callback; fields that
+    haven't arrived yet are shown as pending. `finish` draws the validated
+    response, which leaves the same output as `pretty_print_recommendation`.
+    Log records printed while the view is shown scroll above it.
+    """
+
+    def __init__(
+        self,
+        asset: Asset,
+        time_frame: TimeFrame,
+        strategy: TradingStrategy,
+        console: Console | None = None,
+    ):
+        self.asset = asset
+        self.time_frame = time_frame
+        self.strategy = strategy
+        self.sentiment: SentimentResponse | None = None
+        self.recommendation: dict = {}
+        self._live = Live(
+            self._render(), console=console or Console(), refresh_per_second=10
+        )
+        self._exit_stack = ExitStack()
+
+    def __enter__(self) -> "LiveRecommendationView":
+        self._exit_stack.enter_context(log_to_console(self._live.console))
+        self._live.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._live.stop()
+        self._exit_stack.close()
+
+    def update(self, partial: dict):
+        self.recommendation = partial
+        self._live.update(self._render())
+
+    def finish(self, sentiment: SentimentResponse, rec_res: RecommendationResponse):
+        self.sentiment = sentiment
+        self.recommendation = rec_res.model_dump(mode="json")
+        self._live.update(self._render(), refresh=True)
+
+    def _render(self) -> Group:
+        return build_recommendation_view(
+            self.asset,
+            self.time_frame,
+            self.strategy,
+            self.sentiment,
+            self.recommendation,
+        )
 
+
+def build_recommendation_view(
+    asset: Asset,
+    time_frame: TimeFrame,
+    strategy: TradingStrategy,
+    sentiment: SentimentResponse | None,
+    rec: dict,
+) -> Group:
+    """Lays out a recommendation given as a JSON dict, which may be partial."""
     # Main panel
     main_panel = Panel(
         f"[bold cyan]Trading Recommendation for {asset.symbol}[/bold cyan]\n"
@@ -34,13 +108,17 @@ def pretty_print_recommendation(
     sentiment_table = Table(title="Sentiment Analysis", box=box.ROUNDED)
     sentiment_table.add_column("Metric", style="cyan")
     sentiment_table.add_column("Value", style="green")
-    sentiment_table.add_row("Sentiment", sentiment.sentiment.value)
-    sentiment_table.add_row("Confidence", f"{sentiment.confidence:.2f}")
-    sentiment_table.add_row("Intent", sentiment.intent)
+    if sentiment is None:
+        sentiment_table.add_row("Sentiment", PENDING)
+    else:
+        sentiment_table.add_row("Sentiment", sentiment.sentiment.value)
+        sentiment_table.add_row("Confidence", f"{sentiment.confidence:.2f}")
+        sentiment_table.add_row("Intent", sentiment.intent)
 
     # Recommendation table
+    decision = rec.get("recommendation")
     rec_color = {"BUY": "green", "SELL": "red", "HOLD": "yellow"}.get(
-        rec_res.recommendation.value.upper(), "white"
+        str(decision).upper(), "white"
     )
 
     rec_table = Table(title="Recommendation", box=box.ROUNDED)
@@ -48,32 +126,46 @@ def pretty_print_recommendation(
     rec_table.add_column("Value", style="green")
     rec_table.add_row(
         "Decision",
-        f"[bold {rec_color}]{rec_res.recommendation.value}[/bold {rec_color}]",
+        (
+            PENDING
+            if decision is None
+            else f"[bold {rec_color}]{decision}[/bold {rec_color}]"
+        ),
     )
-    rec_table.add_row("Confidence", f"{rec_res.confidence:.2f}")
-    rec_table.add_row("Intent", rec_res.intent)
-    rec_table.add_row("Pattern", rec_res.pattern)
-    rec_table.add_row("Position", rec_res.position)
+    rec_table.add_row("Confidence", _number(rec.get("confidence")))
+    rec_table.add_row("Intent", _text(rec.get("intent")))
+    rec_table.add_row("Pattern", _text(rec.get("pattern")))
+    rec_table.add_row("Position", _text(rec.get("position")))
 
     # Support and Resistance table
+    sr = rec.get("support_and_resistance") or {}
     sr_table = Table(title="Support and Resistance", box=box.ROUNDED)
     sr_table.add_column("Metric", style="cyan")
     sr_table.add_column("Value", style="green")
-    sr_table.add_row("Support", f"${rec_res.support_and_resistance.support:.2f}")
-    sr_table.add_row("Resistance", f"${rec_res.support_and_resistance.resistance:.2f}")
-    sr_table.add_row("Ratio", f"{rec_res.support_and_resistance.ratio:.2f}")
+    sr_table.add_row("Support", _number(sr.get("support"), "${:.2f}"))
+    sr_table.add_row("Resistance", _number(sr.get("resistance"), "${:.2f}"))
+    sr_table.add_row("Ratio", _number(sr.get("ratio")))
 
     # Entry and Exit table
+    entry = rec.get("entry") or {}
+    exit_ = rec.get("exit") or {}
     ee_table = Table(title="Entry and Exit Points", box=box.ROUNDED)
     ee_table.add_column("Point", style="cyan")
     ee_table.add_column("Price", style="green")
     ee_table.add_column("Time", style="yellow")
-    ee_table.add_row("Entry", f"${rec_res.entry.price:.2f}", rec_res.entry.time)
-    ee_table.add_row("Exit", f"${rec_res.exit.price:.2f}", rec_res.exit.time)
-
-    # Print everything
-    console.print(main_panel)
-    console.print(sentiment_table)
-    console.print(rec_table)
-    console.print(sr_table)
-    console.print(ee_table)
+    ee_table.add_row(
+        "Entry", _number(entry.get("price"), "${:.2f}"), _text(entry.get("time"))
+    )
+    ee_table.add_row(
+        "Exit", _number(exit_.get("price"), "${:.2f}"), _text(exit_.get("time"))
+    )
+
+    return Group(main_panel, sentiment_table, rec_table, sr_table, ee_table)
+
+
+def _number(value: float | None, fmt: str = "{:.2f}") -> str:
+    return PENDING if value is None else fmt.format(value)
+
+
+def _text(value: str | None) -> str:
+    return PENDING if value is None else value
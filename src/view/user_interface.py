@@ -1,13 +1,13 @@
 from typing import Tuple
 
-import questionary
-
 from src.data.entities import TimeFrame
 from src.data.repository.trading_strategy import TradingStrategy
 from src.data.value_objects import Asset, TimeRange
 
 
 class UserInterface:
+    # questionary (and prompt_toolkit) are imported by the prompts themselves,
+    # so non-interactive runs never pay for them
     def __init__(self, assets: list[Asset], strategies: list[TradingStrategy]):
         self.assets = assets
         self.strategies = strategies
@@ -30,6 +30,8 @@ class UserInterface:
             exit()
 
     async def _get_asset(self) -> Asset:
+        import questionary
+
         asset_choices = [
             questionary.Choice(title=asset.symbol, value=asset) for asset in self.assets
         ]
@@ -39,6 +41,8 @@ class UserInterface:
         return result
 
     async def _get_time_range(self) -> TimeRange:
+        import questionary
+
         time_range_choices = [
             questionary.Choice(title=tr.value, value=tr) for tr in TimeRange
         ]
@@ -48,6 +52,8 @@ class UserInterface:
         return result
 
     async def _get_time_interval(self) -> TimeRange:
+        import questionary
+
         time_interval_choices = [
             questionary.Choice(title=tr.value, value=tr) for tr in TimeRange
         ]
@@ -57,6 +63,8 @@ class UserInterface:
         return result
 
     async def _get_strategy(self) -> TradingStrategy:
+        import questionary
+
         strategy_choices = [
             questionary.Choice(title=strategy.name, value=strategy)
             for strategy in self.strategies
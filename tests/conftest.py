@@ -0,0 +1,9 @@
+import pytest
+
+from src.core.logger import set_log_file
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_file(tmp_path_factory):
+    """Keeps the log file of test runs out of the working tree."""
+    set_log_file(str(tmp_path_factory.mktemp("logs") / "test.log"))
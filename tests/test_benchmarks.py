@@ -0,0 +1,65 @@
+import asyncio
+
+from benchmarks.fake_upstreams import FakeUpstreams, chart_for_symbol
+from benchmarks.run import bench_pipeline, compare_to_baseline
+from src.core.rate_limiter import RateLimiter
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetDataFetcher
+from src.data.value_objects import Asset, AssetType, TimeRange
+
+
+def test_compare_to_baseline_flags_regressions_only():
+    baseline = {"pipeline.10_symbols": 2.0, "micro.render_chart": 0.1}
+    results = {
+        "pipeline.10_symbols": 2.4,
+        "micro.render_chart": 0.2,
+        "micro.new_benchmark": 1.0,
+    }
+
+    regressions = compare_to_baseline(results, baseline, tolerance=0.25)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("micro.render_chart")
+
+
+def test_fake_charts_differ_per_symbol():
+    async def run():
+        async with FakeUpstreams() as upstreams:
+            async with AssetDataFetcher(
+                base_url=upstreams.yh_base_url,
+                rate_limiter=RateLimiter("yh", 1000),
+            ) as fetcher:
+                time_frame = TimeFrame(TimeRange.DAY_1, TimeRange.MINS_15)
+                return [
+                    await fetcher.fetch_stock_data(
+                        Asset(symbol, AssetType.STOCK), time_frame
+                    )
+                    for symbol in ("AAA", "BBB")
+                ]
+
+    first, second = asyncio.run(run())
+    assert first.info.meta.symbol == "AAA"
+    assert first.info.bars.timestamp.tolist() == second.info.bars.timestamp.tolist()
+    assert first.info.bars != second.info.bars
+
+
+def test_chart_for_symbol_keeps_gaps():
+    info = {
+        "meta": {"symbol": "X"},
+        "timestamp": [1, 2],
+        "indicators": {
+            "quote": [{"close": [1.0, None], "volume": [10, None]}],
+        },
+    }
+
+    quote = chart_for_symbol(info, "Y")["indicators"]["quote"][0]
+
+    assert quote["close"][1] is None
+    assert quote["volume"] == [10, None]
+
+
+def test_pipeline_benchmark_runs_end_to_end(tmp_path):
+    elapsed = asyncio.run(bench_pipeline(2, str(tmp_path), 0, 0, 4))
+
+    assert elapsed > 0
+    assert len(list((tmp_path / "recommendations").rglob("*.json"))) == 2
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_upstreams import FakeUpstreams
+from src.core.rate_limiter import RateLimiter
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetDataFetcher
+from src.data.value_objects import Asset, AssetType, TimeRange
+from src.infrastructure.cassette import (
+    Cassette,
+    CassetteMissError,
+    CassetteMode,
+    RecordedResponse,
+)
+from src.infrastructure.openai_client import OpenAIClient
+
+TIME_FRAME = TimeFrame(TimeRange.DAY_5, TimeRange.MINS_30)
+ASSET = Asset("TSLA", AssetType.STOCK)
+
+
+async def fetch_and_ask(cassette: Cassette, yh_base_url: str, openai_base_url: str):
+    async with (
+        AssetDataFetcher(
+            base_url=yh_base_url,
+            rate_limiter=RateLimiter("yh", 1000),
+            cassette=cassette,
+        ) as fetcher,
+        OpenAIClient(
+            base_url=openai_base_url,
+            api_key="test",
+            rate_limiter=RateLimiter("openai", 1000),
+            max_retries=0,
+            cassette=cassette,
+        ) as client,
+    ):
+        data = await fetcher.fetch_stock_data(ASSET, TIME_FRAME)
+        sentiment = await client.get_sentiment("How is TSLA doing on 2024-10-04?")
+    return data, sentiment
+
+
+def test_replay_serves_recorded_responses_without_upstreams(tmp_path):
+    async def run():
+        async with FakeUpstreams() as upstreams:
+            urls = (upstreams.yh_base_url, upstreams.openai_base_url)
+            recorded = await fetch_and_ask(
+                Cassette(CassetteMode.RECORD, base_dir=str(tmp_path)), *urls
+            )
+        # The fake servers are gone; replay must not need them
+        cassette = Cassette(CassetteMode.REPLAY, base_dir=str(tmp_path))
+        replayed = await fetch_and_ask(cassette, *urls)
+        return recorded, replayed, cassette
+
+    recorded, replayed, cassette = asyncio.run(run())
+
+    assert replayed[0].info == recorded[0].info
+    assert replayed[1] == recorded[1]
+    assert cassette.hits == 2
+
+
+def test_replay_miss_raises(tmp_path):
+    cassette = Cassette(CassetteMode.REPLAY, base_dir=str(tmp_path))
+
+    with pytest.raises(CassetteMissError):
+        asyncio.run(
+            fetch_and_ask(cassette, "http://127.0.0.1:9", "http://127.0.0.1:9/v1")
+        )
+
+
+def test_keys_are_normalized(tmp_path):
+    cassette = Cassette(CassetteMode.RECORD, base_dir=str(tmp_path))
+
+    assert cassette.make_key("get", "http://x/a?b=1&a=2") == cassette.make_key(
+        "GET", "http://X/a?a=2&b=1"
+    )
+    assert cassette.make_key("POST", "http://x", b'{"a": 1, "b": 2}') == (
+        cassette.make_key("POST", "http://x", b'{"b":2,"a":1}')
+    )
+    assert cassette.make_key(
+        "POST", "http://x", b'{"prompt": "news on 2024-10-04"}'
+    ) == cassette.make_key("POST", "http://x", b'{"prompt": "news on 2025-01-31"}')
+    assert cassette.make_key("POST", "http://x", b'{"a": 1}') != cassette.make_key(
+        "POST", "http://x", b'{"a": 2}'
+    )
+
+
+def test_rate_limited_responses_are_not_recorded(tmp_path):
+    cassette = Cassette(CassetteMode.RECORD, base_dir=str(tmp_path))
+
+    async def run():
+        await cassette.record("GET", "http://x/a", None, RecordedResponse(429))
+        await cassette.record("GET", "http://x/b", None, RecordedResponse(200))
+
+    asyncio.run(run())
+
+    assert cassette.recorded == 1
@@ -0,0 +1,138 @@
+import asyncio
+import dataclasses
+
+import pytest
+
+from src.application.recommendation_engine import RecommendationEngine
+from src.data.external.fetcher import AssetData
+from src.data.repository.asset_data import AssetImageRepository
+from src.data.value_objects import TimeRange
+from src.infrastructure.chart_renderer import (
+    ChartRenderer,
+    EmptyChartError,
+    render_candlestick_chart,
+)
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture
+def asset_data():
+    with open("repository/asset_data/TSLA/2024-10-03_10-50-50.json") as f:
+        return AssetData.model_validate_json(f.read())
+
+
+def test_render_many_renders_in_worker_processes(asset_data):
+    requests = [
+        AssetImageRepository(asset_data).build_chart_request(time_range)
+        for time_range in (TimeRange.DAY_1, TimeRange.HOURS_4)
+    ]
+
+    async def run():
+        async with ChartRenderer(max_workers=1, persist_dir=None) as renderer:
+            return await renderer.render_many(requests)
+
+    images = asyncio.run(run())
+
+    assert [i.time_range for i in images] == [TimeRange.DAY_1, TimeRange.HOURS_4]
+    for image in images:
+        assert image.png.startswith(PNG_MAGIC)
+        assert image.data_url.startswith("data:image/png;base64,")
+
+
+def test_identical_requests_render_once(tmp_path, asset_data):
+    request = AssetImageRepository(asset_data).build_chart_request(TimeRange.DAY_1)
+    calls = []
+
+    class CountingRenderer(ChartRenderer):
+        async def _render(self, request, digest):
+            calls.append(digest)
+            return await super()._render(request, digest)
+
+    async def run():
+        async with CountingRenderer(
+            max_workers=1, persist_dir=str(tmp_path)
+        ) as renderer:
+            first = await asyncio.gather(*[renderer.render(request) for _ in range(3)])
+            second = await renderer.render(request)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(image is second for image in first)
+    persisted = list((tmp_path / "TSLA").iterdir())
+    assert len(persisted) == 1
+    assert persisted[0].read_bytes() == second.png
+
+
+def test_cancelling_the_first_caller_leaves_the_joiners_waiting(asset_data):
+    request = AssetImageRepository(asset_data).build_chart_request(TimeRange.DAY_1)
+
+    class SlowRenderer(ChartRenderer):
+        async def _render(self, request, digest):
+            await asyncio.sleep(0.01)
+            return digest
+
+    async def run():
+        renderer = SlowRenderer(persist_dir=None)
+        first = asyncio.ensure_future(renderer.render(request))
+        await asyncio.sleep(0)
+        joiner = asyncio.ensure_future(renderer.render(request))
+        await asyncio.sleep(0)
+        first.cancel()
+        return first, await joiner
+
+    first, image = asyncio.run(run())
+
+    assert first.cancelled()
+    assert image == request.digest()
+
+
+def test_digest_changes_with_data(asset_data):
+    request = AssetImageRepository(asset_data).build_chart_request(TimeRange.DAY_1)
+    changed = dataclasses.replace(request, close=request.close + 1)
+    assert request.digest() != changed.digest()
+    assert (
+        request.digest()
+        != dataclasses.replace(request, time_range=TimeRange.DAY_5).digest()
+    )
+
+
+def test_empty_bars_raise_a_domain_error(asset_data):
+    bars = asset_data.info.bars
+    empty = asset_data.model_copy(
+        update={"info": asset_data.info.model_copy(update={"bars": bars.slice(0, 0)})}
+    )
+    request = AssetImageRepository(empty).build_chart_request(TimeRange.DAY_1)
+    renderer = ChartRenderer(max_workers=1, persist_dir=None)
+
+    with pytest.raises(EmptyChartError, match="TSLA"):
+        asyncio.run(renderer.render(request))
+    with pytest.raises(EmptyChartError):
+        render_candlestick_chart(request)
+    # Rejected before any worker was started
+    assert renderer._executor is None
+
+
+def test_engine_closes_only_the_renderer_it_created():
+    closed = []
+
+    class Renderer(ChartRenderer):
+        async def close(self):
+            closed.append(self)
+
+    injected = Renderer()
+
+    async def run():
+        async with RecommendationEngine(
+            None, None, None, None, None, chart_renderer=injected
+        ):
+            pass
+        async with RecommendationEngine(None, None, None, None, None) as engine:
+            engine.chart_renderer = owned = Renderer()
+        return owned
+
+    owned = asyncio.run(run())
+
+    assert closed == [owned]
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetDataFetcher
+from src.data.value_objects import Asset, AssetType, TimeRange
+
+TSLA = Asset("TSLA", AssetType.STOCK)
+TIME_FRAME = TimeFrame(TimeRange.DAY_1, TimeRange.MINS_15)
+
+
+class CountingFetcher(AssetDataFetcher):
+    def __init__(self, fail: bool = False):
+        super().__init__()
+        self.calls = 0
+        self.fail = fail
+
+    async def _request_stock_data(self, asset, time_frame):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"{asset.symbol}-{self.calls}"
+
+
+def test_concurrent_requests_are_coalesced():
+    async def run():
+        fetcher = CountingFetcher()
+        results = await asyncio.gather(
+            *[fetcher.fetch_stock_data(TSLA, TIME_FRAME) for _ in range(5)]
+        )
+        return fetcher, results
+
+    fetcher, results = asyncio.run(run())
+    assert fetcher.calls == 1
+    assert results == ["TSLA-1"] * 5
+
+
+def test_sequential_requests_are_not_coalesced():
+    async def run():
+        fetcher = CountingFetcher()
+        await fetcher.fetch_stock_data(TSLA, TIME_FRAME)
+        await fetcher.fetch_stock_data(TSLA, TIME_FRAME)
+        return fetcher
+
+    assert asyncio.run(run()).calls == 2
+
+
+def test_coalesced_failure_reaches_every_caller():
+    async def run():
+        fetcher = CountingFetcher(fail=True)
+        return fetcher, await asyncio.gather(
+            *[fetcher.fetch_stock_data(TSLA, TIME_FRAME) for _ in range(3)],
+            return_exceptions=True,
+        )
+
+    fetcher, results = asyncio.run(run())
+    assert fetcher.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert not fetcher._in_flight
+
+
+def test_cancelling_the_first_caller_leaves_the_joiners_waiting():
+    async def run():
+        fetcher = CountingFetcher()
+        first = asyncio.ensure_future(fetcher.fetch_stock_data(TSLA, TIME_FRAME))
+        await asyncio.sleep(0)
+        joiners = [
+            asyncio.ensure_future(fetcher.fetch_stock_data(TSLA, TIME_FRAME))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        first.cancel()
+        return fetcher, first, await asyncio.gather(*joiners)
+
+    fetcher, first, results = asyncio.run(run())
+    assert first.cancelled()
+    assert fetcher.calls == 1
+    assert results == ["TSLA-1"] * 2
+
+
+def test_close_releases_session():
+    async def run():
+        async with AssetDataFetcher() as fetcher:
+            session = fetcher._get_session()
+            assert fetcher._get_session() is session
+        return session
+
+    assert asyncio.run(run()).closed
+
+
+@pytest.mark.parametrize("limit", [1, 50])
+def test_connection_limits_are_configurable(limit):
+    async def run():
+        async with AssetDataFetcher(connection_limit=limit) as fetcher:
+            return fetcher._get_session().connector.limit
+
+    assert asyncio.run(run()) == limit
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import indicators
+from src.data.ohlcv import OhlcvSeries
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, 120))
+    high = close + rng.uniform(0, 2, 120)
+    low = close - rng.uniform(0, 2, 120)
+    volume = rng.uniform(1e5, 1e6, 120)
+    return high, low, close, volume
+
+
+def make_bars(high, low, close, volume) -> OhlcvSeries:
+    return OhlcvSeries(
+        timestamp=np.arange(len(close), dtype=np.int64),
+        open=close,
+        high=high,
+        low=low,
+        close=close,
+        volume=volume,
+    )
+
+
+def test_sma_and_ema_match_pandas(prices):
+    close = prices[2]
+    s = pd.Series(close)
+    np.testing.assert_allclose(
+        indicators.sma(close[None], 20)[0], s.rolling(20).mean(), equal_nan=True
+    )
+    np.testing.assert_allclose(
+        indicators.ema(close[None], 12)[0], s.ewm(span=12, adjust=False).mean()
+    )
+
+
+def test_rsi_and_atr_match_wilder_smoothing(prices):
+    high, low, close, _ = prices
+    delta = pd.Series(close).diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    expected_rsi = 100 - 100 / (1 + gain / loss)
+    np.testing.assert_allclose(
+        indicators.rsi(close[None])[0][1:], expected_rsi[1:], rtol=1e-10
+    )
+
+    prev_close = pd.Series(close).shift()
+    tr = pd.concat(
+        [
+            pd.Series(high - low),
+            (pd.Series(high) - prev_close).abs(),
+            (pd.Series(low) - prev_close).abs(),
+        ],
+        axis=1,
+    ).max(axis=1)
+    np.testing.assert_allclose(
+        indicators.atr(high[None], low[None], close[None])[0],
+        tr.ewm(alpha=1 / 14, adjust=False).mean(),
+    )
+
+
+def test_support_resistance_uses_last_window(prices):
+    high, low, _, _ = prices
+    support, resistance = indicators.support_resistance(low[None], high[None], 14)
+    assert support[0] == low[-14:].min()
+    assert resistance[0] == high[-14:].max()
+
+
+def test_volume_profile_conserves_volume(prices):
+    _, _, close, volume = prices
+    edges, profile = indicators.volume_profile(close[None], volume[None], bins=10)
+    assert edges.shape == (1, 11)
+    assert profile.sum() == pytest.approx(volume.sum())
+
+
+def test_batch_matches_single_symbol_runs(prices):
+    high, low, close, volume = prices
+    long_bars = make_bars(high, low, close, volume)
+    short_bars = make_bars(high[-60:], low[-60:], close[-60:], volume[-60:])
+
+    batch = indicators.compute_indicators({"LONG": long_bars, "SHORT": short_bars})
+
+    assert batch["LONG"] == indicators.compute_indicators({"LONG": long_bars})["LONG"]
+    assert batch["SHORT"] == (
+        indicators.compute_indicators({"SHORT": short_bars})["SHORT"]
+    )
+    assert batch["SHORT"].last_close == close[-1]
+
+
+def test_empty_series_yields_missing_values():
+    empty = make_bars(*[np.empty(0)] * 4)
+    snapshot = indicators.compute_indicators({"NONE": empty})["NONE"]
+    assert all(v is None for v in snapshot.to_dict().values())
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import pytest
+
+from src.data.value_objects import Sentiment
+from src.infrastructure.llm_cache import LLMResponseCache
+from src.infrastructure.openai_client import OpenAIClient, SentimentResponse
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_key_covers_every_input():
+    base = LLMResponseCache.make_key("m", "system", "user", "img")
+    assert base == LLMResponseCache.make_key("m", "system", "user", "img")
+    assert base != LLMResponseCache.make_key("m2", "system", "user", "img")
+    assert base != LLMResponseCache.make_key("m", "system2", "user", "img")
+    assert base != LLMResponseCache.make_key("m", "system", "user2", "img")
+    assert base != LLMResponseCache.make_key("m", "system", "user", None)
+
+
+def test_hits_misses_and_ttl(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path), ttl_seconds=60, clock=clock)
+
+    async def run():
+        assert await cache.get("k") is None
+        await cache.put("k", {"answer": 42})
+        assert await cache.get("k") == {"answer": 42}
+        clock.now += 61
+        assert await cache.get("k") is None
+
+    asyncio.run(run())
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_bypass_skips_reads_but_writes(tmp_path, clock):
+    async def run():
+        bypassing = LLMResponseCache(str(tmp_path), bypass=True, clock=clock)
+        await bypassing.put("k", {"answer": 1})
+        assert await bypassing.get("k") is None
+        return await LLMResponseCache(str(tmp_path), clock=clock).get("k")
+
+    assert asyncio.run(run()) == {"answer": 1}
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path), max_entries=10, clock=clock)
+
+    async def run():
+        for i in range(11):
+            await cache.put(f"{i:02d}key", {"i": i})
+            # Distinct mtimes so LRU order is well defined
+            time.sleep(0.01)
+        return [await cache.get(f"{i:02d}key") for i in range(11)]
+
+    results = asyncio.run(run())
+    assert cache.evictions == 2
+    assert results[:2] == [None, None]
+    assert all(r is not None for r in results[2:])
+
+
+def test_client_serves_repeated_prompts_from_cache(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path), clock=clock)
+    client = OpenAIClient(response_cache=cache)
+    calls = []
+
+    class FakeMessage:
+        parsed = SentimentResponse(
+            sentiment=Sentiment.POSITIVE, confidence=0.9, intent="fake"
+        )
+
+    class FakeChoice:
+        message = FakeMessage()
+
+    class FakeCompletion:
+        choices = [FakeChoice()]
+        usage = None
+
+    async def parse(**kwargs):
+        calls.append(kwargs)
+        return FakeCompletion()
+
+    client.client.beta.chat.completions.parse = parse
+
+    async def run():
+        return [await client.get_sentiment("same prompt") for _ in range(3)]
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [FakeMessage.parsed] * 3
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import sys
+
+from src.core.logger import (
+    LazyFileHandler,
+    Truncated,
+    TruncatingQueueHandler,
+    get_logger,
+    log_async,
+)
+
+
+def test_get_logger_is_cached():
+    first = get_logger("tests.cached")
+    second = get_logger("tests.cached")
+
+    assert first is second
+    assert len(first.handlers) == 1
+    assert isinstance(first.handlers[0], TruncatingQueueHandler)
+
+
+def test_log_async_does_not_add_handlers():
+    @log_async("DEBUG")
+    async def work():
+        return 42
+
+    logger = get_logger(__name__)
+    handlers = list(logger.handlers)
+
+    async def run():
+        return [await work() for _ in range(10)]
+
+    assert asyncio.run(run()) == [42] * 10
+    assert logger.handlers == handlers
+
+
+def test_long_messages_are_truncated():
+    handler = get_logger("tests.truncated").handlers[0]
+    record = logging.LogRecord(
+        "tests", logging.DEBUG, __file__, 1, "%s", ("x" * 10_000,), None
+    )
+
+    prepared = handler.prepare(record)
+
+    assert len(prepared.msg) < handler.max_length + 50
+    assert prepared.msg.endswith("chars truncated]")
+
+
+def test_truncated_payloads_are_formatted_lazily_and_bounded():
+    class Payload:
+        formatted = 0
+
+        def __repr__(self):
+            Payload.formatted += 1
+            return "payload"
+
+    logger = get_logger("tests.lazy")
+    logger.setLevel(logging.INFO)
+    logger.debug("Received %s", Truncated(Payload()))
+    assert Payload.formatted == 0
+
+    big = {"chart": {"result": [{"close": list(range(100_000))}]}}
+    assert len(str(Truncated(big))) < 200
+
+
+def test_log_file_is_created_on_first_record(tmp_path):
+    path = tmp_path / "nested" / "app.log"
+    handler = LazyFileHandler(str(path))
+    assert not path.exists()
+
+    handler.emit(
+        logging.LogRecord("tests", logging.INFO, __file__, 1, "first", None, None)
+    )
+    handler.set_path(str(tmp_path / "moved.log"))
+    handler.emit(
+        logging.LogRecord("tests", logging.INFO, __file__, 1, "second", None, None)
+    )
+    handler.close()
+
+    assert path.read_text() == "first\n"
+    assert (tmp_path / "moved.log").read_text() == "second\n"
+
+
+def test_messages_are_cut_before_formatting():
+    handler = get_logger("tests.cut").handlers[0]
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = logging.LogRecord(
+            "tests", logging.ERROR, __file__, 1, "%s", ("x" * 10_000,), sys.exc_info()
+        )
+
+    prepared = handler.prepare(record)
+
+    message, traceback = prepared.msg.split("\n", 1)
+    assert message.endswith("chars truncated]")
+    assert "RuntimeError: boom" in traceback
+    # The caller's record is left alone for any other handler
+    assert record.args == ("x" * 10_000,)
@@ -0,0 +1,181 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetData
+from src.data.repository.asset_data import AssetDataRepository
+from src.data.repository.market_data_cache import MarketDataCache, get_expiry
+from src.data.repository.ohlcv_store import OhlcvStore
+from src.data.value_objects import Asset, AssetType, TimeRange
+
+TSLA = Asset("TSLA", AssetType.STOCK)
+INTRADAY = TimeFrame(TimeRange.DAY_1, TimeRange.MINS_15)
+DAILY = TimeFrame(TimeRange.MONTH_1, TimeRange.DAY_1)
+
+# Regular session reported by the recorded payload
+SESSION_START = 1727962200
+SESSION_END = 1727985600
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def asset_data():
+    with open("repository/asset_data/TSLA/2024-10-03_10-50-50.json") as f:
+        return AssetData.model_validate_json(f.read())
+
+
+def fetched_at(data: AssetData, ts: float) -> AssetData:
+    return data.model_copy(update={"created_at": datetime.fromtimestamp(ts)})
+
+
+def make_repository(tmp_path) -> AssetDataRepository:
+    return AssetDataRepository(
+        base_dir=str(tmp_path / "asset_data"),
+        ohlcv_store=OhlcvStore(str(tmp_path / "ohlcv")),
+    )
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_expiry_before_open_waits_for_session(asset_data):
+    data = fetched_at(asset_data, SESSION_START - 3600)
+    assert get_expiry(data, TimeRange.MINS_15) == SESSION_START
+    assert get_expiry(data, TimeRange.DAY_1) == SESSION_START
+
+
+def test_expiry_during_session_follows_interval(asset_data):
+    data = fetched_at(asset_data, SESSION_START + 600)
+    assert get_expiry(data, TimeRange.MINS_15) == SESSION_START + 600 + 15 * 60
+    assert get_expiry(data, TimeRange.HOURS_1) == SESSION_START + 600 + 3600
+    assert get_expiry(data, TimeRange.DAY_1) == SESSION_END
+
+
+def test_expiry_after_close_waits_for_next_session(asset_data):
+    data = fetched_at(asset_data, SESSION_END + 60)
+    assert get_expiry(data, TimeRange.MINS_15) == SESSION_START + 86400
+
+
+def on_session(data: AssetData, start: int, end: int) -> AssetData:
+    meta = data.info.meta
+    period = meta.currentTradingPeriod
+    regular = period.regular.model_copy(update={"start": start, "end": end})
+    meta = meta.model_copy(
+        update={"currentTradingPeriod": period.model_copy(update={"regular": regular})}
+    )
+    return data.model_copy(update={"info": data.info.model_copy(update={"meta": meta})})
+
+
+def test_expiry_after_friday_close_waits_for_monday(asset_data):
+    # The recorded session is a Thursday
+    friday = on_session(asset_data, SESSION_START + DAY, SESSION_END + DAY)
+    monday_open = SESSION_START + 4 * DAY
+
+    evening = fetched_at(friday, SESSION_END + DAY + 60)
+    assert get_expiry(evening, TimeRange.MINS_15) == monday_open
+    assert get_expiry(evening, TimeRange.DAY_1) == monday_open
+    # Over the weekend Yahoo still reports Friday's session
+    sunday = fetched_at(friday, SESSION_END + 3 * DAY)
+    assert get_expiry(sunday, TimeRange.HOURS_1) == monday_open
+
+
+def test_weekend_requests_are_served_from_cache(tmp_path, asset_data):
+    friday = on_session(asset_data, SESSION_START + DAY, SESSION_END + DAY)
+    data = fetched_at(friday, SESSION_END + DAY + 60)
+    clock = FakeClock(SESSION_END + 2 * DAY)
+    cache = MarketDataCache(make_repository(tmp_path), clock=clock)
+
+    async def run():
+        await cache.put(TSLA, INTRADAY, data)
+        saturday = await cache.get(TSLA, INTRADAY)
+        clock.now = SESSION_START + 4 * DAY
+        monday = await cache.get(TSLA, INTRADAY)
+        return saturday, monday
+
+    saturday, monday = asyncio.run(run())
+
+    assert saturday is data
+    assert monday is None
+
+
+def test_read_through_hits_memory_then_disk(tmp_path, asset_data):
+    data = fetched_at(asset_data, SESSION_START + 60)
+    repository = make_repository(tmp_path)
+    clock = FakeClock(SESSION_START + 120)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return data
+
+    async def run():
+        cache = MarketDataCache(repository, clock=clock)
+        first = await cache.get_or_fetch(TSLA, INTRADAY, fetch)
+        second = await cache.get_or_fetch(TSLA, INTRADAY, fetch)
+        # A new process only has the disk tier
+        from_disk = await MarketDataCache(repository, clock=clock).get(TSLA, INTRADAY)
+        return first, second, from_disk
+
+    first, second, from_disk = asyncio.run(run())
+    assert len(calls) == 1
+    assert first is second
+    assert from_disk == data
+
+
+def test_stale_entries_are_refetched(tmp_path, asset_data):
+    data = fetched_at(asset_data, SESSION_START + 60)
+    repository = make_repository(tmp_path)
+    clock = FakeClock(SESSION_START + 120)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return data
+
+    async def run():
+        cache = MarketDataCache(repository, clock=clock)
+        await cache.get_or_fetch(TSLA, INTRADAY, fetch)
+        clock.now += 15 * 60
+        await cache.get_or_fetch(TSLA, INTRADAY, fetch)
+        # Daily bars are keyed separately and still need their own fetch
+        await cache.get_or_fetch(TSLA, DAILY, fetch)
+
+    asyncio.run(run())
+    assert len(calls) == 3
+
+
+def test_memory_tier_is_bounded(tmp_path, asset_data):
+    repository = make_repository(tmp_path)
+    cache = MarketDataCache(repository, max_entries=2)
+    for i in range(3):
+        cache._remember((f"S{i}", "1d", "15m"), asset_data, float("inf"))
+    assert list(cache._entries) == [("S1", "1d", "15m"), ("S2", "1d", "15m")]
+
+
+def test_stored_bars_only_serve_the_ranges_they_cover(tmp_path, asset_data):
+    data = fetched_at(asset_data, SESSION_START + 60)
+    repository = make_repository(tmp_path)
+
+    async def run():
+        await repository.save_asset_data(TSLA, INTRADAY, data)
+        return [
+            await repository.get_stored_asset_data(
+                TSLA, TimeFrame(time_range, TimeRange.MINS_15)
+            )
+            for time_range in (TimeRange.DAY_1, TimeRange.DAY_5, TimeRange.MONTH_1)
+        ]
+
+    day, week, month = asyncio.run(run())
+
+    assert day.info.bars == data.info.bars
+    assert day.created_at == data.created_at
+    # One session of bars says nothing about the four before it
+    assert week is None
+    assert month is None
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.application.market_data_encoder import (
+    CsvOhlcvEncoder,
+    DownsampledEncoder,
+    FeatureSummaryEncoder,
+    JsonEncoder,
+    downsample,
+    estimate_tokens,
+    get_bars,
+    get_market_data_encoder,
+)
+from src.data.external.fetcher import AssetData
+from src.data.ohlcv import OhlcvSeries
+
+
+@pytest.fixture
+def asset_data():
+    with open("repository/asset_data/TSLA/2024-10-03_10-50-50.json") as f:
+        return AssetData.model_validate_json(f.read())
+
+
+def test_csv_is_much_smaller_than_json(asset_data):
+    csv = CsvOhlcvEncoder().encode(asset_data)
+    rows = csv.splitlines()
+    assert rows[1] == "time,open,high,low,close,volume"
+    assert len(rows) == len(asset_data.info.bars) + 2
+    assert len(csv) < len(JsonEncoder().encode(asset_data)) / 2
+
+
+def test_downsample_keeps_ohlcv_semantics():
+    ts = np.arange(10, dtype=np.int64)
+    values = np.arange(10, dtype=np.float64)
+    bars = OhlcvSeries(ts, values, values + 1, values - 1, values, np.ones(10))
+
+    out = downsample(bars, 4)
+
+    assert out.timestamp.tolist() == [0, 1, 4, 7]
+    assert out.open.tolist() == [0, 1, 4, 7]
+    assert out.high.tolist() == [1, 4, 7, 10]
+    assert out.low.tolist() == [-1, 0, 3, 6]
+    assert out.close.tolist() == [0, 3, 6, 9]
+    assert out.volume.tolist() == [1, 3, 3, 3]
+
+
+def test_downsampled_encoder_limits_rows(asset_data):
+    rows = DownsampledEncoder(max_bars=5).encode(asset_data).splitlines()
+    assert len(rows) == 5 + 2
+    assert rows[-1].split(",")[4] == f"{get_bars(asset_data).close[-1]:.2f}"
+
+
+def test_summary_mentions_last_close(asset_data):
+    summary = FeatureSummaryEncoder().encode(asset_data)
+    assert f"last_close={get_bars(asset_data).close[-1]:.2f}" in summary
+
+
+@pytest.mark.parametrize("encoding", ["json", "csv", "downsampled", "summary"])
+@pytest.mark.parametrize("budget", [50, 200, 100_000])
+def test_encoders_respect_token_budget(asset_data, encoding, budget):
+    text = get_market_data_encoder(encoding, budget).encode(asset_data)
+    # The summary is the floor; anything above it must fit the budget
+    summary = FeatureSummaryEncoder().encode(asset_data)
+    assert estimate_tokens(text) <= max(budget, estimate_tokens(summary))
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        get_market_data_encoder("xml", 100)
@@ -0,0 +1,260 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from benchmarks.fake_upstreams import RECOMMENDATION_CONTENT
+from src.application.market_data_refresher import (
+    MarketDataRefresher,
+    get_covering_range,
+    get_wake_time,
+)
+from src.application.recommendation_engine import RecommendationEngine
+from src.config import PROMPT_DIR, STRATEGIES_DIR
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetData, StockInfo
+from src.data.repository.market_data_cache import MarketDataCache
+from src.data.repository.trading_strategy import get_all_trading_strategies
+from src.data.value_objects import Asset, AssetType, Sentiment, TimeRange
+from src.infrastructure.chart_renderer import ChartImage
+from src.infrastructure.openai_client import RecommendationResponse
+from src.infrastructure.prompt_loader import PromptLoader
+from tests.test_market_data_cache import (
+    SESSION_END,
+    SESSION_START,
+    fetched_at,
+    make_repository,
+)
+
+TSLA = Asset("TSLA", AssetType.STOCK)
+DAY = 86400
+
+
+@pytest.fixture
+def asset_data():
+    with open("repository/asset_data/TSLA/2024-10-03_10-50-50.json") as f:
+        return AssetData.model_validate_json(f.read())
+
+
+class FakeFetcher:
+    """Serves the bars of `data` that have opened by `clock()`, as fetched
+    then."""
+
+    def __init__(self, data: AssetData, clock):
+        self.data = data
+        self.clock = clock
+        self.ranges: list[TimeRange] = []
+
+    async def fetch_asset_data(self, asset, time_frame):
+        self.ranges.append(time_frame.time_range)
+        bars = self.data.info.bars
+        visible = int(np.searchsorted(bars.timestamp, self.clock(), "right"))
+        return self.data.model_copy(
+            update={
+                "info": StockInfo(
+                    meta=self.data.info.meta, bars=bars.slice(0, visible)
+                ),
+                "created_at": datetime.fromtimestamp(self.clock()),
+            }
+        )
+
+
+def test_covering_range_is_the_smallest_that_reaches_the_last_bar():
+    now = SESSION_START + 3600
+    month = TimeRange.MONTH_1
+    assert get_covering_range(None, now, TimeRange.MINS_15, month) == month
+    assert (
+        get_covering_range(now - 1800, now, TimeRange.MINS_15, month) == TimeRange.DAY_1
+    )
+    # Yesterday's bars are not in the 1d range
+    assert (
+        get_covering_range(SESSION_END - DAY, now, TimeRange.MINS_15, month)
+        == TimeRange.DAY_5
+    )
+    assert (
+        get_covering_range(now - 20 * DAY, now, TimeRange.DAY_1, TimeRange.YEAR_1)
+        == TimeRange.MONTH_1
+    )
+    # Never fetch more than the configured lookback
+    assert get_covering_range(now - 90 * DAY, now, TimeRange.DAY_1, month) == month
+
+
+def test_wake_time_follows_bar_boundaries_and_session_hours(asset_data):
+    in_session = fetched_at(asset_data, SESSION_START + 600)
+    assert (
+        get_wake_time(SESSION_START + 600, in_session, TimeRange.MINS_15)
+        == SESSION_START + 900
+    )
+    assert (
+        get_wake_time(SESSION_START + 600, in_session, TimeRange.HOURS_1)
+        == SESSION_START + 3600
+    )
+    after_close = fetched_at(asset_data, SESSION_END + 60)
+    assert (
+        get_wake_time(SESSION_END + 60, after_close, TimeRange.MINS_15)
+        == SESSION_START + DAY
+    )
+
+
+def test_refresh_fetches_only_the_bars_since_the_last_one(tmp_path, asset_data):
+    timestamps = asset_data.info.bars.timestamp
+    now = [int(timestamps[19]) + 60]
+    fetcher = FakeFetcher(asset_data, lambda: now[0])
+    repository = make_repository(tmp_path)
+    refresher = MarketDataRefresher(fetcher, repository, clock=lambda: now[0])
+
+    async def run():
+        first = await refresher.refresh(TSLA, TimeRange.MINS_15)
+        now[0] = int(timestamps[21]) + 60
+        second = await refresher.refresh(TSLA, TimeRange.MINS_15)
+        return first, second
+
+    asyncio.run(run())
+
+    assert fetcher.ranges == [TimeRange.MONTH_1, TimeRange.DAY_1]
+    assert repository.ohlcv_store.window("TSLA", "15m") == (
+        asset_data.info.bars.slice(0, 22)
+    )
+
+
+def test_watch_sleeps_until_the_next_bar(tmp_path, asset_data):
+    now = SESSION_START + 600
+    data = fetched_at(asset_data, now)
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        raise asyncio.CancelledError
+
+    refresher = MarketDataRefresher(
+        FakeFetcher(data, lambda: now),
+        make_repository(tmp_path),
+        settle_seconds=5,
+        clock=lambda: now,
+        sleep=sleep,
+    )
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(refresher.watch(TSLA, TimeRange.MINS_15))
+
+    assert sleeps == [300 + 5]
+
+
+class FailingFetcher(FakeFetcher):
+    """Raises for BROKEN, like a malformed payload would."""
+
+    def __init__(self, data: AssetData, clock):
+        super().__init__(data, clock)
+        self.symbols: list[str] = []
+
+    async def fetch_asset_data(self, asset, time_frame):
+        self.symbols.append(asset.symbol)
+        if asset.symbol == "BROKEN":
+            raise KeyError("chart")
+        return await super().fetch_asset_data(asset, time_frame)
+
+
+BROKEN = Asset("BROKEN", AssetType.STOCK)
+
+
+def test_failing_refreshes_back_off(tmp_path, asset_data):
+    now = SESSION_START + 600
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 6:
+            raise asyncio.CancelledError
+
+    refresher = MarketDataRefresher(
+        FailingFetcher(asset_data, lambda: now),
+        make_repository(tmp_path),
+        retry_seconds=30,
+        clock=lambda: now,
+        sleep=sleep,
+    )
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(refresher.watch(BROKEN, TimeRange.MINS_15))
+
+    # Doubling from the retry delay, but never longer than a bar
+    assert sleeps == [30, 60, 120, 240, 480, 900]
+
+
+def test_a_failing_series_does_not_stop_the_others(tmp_path, asset_data):
+    now = SESSION_START + 600
+    fetcher = FailingFetcher(fetched_at(asset_data, now), lambda: now)
+
+    async def sleep(seconds):
+        if fetcher.symbols.count("TSLA") == 3:
+            raise asyncio.CancelledError
+        await asyncio.sleep(0)
+
+    refresher = MarketDataRefresher(
+        fetcher, make_repository(tmp_path), clock=lambda: now, sleep=sleep
+    )
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(refresher.run([BROKEN, TSLA], [TimeRange.MINS_15]))
+
+    assert fetcher.symbols.count("TSLA") == 3
+    assert fetcher.symbols.count("BROKEN") > 1
+
+
+class FakeOpenAIClient:
+    async def get_recommendation(self, prompt, image, on_partial=None):
+        return RecommendationResponse(**RECOMMENDATION_CONTENT)
+
+
+class FakeSentimentRepository:
+    async def tail(self, asset, n):
+        return []
+
+
+class FakeChartRenderer:
+    async def render(self, request):
+        return ChartImage(
+            png=b"png", digest="digest", symbol="TSLA", time_range=TimeRange.MONTH_1
+        )
+
+
+def test_recommendations_read_the_refreshed_bars(tmp_path, asset_data):
+    timestamps = asset_data.info.bars.timestamp
+    now = [int(timestamps[19]) + 60]
+
+    def clock():
+        return now[0]
+
+    fetcher = FakeFetcher(asset_data, clock)
+    repository = make_repository(tmp_path)
+    refresher = MarketDataRefresher(fetcher, repository, clock=clock)
+    engine = RecommendationEngine(
+        FakeOpenAIClient(),
+        PromptLoader(PROMPT_DIR),
+        FakeSentimentRepository(),
+        fetcher,
+        repository,
+        market_data_cache=MarketDataCache(repository, clock=clock),
+        chart_renderer=FakeChartRenderer(),
+    )
+    strategies = get_all_trading_strategies(
+        STRATEGIES_DIR, PromptLoader(STRATEGIES_DIR)
+    )
+    time_frame = TimeFrame(TimeRange.MONTH_1, TimeRange.MINS_15)
+
+    async def run():
+        await refresher.refresh(TSLA, TimeRange.MINS_15)
+        now[0] = int(timestamps[21]) + 60
+        await refresher.refresh(TSLA, TimeRange.MINS_15)
+        recommendation = await engine.get_recommendation(
+            TSLA, Sentiment.NEUTRAL, strategies[0], time_frame
+        )
+        data = await engine.fetch_asset_data(TSLA, time_frame)
+        return recommendation, data
+
+    recommendation, data = asyncio.run(run())
+
+    assert fetcher.ranges == [TimeRange.MONTH_1, TimeRange.DAY_1]
+    assert recommendation == RecommendationResponse(**RECOMMENDATION_CONTENT)
+    assert data.info.bars == asset_data.info.bars.slice(0, 22)
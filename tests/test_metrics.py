@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from src.core.logger import log_async
+from src.core.metrics import Histogram, MetricsRegistry, metrics
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.observe(value)
+
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["p50"] == 50
+    assert summary["p95"] == 95
+    assert summary["min"] == 1 and summary["max"] == 100
+
+
+def test_histogram_memory_is_bounded():
+    histogram = Histogram(max_samples=100)
+    for value in range(10_000):
+        histogram.observe(value)
+
+    assert len(histogram.samples) == 100
+    assert histogram.count == 10_000
+    assert 3_000 < histogram.percentile(50) < 7_000
+
+
+def test_span_records_duration_and_errors():
+    registry = MetricsRegistry()
+    with registry.span("work") as span:
+        span.observe("payload_bytes", 512, payload="png")
+    with pytest.raises(RuntimeError):
+        with registry.span("work"):
+            raise RuntimeError("boom")
+
+    report = registry.report()
+    durations = next(h for h in report["histograms"] if h["name"] == "span_seconds")
+    assert durations["labels"] == {"span": "work"}
+    assert durations["count"] == 2
+    assert report["counters"] == [
+        {"name": "span_errors", "labels": {"span": "work"}, "value": 1}
+    ]
+
+
+def test_prometheus_export():
+    registry = MetricsRegistry()
+    registry.observe("span_seconds", 0.25, span="fetch")
+    registry.increment("openai_tokens", 120, call="SentimentResponse", kind="prompt")
+
+    text = registry.to_prometheus()
+
+    assert "# TYPE stonks_span_seconds summary" in text
+    assert 'stonks_span_seconds{span="fetch",quantile="0.95"} 0.25' in text
+    assert 'stonks_span_seconds_count{span="fetch"} 1' in text
+    assert "# TYPE stonks_openai_tokens_total counter" in text
+    assert (
+        'stonks_openai_tokens_total{call="SentimentResponse",kind="prompt"} 120' in text
+    )
+
+
+def test_log_async_emits_spans():
+    @log_async("DEBUG")
+    async def traced():
+        return None
+
+    asyncio.run(traced())
+
+    spans = [
+        h["labels"]["span"]
+        for h in metrics.report()["histograms"]
+        if h["name"] == "span_seconds"
+    ]
+    assert traced.__qualname__ in spans
+
+
+def test_openai_usage_is_counted():
+    from openai.types import CompletionUsage
+
+    from src.infrastructure.openai_client import OpenAIClient
+
+    usage = CompletionUsage.construct(
+        prompt_tokens=1200,
+        completion_tokens=80,
+        total_tokens=1280,
+        prompt_tokens_details={"cached_tokens": 1024},
+    )
+    metrics.reset()
+    OpenAIClient._record_usage("RecommendationResponse", usage)
+
+    counters = {
+        c["labels"]["kind"]: c["value"]
+        for c in metrics.report()["counters"]
+        if c["name"] == "openai_tokens"
+    }
+    assert counters == {"prompt": 1200, "completion": 80, "cached": 1024}
+    (ratio,) = [
+        h
+        for h in metrics.report()["histograms"]
+        if h["name"] == "openai_cached_token_ratio"
+    ]
+    assert ratio["labels"] == {"call": "RecommendationResponse"}
+    assert abs(ratio["mean"] - 1024 / 1200) < 1e-9
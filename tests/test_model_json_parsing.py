@@ -1,16 +1,18 @@
 import json
 from datetime import datetime, timezone
 
+import numpy as np
 import pytest
 
 from src.data.external.fetcher import (
     AssetData,
     CurrentTradingPeriod,
-    Indicator,
     Meta,
     StockInfo,
     TradingPeriod,
+    decode_asset_data,
 )
+from src.data.ohlcv import OhlcvSeries
 
 
 @pytest.fixture
@@ -68,8 +70,8 @@ def sample_meta(sample_current_trading_period, sample_trading_period):
 
 @pytest.fixture
 def sample_indicator():
-    return Indicator(
-        quote=[
+    return {
+        "quote": [
             {
                 "open": [142.94],
                 "close": [144.84],
@@ -78,7 +80,7 @@ def sample_indicator():
                 "volume": [75699061],
             }
         ]
-    )
+    }
 
 
 @pytest.fixture
@@ -113,10 +115,11 @@ def test_meta_serialization(sample_meta):
     assert deserialized == sample_meta
 
 
-def test_indicator_serialization(sample_indicator):
-    json_data = sample_indicator.json()
-    deserialized = Indicator.parse_raw(json_data)
-    assert deserialized == sample_indicator
+def test_stock_info_decodes_bars_to_arrays(sample_stock_info, sample_indicator):
+    bars = sample_stock_info.bars
+    assert bars.timestamp.dtype == np.int64
+    assert bars.close.tolist() == [144.84]
+    assert sample_stock_info.model_dump()["indicators"] == sample_indicator
 
 
 def test_stock_info_serialization(sample_stock_info):
@@ -168,7 +171,41 @@ def test_list_serialization(sample_asset_data):
 
 
 def test_empty_indicator_quote(sample_asset_data):
-    sample_asset_data.info.indicators.quote = []
+    sample_asset_data.info.bars = OhlcvSeries.empty()
     json_str = sample_asset_data.json()
     deserialized = AssetData.parse_raw(json_str)
-    assert deserialized.info.indicators.quote == []
+    assert deserialized.info.model_dump()["indicators"]["quote"] == []
+    assert len(deserialized.info.bars) == 0
+
+
+def test_decode_asset_data_maps_nulls_to_nan(sample_meta):
+    body = json.dumps(
+        {
+            "chart": {
+                "result": [
+                    {
+                        "meta": sample_meta.model_dump(),
+                        "timestamp": [1, 2],
+                        "indicators": {
+                            "quote": [
+                                {
+                                    "open": [1.5, None],
+                                    "high": [2.0, None],
+                                    "low": [1.0, None],
+                                    "close": [1.75, None],
+                                    "volume": [100, None],
+                                }
+                            ]
+                        },
+                    }
+                ]
+            }
+        }
+    ).encode()
+
+    data = decode_asset_data("AAPL", body)
+
+    assert data.info.bars.timestamp.tolist() == [1, 2]
+    assert data.info.bars.close[0] == 1.75
+    assert np.isnan(data.info.bars.close[1])
+    assert data.info.bars.to_quote()["volume"] == [100, None]
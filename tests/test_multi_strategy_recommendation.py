@@ -0,0 +1,162 @@
+import asyncio
+
+from benchmarks.fake_upstreams import RECOMMENDATION_CONTENT, FakeUpstreams
+from src.application.recommendation_engine import RecommendationEngine
+from src.config import PROMPT_DIR, STRATEGIES_DIR
+from src.core.metrics import metrics
+from src.core.rate_limiter import RateLimiter
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetData
+from src.data.repository.asset_data import AssetDataRepository
+from src.data.repository.trading_strategy import get_all_trading_strategies
+from src.data.value_objects import Asset, AssetType, Sentiment, TimeRange
+from src.infrastructure.chart_renderer import ChartImage
+from src.infrastructure.openai_client import (
+    OpenAIClient,
+    RecommendationResponse,
+    StrategyRecommendation,
+    StrategyRecommendationsResponse,
+)
+from src.infrastructure.prompt_loader import PromptLoader
+
+MSFT = Asset("MSFT", AssetType.STOCK)
+TIME_FRAME = TimeFrame(TimeRange.DAY_1, TimeRange.MINS_15)
+IMAGE = ChartImage(
+    png=b"png", digest="digest", symbol="MSFT", time_range=TimeRange.DAY_1
+)
+STRATEGIES = sorted(
+    get_all_trading_strategies(STRATEGIES_DIR, PromptLoader(STRATEGIES_DIR)),
+    key=lambda strategy: strategy.get_name(),
+)
+
+
+def load_asset_data() -> AssetData:
+    with open("repository/asset_data/MSFT/2024-09-28_19-16-43.json") as f:
+        return AssetData.model_validate_json(f.read())
+
+
+def make_engine(openai_client) -> RecommendationEngine:
+    return RecommendationEngine(
+        openai_client, PromptLoader(PROMPT_DIR), None, None, AssetDataRepository()
+    )
+
+
+def get_prompt_tokens(call: str) -> int:
+    return sum(
+        c["value"]
+        for c in metrics.report()["counters"]
+        if c["labels"] == {"call": call, "kind": "prompt"}
+    )
+
+
+def test_one_call_recommends_for_every_strategy():
+    inputs = dict(
+        asset=MSFT,
+        sentiment=Sentiment.NEUTRAL,
+        time_frame=TIME_FRAME,
+        asset_data=load_asset_data(),
+        image=IMAGE,
+        recent_sentiments=["neutral"],
+    )
+
+    async def run():
+        async with FakeUpstreams() as upstreams:
+            async with OpenAIClient(
+                base_url=upstreams.openai_base_url,
+                api_key="test",
+                rate_limiter=RateLimiter("openai", 1000),
+            ) as client:
+                engine = make_engine(client)
+                combined = await engine.recommend_strategies(
+                    strategies=STRATEGIES, **inputs
+                )
+                calls = upstreams.requests["openai"]
+                for strategy in STRATEGIES:
+                    await engine.recommend(strategy=strategy, **inputs)
+        return combined, calls
+
+    metrics.reset()
+    combined, calls = asyncio.run(run())
+
+    assert calls == 1
+    assert combined == [RecommendationResponse(**RECOMMENDATION_CONTENT)] * 3
+    # The asset data dominates the prompt, and is now sent once
+    separate = get_prompt_tokens("RecommendationResponse")
+    assert get_prompt_tokens("StrategyRecommendationsResponse") < separate / 2
+
+
+class FakeOpenAIClient:
+    def __init__(self, response: StrategyRecommendationsResponse):
+        self.response = response
+        self.prompts = []
+
+    async def get_strategy_recommendations(self, prompt, image):
+        self.prompts.append(prompt)
+        return self.response
+
+
+def test_results_follow_the_strategy_order_by_name():
+    conservative = StrategyRecommendation(
+        strategy=" Conservative", **{**RECOMMENDATION_CONTENT, "confidence": 0.9}
+    )
+    client = FakeOpenAIClient(
+        StrategyRecommendationsResponse(recommendations=[conservative])
+    )
+
+    results = asyncio.run(
+        make_engine(client).recommend_strategies(
+            asset=MSFT,
+            sentiment=Sentiment.NEUTRAL,
+            strategies=STRATEGIES,
+            time_frame=TIME_FRAME,
+            asset_data=load_asset_data(),
+            image=IMAGE,
+            recent_sentiments=[],
+        )
+    )
+
+    assert [s.get_name() for s in STRATEGIES] == [
+        "aggressive",
+        "balanced",
+        "conservative",
+    ]
+    assert results[:2] == [None, None]
+    assert results[2].confidence == 0.9
+    assert 'Strategy "balanced":' in client.prompts[0]
+
+
+class NamedStrategy:
+    def __init__(self, name: str):
+        self.name = name
+
+    def get_name(self) -> str:
+        return self.name
+
+    async def get_strategy_content(self) -> str:
+        return "Rules"
+
+
+def test_strategy_names_match_regardless_of_case_and_whitespace():
+    names = [" Balanced\t", "Straße"]
+    client = FakeOpenAIClient(
+        StrategyRecommendationsResponse(
+            recommendations=[
+                StrategyRecommendation(strategy="STRASSE ", **RECOMMENDATION_CONTENT),
+                StrategyRecommendation(strategy="balanced", **RECOMMENDATION_CONTENT),
+            ]
+        )
+    )
+
+    results = asyncio.run(
+        make_engine(client).recommend_strategies(
+            asset=MSFT,
+            sentiment=Sentiment.NEUTRAL,
+            strategies=[NamedStrategy(name) for name in names],
+            time_frame=TIME_FRAME,
+            asset_data=load_asset_data(),
+            image=IMAGE,
+            recent_sentiments=[],
+        )
+    )
+
+    assert results == [RecommendationResponse(**RECOMMENDATION_CONTENT)] * 2
@@ -0,0 +1,98 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from src.data.ohlcv import OhlcvSeries
+from src.data.repository.ohlcv_store import OhlcvStore
+
+
+def make_bars(timestamps, close_offset=0.0) -> OhlcvSeries:
+    ts = np.asarray(timestamps, dtype=np.int64)
+    close = ts.astype(np.float64) + close_offset
+    return OhlcvSeries(
+        timestamp=ts,
+        open=close - 1,
+        high=close + 1,
+        low=close - 2,
+        close=close,
+        volume=np.full(len(ts), 100.0),
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OhlcvStore(str(tmp_path))
+
+
+def test_merge_appends_and_deduplicates(store):
+    assert asyncio.run(store.merge("TSLA", "15m", make_bars([1, 2, 3]))) == 3
+    assert asyncio.run(store.merge("TSLA", "15m", make_bars([3, 4, 5]))) == 2
+
+    bars = store.load("TSLA", "15m")
+    assert bars.timestamp.tolist() == [1, 2, 3, 4, 5]
+
+
+def test_newer_bars_win_on_overlap(store):
+    asyncio.run(store.merge("TSLA", "15m", make_bars([1, 2, 3])))
+    asyncio.run(store.merge("TSLA", "15m", make_bars([2, 3], close_offset=0.5)))
+
+    bars = store.load("TSLA", "15m")
+    assert bars.close.tolist() == [1.0, 2.5, 3.5]
+
+
+def test_out_of_order_fetch_is_merged_in_place(store):
+    asyncio.run(store.merge("TSLA", "1d", make_bars([10, 30, 50])))
+    asyncio.run(store.merge("TSLA", "1d", make_bars([40, 20])))
+
+    assert store.load("TSLA", "1d").timestamp.tolist() == [10, 20, 30, 40, 50]
+
+
+def test_disk_use_grows_with_unique_bars(store, tmp_path):
+    for _ in range(5):
+        asyncio.run(store.merge("TSLA", "15m", make_bars(range(100))))
+
+    path = os.path.join(tmp_path, "TSLA", "15m.bin")
+    assert os.path.getsize(path) == 100 * 6 * 8
+    assert os.listdir(os.path.join(tmp_path, "TSLA")) == ["15m.bin"]
+
+
+def test_window_is_zero_copy_slice(store):
+    asyncio.run(store.merge("TSLA", "15m", make_bars(range(0, 100, 10))))
+
+    bars = store.window("TSLA", "15m", start=25, end=60)
+    assert bars.timestamp.tolist() == [30, 40, 50, 60]
+    assert isinstance(bars.close, np.memmap)
+    assert not bars.close.flags.owndata
+
+
+def test_merges_leave_earlier_windows_unchanged(store):
+    asyncio.run(store.merge("TSLA", "15m", make_bars([10, 30, 50])))
+    before = store.window("TSLA", "15m", start=30)
+
+    # Lands in the middle and overwrites the bar at 50
+    asyncio.run(store.merge("TSLA", "15m", make_bars([20, 50], close_offset=0.5)))
+
+    assert before.timestamp.tolist() == [30, 50]
+    assert before.close.tolist() == [30.0, 50.0]
+    after = store.window("TSLA", "15m", start=30)
+    assert after.timestamp.tolist() == [30, 50]
+    assert after.close.tolist() == [30.0, 50.5]
+
+
+def test_quote_round_trip_keeps_missing_bars():
+    quote = {
+        "open": [1.0, None],
+        "high": [2.0, None],
+        "low": [0.5, None],
+        "close": [1.5, None],
+        "volume": [10, None],
+    }
+    assert OhlcvSeries.from_quote([1, 2], quote).to_quote() == quote
+
+
+def test_unknown_series_is_empty(store):
+    assert store.load("MSFT", "1d") is None
+    assert len(store.window("MSFT", "1d")) == 0
+    assert store.last_timestamp("MSFT", "1d") is None
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+from src.data.value_objects import Sentiment
+from src.infrastructure.openai_batch import (
+    BatchRequestError,
+    BatchRunner,
+    LocalBatchBackend,
+    get_response_format,
+)
+from src.infrastructure.openai_client import (
+    OpenAIClient,
+    RecommendationResponse,
+    SentimentResponse,
+)
+
+
+def respond(body: dict) -> dict:
+    prompt = body["messages"][-1]["content"]
+    if prompt == "fail":
+        raise RuntimeError("server error")
+    content = {"sentiment": "positive", "confidence": 0.8, "intent": prompt}
+    message = {"role": "assistant", "content": json.dumps(content), "refusal": None}
+    if prompt == "refuse":
+        message = {"role": "assistant", "content": None, "refusal": "no"}
+    return {"choices": [{"index": 0, "message": message, "finish_reason": "stop"}]}
+
+
+def make_client(tmp_path, monkeypatch) -> tuple[OpenAIClient, BatchRunner]:
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    runner = BatchRunner(
+        LocalBatchBackend(str(tmp_path / "backend"), respond),
+        base_dir=str(tmp_path / "batches"),
+        linger_seconds=0.01,
+        poll_interval=0.01,
+    )
+    return OpenAIClient(batch_runner=runner), runner
+
+
+def test_concurrent_requests_share_one_batch(tmp_path, monkeypatch):
+    client, runner = make_client(tmp_path, monkeypatch)
+
+    async def run():
+        return await asyncio.gather(
+            *[client.get_sentiment(f"prompt {i}") for i in range(3)]
+        )
+
+    results = asyncio.run(run())
+
+    assert runner.batches_submitted == 1
+    assert [r.intent for r in results] == ["prompt 0", "prompt 1", "prompt 2"]
+    assert all(r.sentiment == Sentiment.POSITIVE for r in results)
+
+    (input_file,) = (tmp_path / "batches").iterdir()
+    lines = [json.loads(line) for line in input_file.read_text().splitlines()]
+    assert {line["url"] for line in lines} == {"/v1/chat/completions"}
+    assert lines[0]["body"]["response_format"]["json_schema"]["name"] == (
+        SentimentResponse.__name__
+    )
+
+
+def test_failed_and_refused_requests(tmp_path, monkeypatch):
+    client, _ = make_client(tmp_path, monkeypatch)
+
+    async def run():
+        return await asyncio.gather(
+            client.get_sentiment("fail"),
+            client.get_sentiment("refuse"),
+            client.get_sentiment("ok"),
+            return_exceptions=True,
+        )
+
+    failed, refused, ok = asyncio.run(run())
+
+    assert isinstance(failed, BatchRequestError)
+    assert refused is None
+    assert ok.intent == "ok"
+
+
+def test_max_requests_splits_batches(tmp_path, monkeypatch):
+    client, runner = make_client(tmp_path, monkeypatch)
+    runner.max_requests = 2
+
+    async def run():
+        return await asyncio.gather(*[client.get_sentiment(str(i)) for i in range(5)])
+
+    results = asyncio.run(run())
+
+    assert runner.batches_submitted == 3
+    assert [r.intent for r in results] == ["0", "1", "2", "3", "4"]
+
+
+def test_response_format_is_a_strict_schema():
+    response_format = get_response_format(RecommendationResponse)
+
+    assert response_format["json_schema"]["name"] == "RecommendationResponse"
+    assert response_format["json_schema"]["strict"] is True
+    schema = response_format["json_schema"]["schema"]
+    entry = schema["$defs"]["EntryExit"]
+    assert entry["additionalProperties"] is False
+    assert entry["required"] == ["price", "time"]
+    assert schema["required"] == list(RecommendationResponse.model_fields)
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from src.application.pipeline import DagScheduler, Stage
+
+
+def test_independent_stages_overlap():
+    events = []
+
+    def stage(name, delay):
+        async def run(**inputs):
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+            return name, sorted(inputs)
+
+        return run
+
+    scheduler = DagScheduler(
+        [
+            Stage("fetch", stage("fetch", 0.02)),
+            Stage("render", stage("render", 0.02), ("fetch",)),
+            Stage("sentiment", stage("sentiment", 0.03)),
+            Stage("recommend", stage("recommend", 0), ("render", "sentiment")),
+        ]
+    )
+    results, durations = asyncio.run(scheduler.run())
+
+    # sentiment runs alongside fetch and render, recommend waits for both
+    assert events.index("start sentiment") < events.index("end fetch")
+    assert events.index("start render") > events.index("end fetch")
+    assert events[-2:] == ["start recommend", "end recommend"]
+    assert results["recommend"] == ("recommend", ["render", "sentiment"])
+    assert set(durations) == {"fetch", "render", "sentiment", "recommend"}
+
+
+def test_failure_cancels_running_stages():
+    cancelled = []
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def never(fail):
+        raise AssertionError("must not run")
+
+    scheduler = DagScheduler(
+        [Stage("fail", fail), Stage("slow", slow), Stage("after", never, ("fail",))]
+    )
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(scheduler.run())
+    assert cancelled == ["slow"]
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        [Stage("a", None), Stage("a", None)],
+        [Stage("a", None, ("missing",))],
+        [Stage("a", None, ("b",)), Stage("b", None, ("a",))],
+    ],
+)
+def test_invalid_graphs_are_rejected(stages):
+    with pytest.raises(ValueError):
+        DagScheduler(stages)
@@ -0,0 +1,60 @@
+import asyncio
+import os
+
+import pytest
+
+from src.infrastructure.prompt_loader import PromptLoader, PromptTemplate
+
+PROMPT_VALUES = {
+    "asset": "TSLA",
+    "asset_type": "stock",
+    "sentiment": "positive",
+    "sentiment_history": "neutral, positive",
+    "time_range": "1mo",
+    "time_interval": "1d",
+    "strategy": "Buy {dips} and hold",
+    "asset_data": "t,o,h,l,c,v",
+    "indicators": "{}",
+    "now": "2024-10-04",
+}
+
+
+@pytest.mark.parametrize("filename", ["recommendation.txt", "sentiment_analysis.txt"])
+def test_templates_format_like_str_format(filename):
+    with open(os.path.join("prompts", filename)) as f:
+        text = f.read()
+    assert PromptTemplate(text).format(**PROMPT_VALUES) == text.format(**PROMPT_VALUES)
+
+
+def test_recommendation_prompt_starts_with_a_static_prefix():
+    template = asyncio.run(PromptLoader("prompts").load_template("recommendation.txt"))
+    first = template.format(**PROMPT_VALUES)
+    second = template.format(
+        **{**PROMPT_VALUES, "asset": "MSFT", "sentiment": "negative", "asset_data": ""}
+    )
+
+    prefix = os.path.commonprefix([first, second])
+    # Everything but the per-request data is shared by calls with one strategy
+    assert "Output Format:" in prefix
+    fields = [field for _, field in template.parts if field is not None]
+    assert fields[0] == "strategy"
+
+
+def test_loader_rereads_only_changed_files(tmp_path):
+    path = tmp_path / "prompt.txt"
+    path.write_text("Hello {name}")
+    loader = PromptLoader(str(tmp_path))
+
+    async def load():
+        return await loader.load_template("prompt.txt")
+
+    first = asyncio.run(load())
+    assert asyncio.run(load()) is first
+
+    path.write_text("Bye {name}")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    changed = asyncio.run(load())
+
+    assert changed is not first
+    assert changed.format(name="you") == "Bye you"
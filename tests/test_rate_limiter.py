@@ -0,0 +1,186 @@
+import asyncio
+import json
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.core.rate_limiter import (
+    Priority,
+    RateLimiter,
+    parse_retry_after,
+    priority_lane,
+)
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetDataFetcher
+from src.data.value_objects import Asset, AssetType, TimeRange
+
+with open("repository/asset_data/TSLA/2024-10-03_10-50-50.json") as f:
+    TSLA_INFO = json.load(f)["info"]
+
+
+def test_requests_are_paced():
+    async def run():
+        limiter = RateLimiter("test", requests_per_second=50, burst=1)
+        started = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+        return time.monotonic() - started
+
+    # The first request uses the burst, the other five wait 20ms each
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_token_budget_delays_large_calls():
+    async def run():
+        limiter = RateLimiter("test", requests_per_second=1000, tokens_per_minute=600)
+        await limiter.acquire(tokens=600)
+        started = time.monotonic()
+        await limiter.acquire(tokens=5)
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.45
+
+
+def test_interactive_requests_jump_ahead_of_batch_work():
+    async def run():
+        limiter = RateLimiter("test", requests_per_second=100, burst=1)
+        await limiter.acquire()
+        order = []
+
+        async def call(name):
+            await limiter.acquire()
+            order.append(name)
+
+        with priority_lane(Priority.BATCH):
+            batch = [asyncio.create_task(call(f"batch{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive"))
+        await asyncio.gather(*batch, interactive)
+        return order
+
+    assert asyncio.run(run()) == ["interactive", "batch0", "batch1", "batch2"]
+
+
+def test_rate_limited_responses_pause_and_slow_down():
+    async def run():
+        limiter = RateLimiter("test", requests_per_second=100)
+        limiter.on_rate_limited(retry_after=0.2)
+        assert limiter.rate == 50
+        started = time.monotonic()
+        await limiter.acquire()
+        waited = time.monotonic() - started
+        for _ in range(5):
+            limiter.on_success()
+        return waited, limiter.rate
+
+    waited, rate = asyncio.run(run())
+    assert waited >= 0.19
+    assert rate == 100
+
+
+def test_cancelled_waiter_does_not_block_the_queue():
+    async def run():
+        limiter = RateLimiter("test", requests_per_second=50, burst=1)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.wait_for(second, 1)
+        return limiter._waiters
+
+    assert asyncio.run(run()) == []
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"retry-after": "3"}, 3.0),
+        ({"retry-after-ms": "1500", "retry-after": "2"}, 1.5),
+        ({"retry-after": "soon"}, None),
+        ({}, None),
+        (None, None),
+    ],
+)
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(headers) == expected
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = parse_retry_after({"retry-after": format_datetime(retry_at, usegmt=True)})
+    assert 25 <= delay <= 30
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None, data=None):
+        self.status = status
+        self.headers = headers or {}
+        self.data = data
+
+    async def read(self):
+        return json.dumps(self.data).encode()
+
+    async def text(self):
+        return ""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = 0
+
+    def get(self, url):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def test_fetcher_retries_rate_limited_requests():
+    session = FakeSession(
+        [
+            FakeResponse(429, {"retry-after": "0.05"}),
+            FakeResponse(503),
+            FakeResponse(200, data={"chart": {"result": [TSLA_INFO]}}),
+        ]
+    )
+    limiter = RateLimiter("yh", requests_per_second=1000, max_backoff=0.1)
+    limiter._backoff = 0.01
+    fetcher = AssetDataFetcher(rate_limiter=limiter)
+    fetcher._get_session = lambda: session
+
+    data = asyncio.run(
+        fetcher.fetch_stock_data(
+            Asset("TSLA", AssetType.STOCK),
+            TimeFrame(TimeRange.MONTH_1, TimeRange.DAY_1),
+        )
+    )
+
+    assert data.symbol == "TSLA"
+    assert session.calls == 3
+    assert limiter.rate_limited == 2
+
+
+def test_fetcher_gives_up_after_max_retries():
+    session = FakeSession([FakeResponse(429, {"retry-after": "0"}) for _ in range(3)])
+    fetcher = AssetDataFetcher(
+        rate_limiter=RateLimiter("yh", requests_per_second=1000), max_retries=2
+    )
+    fetcher._get_session = lambda: session
+
+    data = asyncio.run(
+        fetcher.fetch_stock_data(
+            Asset("TSLA", AssetType.STOCK),
+            TimeFrame(TimeRange.MONTH_1, TimeRange.DAY_1),
+        )
+    )
+
+    assert data is None
+    assert session.calls == 3
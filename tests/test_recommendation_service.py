@@ -0,0 +1,179 @@
+import asyncio
+import socket
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.fake_upstreams import RECOMMENDATION_CONTENT
+from src.application.pipeline import PipelineResult
+from src.application.recommendation_service import RecommendationService
+from src.data.entities import TimeFrame
+from src.data.value_objects import Asset, AssetType, Sentiment, TimeRange
+from src.infrastructure.openai_client import RecommendationResponse, SentimentResponse
+from src.view.http_api import create_app
+
+TIME_FRAME = TimeFrame(TimeRange.MONTH_1, TimeRange.DAY_1)
+
+
+class FakeStrategy:
+    def __init__(self, name: str):
+        self.name = name
+
+    def get_name(self) -> str:
+        return self.name
+
+
+class FakePipeline:
+    def __init__(
+        self,
+        delay: float = 0.05,
+        fail_for: str | None = None,
+        errors: dict[str, Exception] | None = None,
+    ):
+        self.delay = delay
+        self.fail_for = fail_for
+        self.errors = errors or {}
+        self.calls = 0
+
+    async def run(self, asset, strategy, time_frame, sentiment=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if asset.symbol == self.fail_for:
+            raise ValueError(f"Failed to fetch asset data for {asset.symbol}")
+        if asset.symbol in self.errors:
+            raise self.errors[asset.symbol]
+        return PipelineResult(
+            sentiment=SentimentResponse(
+                sentiment=Sentiment.NEUTRAL, confidence=0.5, intent="fake"
+            ),
+            recommendation=RecommendationResponse.model_validate(
+                RECOMMENDATION_CONTENT
+            ),
+            durations={"recommend": self.delay},
+        )
+
+
+def make_service(pipeline: FakePipeline) -> RecommendationService:
+    return RecommendationService(
+        pipeline, [FakeStrategy("aggressive"), FakeStrategy("conservative")]
+    )
+
+
+def test_identical_in_flight_requests_are_coalesced():
+    pipeline = FakePipeline()
+    service = make_service(pipeline)
+    tsla = Asset("TSLA", AssetType.STOCK)
+
+    async def run():
+        return await asyncio.gather(
+            *[service.recommend(tsla, "aggressive", TIME_FRAME) for _ in range(5)],
+            service.recommend(tsla, "conservative", TIME_FRAME),
+        )
+
+    results = asyncio.run(run())
+
+    assert pipeline.calls == 2
+    assert all(r is results[0] for r in results[:5])
+    assert len(service._in_flight) == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_run():
+    pipeline = FakePipeline()
+    service = make_service(pipeline)
+    tsla = Asset("TSLA", AssetType.STOCK)
+
+    async def run():
+        first = asyncio.create_task(service.recommend(tsla, "aggressive", TIME_FRAME))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(service.recommend(tsla, "aggressive", TIME_FRAME))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    result = asyncio.run(run())
+
+    assert result.recommendation.intent == RECOMMENDATION_CONTENT["intent"]
+    assert pipeline.calls == 1
+
+
+async def call_api(service: RecommendationService, requests: list[dict]) -> list:
+    runner = web.AppRunner(create_app(service))
+    await runner.setup()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    await web.SockSite(runner, sock).start()
+    base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    try:
+        async with aiohttp.ClientSession() as session:
+
+            async def post(body):
+                async with session.post(f"{base_url}/recommendations", json=body) as r:
+                    return r.status, await r.json()
+
+            return await asyncio.gather(*[post(body) for body in requests])
+    finally:
+        await runner.cleanup()
+
+
+def test_http_api_serves_recommendations():
+    pipeline = FakePipeline(fail_for="FAIL")
+    body = {"symbol": "tsla", "strategy": "aggressive", "range": "5d"}
+
+    responses = asyncio.run(
+        call_api(
+            make_service(pipeline),
+            [
+                body,
+                body,
+                {**body, "strategy": "unknown"},
+                {**body, "range": "forever"},
+                {"strategy": "aggressive"},
+                {**body, "symbol": "FAIL"},
+            ],
+        )
+    )
+
+    (status, ok), (_, joined), unknown, bad_range, missing, failed = responses
+    assert status == 200
+    assert ok == joined
+    assert ok["asset"] == {"symbol": "TSLA", "asset_type": "stock"}
+    assert ok["range"] == "5d" and ok["interval"] == "1d"
+    assert ok["recommendation"]["recommendation"] == "hold"
+    assert ok["sentiment"]["sentiment"] == "neutral"
+    assert [unknown[0], bad_range[0], missing[0], failed[0]] == [404, 400, 400, 502]
+    assert pipeline.calls == 2
+
+
+def test_http_api_rejects_unsafe_symbols():
+    pipeline = FakePipeline()
+    body = {"strategy": "aggressive"}
+    symbols = ["../../etc", "..", "TS/LA", "TSLA?x=1", "A" * 16, "", 42]
+
+    responses = asyncio.run(
+        call_api(
+            make_service(pipeline),
+            [{**body, "symbol": symbol} for symbol in [*symbols, "brk-b", "^gspc"]],
+        )
+    )
+
+    assert [status for status, _ in responses] == [400] * len(symbols) + [200, 200]
+    assert pipeline.calls == 2
+
+
+def test_http_api_reports_upstream_failures_as_bad_gateway():
+    errors = {
+        "NET": aiohttp.ClientConnectionError("connection reset"),
+        "SLOW": asyncio.TimeoutError(),
+        "ODD": KeyError("chart"),
+    }
+    body = {"strategy": "aggressive"}
+
+    responses = asyncio.run(
+        call_api(
+            make_service(FakePipeline(errors=errors)),
+            [{**body, "symbol": symbol} for symbol in errors],
+        )
+    )
+
+    assert [status for status, _ in responses] == [502] * 3
+    assert responses[1][1] == {"error": "TimeoutError"}
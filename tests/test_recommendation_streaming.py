@@ -0,0 +1,101 @@
+import asyncio
+
+from rich.console import Console
+
+from benchmarks.fake_upstreams import RECOMMENDATION_CONTENT, FakeUpstreams
+from src.core.logger import get_logger
+from src.core.metrics import metrics
+from src.core.rate_limiter import RateLimiter
+from src.data.entities import TimeFrame
+from src.data.value_objects import Asset, AssetType, Sentiment, TimeRange
+from src.infrastructure.chart_renderer import ChartImage
+from src.infrastructure.openai_client import (
+    OpenAIClient,
+    RecommendationResponse,
+    SentimentResponse,
+)
+from src.view import printers
+from src.view.printers import LiveRecommendationView
+
+TSLA = Asset("TSLA", AssetType.STOCK)
+TIME_FRAME = TimeFrame(TimeRange.MONTH_1, TimeRange.DAY_1)
+IMAGE = ChartImage(
+    png=b"png", digest="digest", symbol="TSLA", time_range=TimeRange.MONTH_1
+)
+SENTIMENT = SentimentResponse(
+    sentiment=Sentiment.NEUTRAL, confidence=0.5, intent="fake"
+)
+
+
+class FakeStrategy:
+    def get_name(self) -> str:
+        return "aggressive"
+
+
+def test_streamed_recommendation_matches_the_parsed_one():
+    partials = []
+
+    async def run():
+        async with FakeUpstreams() as upstreams:
+            async with OpenAIClient(
+                base_url=upstreams.openai_base_url,
+                api_key="test",
+                rate_limiter=RateLimiter("openai", 1000),
+            ) as client:
+                parsed = await client.get_recommendation("prompt", IMAGE)
+                streamed = await client.get_recommendation(
+                    "prompt", IMAGE, on_partial=partials.append
+                )
+        return parsed, streamed
+
+    metrics.reset()
+    parsed, streamed = asyncio.run(run())
+
+    assert streamed == parsed == RecommendationResponse(**RECOMMENDATION_CONTENT)
+    # Fields show up as they are generated, well before the last chunk
+    assert 1 < len(partials)
+    assert len(partials[0]) < len(RECOMMENDATION_CONTENT)
+    assert partials[-1] == RECOMMENDATION_CONTENT
+    report = metrics.report()
+    completion_tokens = [
+        c["value"]
+        for c in report["counters"]
+        if c["labels"] == {"call": "RecommendationResponse", "kind": "completion"}
+    ]
+    assert completion_tokens == [120]
+    assert "openai_first_chunk_seconds" in [h["name"] for h in report["histograms"]]
+
+
+def test_live_view_finishes_with_the_printed_layout(monkeypatch):
+    recommendation = RecommendationResponse(**RECOMMENDATION_CONTENT)
+    printed = Console(record=True, width=100)
+    monkeypatch.setattr(printers, "Console", lambda: printed)
+    printers.pretty_print_recommendation(
+        TSLA, TIME_FRAME, FakeStrategy(), SENTIMENT, recommendation
+    )
+
+    live = Console(record=True, width=100)
+    with LiveRecommendationView(TSLA, TIME_FRAME, FakeStrategy(), live) as view:
+        view.update({"recommendation": "hold", "confidence": 0.5})
+        view.update({**RECOMMENDATION_CONTENT, "entry": {}})
+        view.finish(SENTIMENT, recommendation)
+
+    # Live leaves the cursor after the layout instead of on a new line
+    assert live.export_text() == printed.export_text().rstrip("\n")
+
+
+def test_log_records_scroll_above_the_live_view():
+    logger = get_logger("tests.live")
+    # Waits until the listener thread has handled everything logged so far
+    flush = logger.handlers[0].queue.join
+
+    live = Console(record=True, width=100)
+    with LiveRecommendationView(TSLA, TIME_FRAME, FakeStrategy(), live):
+        logger.warning("Rate limited, retrying")
+        flush()
+    logger.warning("Logged after the view")
+    flush()
+
+    text = live.export_text()
+    assert "Rate limited, retrying" in text
+    assert "Logged after the view" not in text
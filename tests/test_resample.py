@@ -0,0 +1,126 @@
+import asyncio
+
+import numpy as np
+
+from src.data.entities import TimeFrame
+from src.data.external.fetcher import AssetData
+from src.data.ohlcv import OhlcvSeries
+from src.data.repository.market_data_cache import MarketDataCache
+from src.data.resample import get_resample_sources, resample_asset_data
+from src.data.value_objects import Asset, AssetType, TimeRange
+from tests.test_market_data_cache import FakeClock, fetched_at, make_repository
+
+MSFT = Asset("MSFT", AssetType.STOCK)
+# Regular session of the recorded MSFT payloads
+SESSION_END = 1727467200
+
+
+def load(path: str) -> AssetData:
+    with open(path) as f:
+        return AssetData.model_validate_json(f.read())
+
+
+def test_resample_aggregates_ohlcv():
+    nan = float("nan")
+    bars = OhlcvSeries.from_quote(
+        [0, 900, 1800, 2700, 3600, 4500],
+        {
+            "open": [10, 11, nan, 13, 14, 15],
+            "high": [12, 15, nan, 14, 16, 15],
+            "low": [9, 10, nan, 12, 13, 11],
+            "close": [11, 12, nan, 13, 15, 12],
+            "volume": [100, 200, None, 300, 400, 500],
+        },
+    )
+
+    hourly = bars.resample(3600, origin=0)
+
+    assert hourly == OhlcvSeries.from_quote(
+        [0, 3600],
+        {
+            "open": [10, 14],
+            "high": [15, 16],
+            "low": [9, 11],
+            "close": [13, 12],
+            "volume": [600, 900],
+        },
+    )
+
+
+def test_sources_are_finer_and_at_least_as_long():
+    sources = get_resample_sources(TimeFrame(TimeRange.MONTH_6, TimeRange.HOURS_1))
+    assert sources[:3] == [
+        TimeFrame(TimeRange.MONTH_6, TimeRange.MINS_15),
+        TimeFrame(TimeRange.YEAR_1, TimeRange.MINS_15),
+        TimeFrame(TimeRange.YEAR_5, TimeRange.MINS_15),
+    ]
+    assert all(source.time_interval != TimeRange.HOURS_2 for source in sources)
+    assert get_resample_sources(TimeFrame(TimeRange.MONTH_1, TimeRange.MONTH_1)) == []
+
+
+def test_resampled_bars_match_the_upstream_series():
+    # Same session, fetched 20 minutes apart as 15m and as 30m bars
+    fine = load("repository/asset_data/MSFT/2024-09-28_19-16-43.json")
+    upstream = load("repository/asset_data/MSFT/2024-09-28_19-35-20.json").info.bars
+
+    derived = resample_asset_data(fine, TimeFrame(TimeRange.DAY_1, TimeRange.MINS_30))
+
+    bars = derived.info.bars
+    assert derived.info.meta.dataGranularity == "30m"
+    assert np.array_equal(bars.timestamp, upstream.timestamp)
+    assert np.array_equal(bars.close, upstream.close)
+    assert np.array_equal(bars.low, upstream.low)
+    np.testing.assert_allclose(bars.volume, upstream.volume, rtol=1e-3)
+
+
+def test_cache_derives_coarser_series_before_missing(tmp_path):
+    # Fetched just before the close, so it is still fresh
+    fine = fetched_at(
+        load("repository/asset_data/MSFT/2024-09-28_19-16-43.json"), SESSION_END - 60
+    )
+    fine_frame = TimeFrame(TimeRange.DAY_1, TimeRange.MINS_15)
+    clock = FakeClock(SESSION_END - 30)
+    cache = MarketDataCache(make_repository(tmp_path), clock=clock)
+
+    async def run():
+        await cache.put(MSFT, fine_frame, fine)
+        hourly = await cache.get_or_resample(
+            MSFT, TimeFrame(TimeRange.DAY_1, TimeRange.HOURS_1)
+        )
+        # 15m bars for one session can't cover a month
+        monthly = await cache.get_or_resample(
+            MSFT, TimeFrame(TimeRange.MONTH_1, TimeRange.HOURS_1)
+        )
+        return hourly, monthly
+
+    hourly, monthly = asyncio.run(run())
+
+    assert len(hourly.info.bars) == 7
+    assert hourly.info.bars.high.max() == np.nanmax(fine.info.bars.high)
+    assert monthly is None
+
+
+def test_cache_resamples_the_stored_bars_that_cover_the_range(tmp_path):
+    fine = fetched_at(
+        load("repository/asset_data/MSFT/2024-09-28_19-16-43.json"), SESSION_END - 60
+    )
+    repository = make_repository(tmp_path)
+    cache = MarketDataCache(repository, clock=FakeClock(SESSION_END - 30))
+
+    async def run():
+        # Stored as a refresh does, without a latest header to serve from
+        await repository.save_asset_data(
+            MSFT, TimeFrame(TimeRange.MONTH_1, TimeRange.MINS_15), fine
+        )
+        return [
+            await cache.get_or_resample(MSFT, TimeFrame(time_range, TimeRange.HOURS_1))
+            for time_range in (TimeRange.DAY_1, TimeRange.DAY_5, TimeRange.YEAR_1)
+        ]
+
+    day, week, year = asyncio.run(run())
+
+    hourly = resample_asset_data(fine, TimeFrame(TimeRange.DAY_1, TimeRange.HOURS_1))
+    assert day.info.bars == hourly.info.bars
+    # The stored month has a single session, so it is the whole week too
+    assert week.info.bars == day.info.bars
+    assert year is None
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from src.data.repository.sentiment import SentimentRepository
+from src.data.value_objects import Asset, AssetType, Sentiment
+from src.infrastructure.openai_client import SentimentResponse
+
+TSLA = Asset("TSLA", AssetType.STOCK)
+
+
+def make_sentiment(i: int) -> SentimentResponse:
+    return SentimentResponse(
+        sentiment=Sentiment.NEUTRAL, confidence=i / 100, intent=f"entry {i}"
+    )
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return SentimentRepository(base_dir=str(tmp_path))
+
+
+def test_append_writes_one_line_per_entry(repository, tmp_path):
+    async def run():
+        for i in range(3):
+            await repository.append_sentiment(TSLA, make_sentiment(i))
+
+    asyncio.run(run())
+    with open(os.path.join(tmp_path, "TSLA.jsonl")) as f:
+        assert len(f.readlines()) == 3
+
+
+@pytest.mark.parametrize("n", [0, 1, 5, 60, 100])
+def test_tail_matches_full_history(repository, n):
+    repository.TAIL_BLOCK_SIZE = 64  # force reads across block boundaries
+
+    async def run():
+        for i in range(60):
+            await repository.append_sentiment(TSLA, make_sentiment(i))
+        return (
+            await repository.tail(TSLA, n),
+            await repository.get_sentiment_history(TSLA),
+        )
+
+    tail, history = asyncio.run(run())
+    assert tail == (history[-n:] if n else [])
+
+
+def test_tail_of_unknown_asset_is_empty(repository):
+    assert asyncio.run(repository.tail(TSLA, 5)) == []
+
+
+def write_legacy_file(tmp_path, n: int):
+    legacy = [
+        {
+            "sentiment": make_sentiment(i).to_dict(),
+            "timestamp": f"2024-09-28T19:0{i}:00",
+        }
+        for i in range(n)
+    ]
+    with open(os.path.join(tmp_path, "TSLA.json"), "w") as f:
+        json.dump(legacy, f, indent=2)
+
+
+def test_legacy_json_file_is_migrated(repository, tmp_path):
+    write_legacy_file(tmp_path, 3)
+
+    async def run():
+        await repository.append_sentiment(TSLA, make_sentiment(3))
+        return await repository.get_sentiment_history(TSLA)
+
+    history = asyncio.run(run())
+    assert [e.sentiment.intent for e in history] == [f"entry {i}" for i in range(4)]
+    assert not os.path.exists(os.path.join(tmp_path, "TSLA.json"))
+
+
+def test_concurrent_reads_migrate_a_legacy_file_once(repository, tmp_path):
+    write_legacy_file(tmp_path, 3)
+
+    async def run():
+        return await asyncio.gather(*[repository.tail(TSLA, 5) for _ in range(5)])
+
+    tails = asyncio.run(run())
+    expected = [f"entry {i}" for i in range(3)]
+    assert all([e.sentiment.intent for e in tail] == expected for tail in tails)
+    assert sorted(os.listdir(tmp_path)) == ["TSLA.jsonl"]
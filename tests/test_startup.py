@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Interpreter start excluded; generous enough for a slow CI machine but well
+# under the several seconds the eager imports used to cost
+IMPORT_BUDGET_SECONDS = 0.8
+
+# Only the code paths that talk to the upstreams, render charts or prompt the
+# user may import these
+DEFERRED_MODULES = [
+    "aiohttp",
+    "httpx",
+    "matplotlib",
+    "mplfinance",
+    "openai",
+    "pandas",
+    "questionary",
+]
+
+# The run path prints through rich, but a bare start doesn't
+MAIN_DEFERRED_MODULES = [*DEFERRED_MODULES, "rich"]
+
+RUN_PATH_MODULES = [
+    "src.application.pipeline",
+    "src.application.watchlist_scanner",
+    "src.data.external.fetcher",
+    "src.infrastructure.chart_renderer",
+    "src.infrastructure.llm_cache",
+    "src.infrastructure.openai_batch",
+    "src.infrastructure.openai_client",
+    "src.view.printers",
+    "src.view.user_interface",
+]
+
+
+def import_in_fresh_interpreter(modules: list[str], deferred: list[str]) -> dict:
+    script = f"""
+import importlib, json, sys, time
+started = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "loaded": [m for m in {deferred!r} if m in sys.modules],
+}}))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "modules, deferred",
+    [
+        (["main"], MAIN_DEFERRED_MODULES),
+        (["main", *RUN_PATH_MODULES], DEFERRED_MODULES),
+    ],
+)
+def test_startup_defers_heavy_dependencies_within_budget(modules, deferred):
+    result = import_in_fresh_interpreter(modules, deferred)
+
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
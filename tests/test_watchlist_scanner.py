@@ -0,0 +1,167 @@
+import asyncio
+import gc
+import warnings
+
+from src.application.pipeline import PipelineResult
+from src.application.watchlist_scanner import WatchlistScanner
+from src.data.entities import TimeFrame
+from src.data.value_objects import Asset, AssetType, Sentiment, TimeRange
+from src.infrastructure.openai_client import SentimentResponse
+
+
+class FakeStrategy:
+    def __init__(self, name: str):
+        self.name = name
+
+    def get_name(self) -> str:
+        return self.name
+
+
+class FakeSentimentAnalyzer:
+    def __init__(self):
+        self.calls = 0
+
+    async def analyze_sentiment(self, asset, time_frame):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return SentimentResponse(
+            sentiment=Sentiment.NEUTRAL, confidence=0.5, intent="fake"
+        )
+
+
+class FakePipeline:
+    def __init__(self, fail_for: str | None = None):
+        self.fail_for = fail_for
+        self.multi_runs = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def run(self, asset, strategy, time_frame, sentiment=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            sentiment = await sentiment
+            await asyncio.sleep(0.01)
+            if asset.symbol == self.fail_for:
+                raise RuntimeError("boom")
+            return PipelineResult(
+                sentiment=sentiment,
+                recommendation=f"{asset.symbol}/{strategy.get_name()}",
+            )
+        finally:
+            self.in_flight -= 1
+
+    async def run_strategies(self, asset, strategies, time_frame, sentiment=None):
+        self.multi_runs += 1
+        return [
+            await self.run(asset, strategy, time_frame, sentiment)
+            for strategy in strategies
+        ]
+
+
+def _scan(scanner, assets, strategies):
+    async def collect():
+        time_frame = TimeFrame(TimeRange.MONTH_1, TimeRange.DAY_1)
+        return [r async for r in scanner.scan(assets, strategies, time_frame)]
+
+    return asyncio.run(collect())
+
+
+def test_scan_covers_every_pair_and_shares_sentiment():
+    assets = [Asset(s, AssetType.STOCK) for s in ("TSLA", "MSFT", "AMZN")]
+    strategies = [FakeStrategy("aggressive"), FakeStrategy("conservative")]
+    analyzer = FakeSentimentAnalyzer()
+    engine = FakePipeline()
+
+    results = _scan(WatchlistScanner(analyzer, engine, 4), assets, strategies)
+
+    assert len(results) == 6
+    assert all(r.ok for r in results)
+    assert analyzer.calls == 3
+    assert {r.recommendation for r in results} == {
+        f"{a.symbol}/{s.get_name()}" for a in assets for s in strategies
+    }
+
+
+def test_scan_does_not_deadlock_with_a_single_slot():
+    assets = [Asset(f"S{i}", AssetType.STOCK) for i in range(3)]
+
+    results = _scan(
+        WatchlistScanner(FakeSentimentAnalyzer(), FakePipeline(), 1),
+        assets,
+        [FakeStrategy("balanced")],
+    )
+
+    assert all(r.ok for r in results)
+
+
+def test_scan_respects_concurrency_limit():
+    assets = [Asset(f"S{i}", AssetType.STOCK) for i in range(10)]
+    engine = FakePipeline()
+
+    _scan(
+        WatchlistScanner(FakeSentimentAnalyzer(), engine, 2),
+        assets,
+        [FakeStrategy("balanced")],
+    )
+
+    assert engine.max_in_flight <= 2
+
+
+def test_scan_reports_failures_without_aborting():
+    assets = [Asset("TSLA", AssetType.STOCK), Asset("MSFT", AssetType.STOCK)]
+    engine = FakePipeline(fail_for="TSLA")
+
+    results = _scan(
+        WatchlistScanner(FakeSentimentAnalyzer(), engine),
+        assets,
+        [FakeStrategy("balanced")],
+    )
+
+    failed = [r for r in results if not r.ok]
+    assert len(failed) == 1
+    assert failed[0].asset.symbol == "TSLA"
+    assert isinstance(failed[0].error, RuntimeError)
+    assert failed[0].sentiment is not None
+
+
+def test_multi_strategy_scan_runs_each_asset_once():
+    assets = [Asset(s, AssetType.STOCK) for s in ("TSLA", "MSFT")]
+    strategies = [FakeStrategy("aggressive"), FakeStrategy("conservative")]
+    engine = FakePipeline(fail_for="TSLA")
+
+    results = _scan(
+        WatchlistScanner(FakeSentimentAnalyzer(), engine, multi_strategy=True),
+        assets,
+        strategies,
+    )
+
+    assert engine.multi_runs == 2
+    assert len(results) == 4
+    assert {r.recommendation for r in results if r.ok} == {
+        "MSFT/aggressive",
+        "MSFT/conservative",
+    }
+    failed = [r for r in results if not r.ok]
+    assert {r.strategy.get_name() for r in failed} == {"aggressive", "conservative"}
+    assert all(r.asset.symbol == "TSLA" for r in failed)
+
+
+def test_abandoned_scan_leaves_no_unawaited_coroutines():
+    assets = [Asset(f"S{i}", AssetType.STOCK) for i in range(5)]
+    scanner = WatchlistScanner(FakeSentimentAnalyzer(), FakePipeline(), 1)
+
+    async def first_result():
+        time_frame = TimeFrame(TimeRange.MONTH_1, TimeRange.DAY_1)
+        results = scanner.scan(assets, [FakeStrategy("balanced")], time_frame)
+        try:
+            return await anext(results)
+        finally:
+            await results.aclose()
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert asyncio.run(first_result()).ok
+        gc.collect()
+
+    assert not [w for w in caught if "never awaited" in str(w.message)]